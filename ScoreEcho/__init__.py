@@ -36,4 +36,4 @@ if change_made:
         json.dump(se_config_data, f, ensure_ascii=False, indent=4)
 
 # noqa: F401 - Imported to initialize SV objects
-from . import scoreecho_config, scoreecho_help, scoreecho_score, scoreecho_user
\ No newline at end of file
+from . import scoreecho_config, scoreecho_help, scoreecho_ops, scoreecho_score, scoreecho_start, scoreecho_user
\ No newline at end of file
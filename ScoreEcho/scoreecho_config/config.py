@@ -2,10 +2,17 @@ import os
 
 from gsuid_core.data_store import get_res_path
 from gsuid_core.utils.plugins_config.gs_config import StringConfig
-from gsuid_core.utils.plugins_config.models import GsListStrConfig, GsStrConfig
+from gsuid_core.utils.plugins_config.models import (
+    GsBoolConfig,
+    GsIntConfig,
+    GsListStrConfig,
+    GsStrConfig,
+)
 
 
 TEMPLATE_OPTIONS = ["all", "ribbon", "porcelain", "midnight", "scoreband", "legacy_dark"]
+TRANSPORT_OPTIONS = ["base64", "multipart"]
+COMPRESSION_OPTIONS = ["none", "gzip", "zstd", "auto"]
 
 CONIFG_DEFAULT = {
     "xwtoken": GsStrConfig("xwtoken", "找小维要", "test"),
@@ -21,6 +28,59 @@ CONIFG_DEFAULT = {
         ["all"],
         options=TEMPLATE_OPTIONS,
     ),
+    "avatarsprite": GsBoolConfig(
+        "练度头像精灵图", "预热时把处理好的角色头像拼成精灵图存到磁盘，重启后直接读取", False
+    ),
+    "maxinflight": GsIntConfig("评分并发上限", "同时发往评分服务器的请求数上限", 4, 64),
+    "queuelimit": GsIntConfig("评分排队上限", "排队任务数达到该值时直接拒绝新请求", 30, 500),
+    "queuenotify": GsBoolConfig("提示排队位置", "需要排队时告知用户前面还有多少任务", True),
+    "transport": GsStrConfig(
+        "图片上传方式",
+        "base64 兼容所有服务端；multipart 直接上传图片字节，需服务端支持",
+        "base64",
+        options=TRANSPORT_OPTIONS,
+    ),
+    "compression": GsStrConfig(
+        "请求体压缩",
+        "base64 上传时压缩 JSON 请求体；auto 优先 zstd（需安装 zstandard），服务端返回 415 时自动回退",
+        "none",
+        options=COMPRESSION_OPTIONS,
+    ),
+    "compressratio": GsIntConfig(
+        "压缩生效比例", "压缩后体积不超过原始体积的该百分比才发送压缩结果，否则发送原文", 90, 100
+    ),
+    "hashupload": GsBoolConfig(
+        "图片哈希上传", "先只发送图片摘要，服务端没有的图片再补传；服务端不支持时自动回退", False
+    ),
+    "hedge": GsBoolConfig(
+        "对冲请求", "请求耗时超过近期 p95 仍未返回时，再发一份请求，先返回的为准（会增加服务端负载）", False
+    ),
+    "hedgeendpoint": GsStrConfig("对冲地址", "对冲请求发往的地址，留空则使用 endpoint", ""),
+    "metricstoken": GsStrConfig(
+        "监控令牌", "抓取 /ScoreEcho/metrics 时需携带 Authorization: Bearer <令牌>，留空则关闭该接口", ""
+    ),
+    "profilerate": GsIntConfig(
+        "性能剖析抽样率",
+        "按该百分比随机抽取请求记录调用栈，0 为关闭。抽中的请求全程以 20ms 间隔采样（事件循环内一个采样任务加一个后台线程）",
+        0,
+        100,
+    ),
+    "profileslowms": GsIntConfig(
+        "慢请求剖析阈值",
+        "耗时超过该毫秒数的请求保存调用栈剖析，0 为关闭。请求耗时过半阈值后开始以 20ms 间隔采样"
+        "（事件循环内一个采样任务加一个后台线程），剖析不含请求开头",
+        0,
+        600000,
+    ),
+    "profilekeep": GsIntConfig("剖析保留数", "profiles 目录最多保留的剖析文件数", 50, 1000),
+    "capture": GsBoolConfig(
+        "请求录制", "把评分请求的命令、图片摘要、耗时与结果写入 capture 目录，供复现与重放", False
+    ),
+    "captureimages": GsBoolConfig("录制图片", "录制时同时保存上传的图片（按 sha256 去重，占用磁盘较多）", False),
+    "capturekeep": GsIntConfig("录制保留段数", "capture 目录最多保留的分段数（每段约 64MB）", 10, 200),
+    "dedupewindow": GsIntConfig(
+        "重复命令窗口", "同一用户带相同图片重发同一命令时，该秒数内复用结果，0 为关闭", 30, 3600
+    ),
 }
 
 CONFIG_PATH = get_res_path() / "ScoreEcho" / "config.json"
@@ -1,13 +1,15 @@
+from __future__ import annotations
+
+import asyncio
 import json
 from pathlib import Path
-from typing import Dict
-
-from PIL import Image
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 from gsuid_core.sv import get_plugin_prefixs
 
-from gsuid_core.help.draw_new_plugin_help import get_new_help
-from gsuid_core.help.model import PluginHelp
+if TYPE_CHECKING:
+    from PIL import Image
+    from gsuid_core.help.model import PluginHelp
 
 from ..version import ScoreEchoVersion
 
@@ -17,8 +19,46 @@ ICON_PATH = Path(__file__).parent / "change_icon_path"
 TEXT_PATH = Path(__file__).parent / "texture2d"
 
 
+# 渲染结果按 (pm, 前缀, 版本) 缓存；help.json 或贴图变化时整体失效
+_help_cache: Dict[Tuple[int, str, str], Any] = {}
+_help_signature: Optional[Tuple] = None
+_texture_cache: Dict[Path, Image.Image] = {}
+_help_lock = asyncio.Lock()
+
+
+def _watched_files() -> List[Path]:
+    files = [HELP_DATA, ICON]
+    for folder in (TEXT_PATH, ICON_PATH):
+        if folder.exists():
+            files.extend(sorted(p for p in folder.iterdir() if p.is_file()))
+    return files
+
+
+def _get_signature() -> Tuple:
+    signature = []
+    for path in _watched_files():
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _load_texture(path: Path) -> Image.Image:
+    """读取贴图并常驻内存，返回副本以免绘图过程改动缓存。"""
+    img = _texture_cache.get(path)
+    if img is None:
+        from PIL import Image
+
+        with Image.open(path) as f:
+            img = f.copy()
+        _texture_cache[path] = img
+    return img.copy()
+
+
 def get_footer(color: str = "white") -> Image.Image:
-    return Image.open(TEXT_PATH / f"footer_{color}.png")
+    return _load_texture(TEXT_PATH / f"footer_{color}.png")
 
 
 def get_help_data() -> Dict[str, PluginHelp]:
@@ -30,24 +70,42 @@ def get_help_data() -> Dict[str, PluginHelp]:
 
 
 async def get_help(pm: int):
-    plugin_help = get_help_data()
+    # 绘图依赖 PIL，首次发送帮助时再导入
+    from gsuid_core.help.draw_new_plugin_help import get_new_help
+
+    global _help_signature
+
     prefixes = get_plugin_prefixs("ScoreEcho")
     plugin_prefix = prefixes[0] if prefixes else ""
-    return await get_new_help(
-        plugin_name="ScoreEcho",
-        plugin_info={f"v{ScoreEchoVersion}": ""},
-        plugin_icon=Image.open(ICON),
-        plugin_help=plugin_help,
-        plugin_prefix=plugin_prefix,
-        help_mode="dark",
-        banner_bg=Image.open(TEXT_PATH / "banner_bg.jpg"),
-        banner_sub_text="分析帮助",
-        help_bg=Image.open(TEXT_PATH / "bg.jpg"),
-        cag_bg=Image.open(TEXT_PATH / "cag_bg.png"),
-        item_bg=Image.open(TEXT_PATH / "item.png"),
-        icon_path=ICON_PATH,
-        footer=get_footer(),
-        enable_cache=False,
-        column=4,
-        pm=pm,
-    )
+    key = (pm, plugin_prefix, ScoreEchoVersion)
+
+    async with _help_lock:
+        signature = _get_signature()
+        if signature != _help_signature:
+            _help_cache.clear()
+            _texture_cache.clear()
+            _help_signature = signature
+        cached = _help_cache.get(key)
+        if cached is not None:
+            return cached
+
+        help_img = await get_new_help(
+            plugin_name="ScoreEcho",
+            plugin_info={f"v{ScoreEchoVersion}": ""},
+            plugin_icon=_load_texture(ICON),
+            plugin_help=get_help_data(),
+            plugin_prefix=plugin_prefix,
+            help_mode="dark",
+            banner_bg=_load_texture(TEXT_PATH / "banner_bg.jpg"),
+            banner_sub_text="分析帮助",
+            help_bg=_load_texture(TEXT_PATH / "bg.jpg"),
+            cag_bg=_load_texture(TEXT_PATH / "cag_bg.png"),
+            item_bg=_load_texture(TEXT_PATH / "item.png"),
+            icon_path=ICON_PATH,
+            footer=get_footer(),
+            enable_cache=False,
+            column=4,
+            pm=pm,
+        )
+        _help_cache[key] = help_img
+        return help_img
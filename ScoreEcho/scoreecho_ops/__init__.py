@@ -0,0 +1,163 @@
+"""ScoreEcho 运维页面与 Prometheus 导出。
+
+- 控制台新增「ScoreEcho运维」页面，每 5 秒刷新吞吐、阶段耗时、排队、缓存命中率、
+  地址健康与磁盘占用；
+- ``GET /ScoreEcho/metrics`` 导出 Prometheus 文本，需在控制台设置 ``metricstoken``，
+  抓取时带 ``Authorization: Bearer <token>``，未设置时拒绝访问；
+- 管理员命令 ``评分性能`` 查看最近的性能剖析摘要。
+"""
+import asyncio
+import secrets
+from typing import Any, Dict, List, Optional
+
+from fastapi import Depends, Request
+from fastapi.responses import PlainTextResponse
+from fastapi_amis_admin.amis.components import Page, Property, Service, Table, TableColumn
+from fastapi_amis_admin.amis.types import BaseAmisApiOut
+from gsuid_core.bot import Bot
+from gsuid_core.models import Event
+from gsuid_core.sv import SV
+from gsuid_core.web_app import app
+from gsuid_core.webconsole.mount_app import PageSchema, site
+
+from ..scoreecho_config.config import seconfig
+from ..utils.ops_stats import collect_ops, render_prometheus
+from ..utils.profiler import summarize_profiles
+
+try:
+    from gsuid_core.webconsole.mount_app import GsAdminPage as _OpsPageBase
+except ImportError:
+    from fastapi_amis_admin.admin.admin import PageAdmin as _OpsPageBase
+
+_REFRESH_MS = 5000
+
+sv_score_ops = SV("ScoreEcho运维", pm=1)
+
+
+def _ms(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def _size(num: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num < 1024:
+            return f"{num:.1f}{unit}"
+        num /= 1024
+    return f"{num:.1f}TB"
+
+
+def _display(ops: Dict[str, Any]) -> Dict[str, Any]:
+    """把汇总数据整理成页面表格用的行。"""
+    counters = ops["counters"]
+    return {
+        "throughput": " / ".join(f"{k} {v:.1f}/min" for k, v in ops["throughput"].items()) or "-",
+        "queue_depth": ops["queue"]["depth"],
+        "inflight": ops["queue"]["inflight"],
+        "bytes_up": _size(counters.get("bytes.up", 0)),
+        "bytes_down": _size(counters.get("bytes.down", 0)),
+        "disk": f"{_size(ops['disk']['bytes'])}（{ops['disk']['files']} 个文件）",
+        "stages": [
+            {
+                "name": name,
+                "count": h["count"],
+                "p50": _ms(h["p50"]),
+                "p95": _ms(h["p95"]),
+                "p99": _ms(h["p99"]),
+            }
+            for name, h in ops["histograms"].items()
+        ],
+        "caches": [
+            {**row, "ratio": "-" if row["ratio"] is None else f"{row['ratio']:.1%}"}
+            for row in ops["caches"]
+        ],
+        "endpoints": [
+            {
+                **row,
+                "p50": _ms(row["p50"]),
+                "p95": _ms(row["p95"]),
+                "deadline": f"{row['deadline']:.1f}s",
+            }
+            for row in ops["endpoints"]
+        ],
+        "counters": [{"name": k, "value": v} for k, v in counters.items()],
+    }
+
+
+def _table(title: str, source: str, columns: List[List[str]]) -> Table:
+    return Table(
+        title=title,
+        source=source,
+        columns=[TableColumn(name=name, label=label) for name, label in columns],
+        placeholder="暂无数据",
+    )
+
+
+@site.register_admin
+class ScoreEchoOpsPage(_OpsPageBase):
+    page_schema = PageSchema(
+        label="ScoreEcho运维",
+        icon="fa fa-tachometer",
+    )  # type: ignore
+
+    def register_router(self):
+        super().register_router()
+        self.router.add_api_route(
+            f"{self.page_path}/data",
+            self.route_data,
+            methods=["GET"],
+            dependencies=[Depends(self.page_permission_depend)],
+            response_model=BaseAmisApiOut,
+            include_in_schema=False,
+        )
+        return self
+
+    async def route_data(self, request: Request) -> BaseAmisApiOut:
+        return BaseAmisApiOut(data=_display(await collect_ops()))
+
+    async def get_page(self, request: Request) -> Page:
+        summary = Property(
+            title="概览",
+            column=3,
+            items=[
+                Property.Item(label="吞吐", content="${throughput}"),
+                Property.Item(label="排队", content="${queue_depth}"),
+                Property.Item(label="在途", content="${inflight}"),
+                Property.Item(label="上行", content="${bytes_up}"),
+                Property.Item(label="下行", content="${bytes_down}"),
+                Property.Item(label="用户数据", content="${disk}"),
+            ],
+        )
+        body = [
+            summary,
+            _table("阶段耗时（ms）", "${stages}", [["name", "阶段"], ["count", "次数"], ["p50", "p50"], ["p95", "p95"], ["p99", "p99"]]),
+            _table("缓存命中", "${caches}", [["cache", "缓存"], ["hit", "命中"], ["miss", "未命中"], ["ratio", "命中率"]]),
+            _table(
+                "评分地址",
+                "${endpoints}",
+                [["endpoint", "地址"], ["state", "熔断"], ["failures", "连续失败"], ["samples", "样本"], ["p50", "p50(ms)"], ["p95", "p95(ms)"], ["deadline", "超时"]],
+            ),
+            _table("计数器", "${counters}", [["name", "名称"], ["value", "值"]]),
+        ]
+        return Page(
+            title="ScoreEcho运维",
+            body=Service(
+                api=f"get:{self.router_path}{self.page_path}/data",
+                interval=_REFRESH_MS,
+                silentPolling=True,
+                body=body,
+            ),
+        )
+
+
+@app.get("/ScoreEcho/metrics", response_class=PlainTextResponse)
+async def scoreecho_metrics(request: Request) -> PlainTextResponse:
+    token = str(seconfig.get_config("metricstoken").data)
+    provided = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not token or not secrets.compare_digest(provided.encode("utf-8"), token.encode("utf-8")):
+        return PlainTextResponse("forbidden\n", status_code=403)
+    return PlainTextResponse(render_prometheus(await collect_ops()), media_type="text/plain; version=0.0.4")
+
+
+@sv_score_ops.on_fullmatch(("评分性能", "性能剖析"), block=True)
+async def send_profile_summary(bot: Bot, ev: Event):
+    await bot.send(await asyncio.to_thread(summarize_profiles))
@@ -1,11 +1,14 @@
+import asyncio
 import base64
+import binascii
 import json
+import os
+import re
+import threading
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, Union
 
-import httpx
-from PIL import Image
 from gsuid_core.bot import Bot
 from gsuid_core.data_store import get_res_path
 from gsuid_core.logger import logger
@@ -13,10 +16,31 @@ from gsuid_core.models import Event
 from gsuid_core.sv import SV
 
 from ..scoreecho_config.config import seconfig
-from ..utils.database.models import ScoreUser, ScoreLangSettings
+from ..utils.database.models import ScoreUser
 from ..utils.resource import CHAR_ALIAS_PATH, XW_CHAR_ALIAS_PATH, get_user_dir
-from ..utils.charlist_draw import draw_charlist_image
 from ..utils.char_utils import PATTERN, alias_to_char_name_optional
+from ..utils.concurrency import gather_or_cancel
+from ..utils.bind_cache import get_current_uid, get_uid_list, invalidate_binding
+from ..utils.settings_cache import get_user_lang, load_char_info
+from ..utils.job_queue import (
+    JOB_ANALYSIS,
+    JOB_SCORE,
+    JobTicket,
+    QueueFullError,
+    score_scheduler,
+)
+from ..utils.dedupe import (
+    DEDUPE_DONE,
+    DEDUPE_RUNNING,
+    check_job,
+    finish_job,
+    make_job_key,
+    start_job,
+)
+from ..utils.capture import capture_request
+from ..utils.metrics import inc, record_stage, start_trace, timed, trace_tag
+from ..utils.profiler import profile_request
+from ..utils.resilience import SERVICE_DEGRADED_MSG, ServiceDegradedError, degraded_retry_after
 from ..utils.xwuid_bridge import (
     fetch_baseinfo,
     find_xwuid_net_uid,
@@ -28,47 +52,95 @@ sv_phantom_panel = SV("鸣潮声骸角色面板", priority=3)
 sv_phantom_score = SV("鸣潮声骸评分", priority=10)
 sv_phantom_analysis = SV("鸣潮声骸分析", priority=10)
 sv_phantom_rank = SV("鸣潮声骸练度", priority=3)
+sv_phantom_batch = SV("鸣潮声骸批量分析", priority=5)
+
+# 批量分析单次最多角色数
+BATCH_MAX_ROLES = 20
+BATCH_COMMANDS = ("分析批量", "批量分析")
+# 批量写入的提交日志：存在即表示该批已提交，读取前补完尚未替换的文件
+_BATCH_JOURNAL = ".batch.json"
+_batch_lock = threading.Lock()
+
+# 评分的两条兜底正则不以命令开头，会对每条带前缀的消息从每个位置重试 PATTERN。
+# 先用锚定在开头的前瞻检查消息结尾的形状（cost 标记后只剩可选的主词条，或以评分关键词结尾），
+# 绝大多数聊天在这一步就被拒绝；通过后用惰性前缀从左到右找起点，分组与未锚定写法一致。
+_COST_TOKEN = r"(?:[cC](?:[oO][sS][tT])?\s*[134]|[134]\s*[cC](?:[oO][sS][tT])?)"
+_SCORE_KEYWORD = r"(?:评分|評分|查分)"
+SCORE_COST_REGEX = (
+    rf"^(?=(?s:.*?){_COST_TOKEN}\s*(?:{PATTERN})?$)"
+    rf"(?s:.*?)({PATTERN})\s*(?:[cC](?:[oO][sS][tT])?\s*([134])|([134])\s*[cC](?:[oO][sS][tT])?)\s*({PATTERN})?$"
+)
+SCORE_KEYWORD_REGEX = rf"^(?=(?s:.*){_SCORE_KEYWORD}$)(?s:.*?)({PATTERN}){_SCORE_KEYWORD}$"
+
+# 消息里的图片：http(s) URL，或适配器直接内联的图片字节
+ImageSource = Union[str, bytes]
+
+_BASE64_PREFIX = "base64://"
+_DATA_URI_PREFIX = "data:image/"
+
+
+def _image_source(data: Any) -> Optional[ImageSource]:
+    """把图片段的 data 转成 URL 或图片字节；base64 内联图片在这里直接解码，无法识别返回 None。"""
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data) or None
+    if not data or not isinstance(data, str):
+        return None
+    if data.startswith("http"):
+        return data
+    if data.startswith(_BASE64_PREFIX):
+        encoded = data[len(_BASE64_PREFIX):]
+    elif data.startswith(_DATA_URI_PREFIX) and ";base64," in data:
+        encoded = data.split(";base64,", 1)[1]
+    else:
+        return None
+    try:
+        return base64.b64decode(encoded) or None
+    except (binascii.Error, ValueError) as e:
+        logger.warning(f"[鸣潮评分·图片{trace_tag()}] 内联图片解码失败: {e}")
+        return None
 
-async def get_image(ev: Event):
+
+async def get_image(ev: Event) -> List[ImageSource]:
     res = []
     for content in ev.content:
-        if (
-            content.type == "img"
-            and content.data
-            and isinstance(content.data, str)
-            and content.data.startswith("http")
-        ):
-            res.append(content.data)
-        elif (
-            content.type == "image"
-            and content.data
-            and isinstance(content.data, str)
-            and content.data.startswith("http")
-        ):
-            res.append(content.data)
+        if content.type in ("img", "image"):
+            image = _image_source(content.data)
+            if image is not None:
+                res.append(image)
 
     if not res and ev.image:
-        res.append(ev.image)
+        image = _image_source(ev.image)
+        if image is not None:
+            res.append(image)
+        else:
+            logger.warning(f"[鸣潮评分·图片{trace_tag()}] 无法识别的图片来源，已跳过: {str(ev.image)[:32]}")
 
     return res
 
 
-def _get_char_info_path(user_id: str, uid: str) -> Path:
-    return get_user_dir(user_id, uid) / "char_info.json"
-
-
-def _load_char_info(path: Path) -> Dict[str, str]:
-    if path.exists():
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    else:
-        data = {}
-    if "用户名" not in data:
-        data["用户名"] = ""
-    return data
+def _recover_batch(user_dir: Path) -> None:
+    """补完已提交但未替换完的批量写入（进程在替换途中退出时）。"""
+    journal_path = user_dir / _BATCH_JOURNAL
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            pairs = json.load(f)
+    except FileNotFoundError:
+        return
+    except ValueError:
+        # 提交日志是原子替换进来的，读到损坏内容说明不是我们写的，直接丢弃
+        journal_path.unlink(missing_ok=True)
+        return
+    for tmp_name, final_name in pairs:
+        try:
+            os.replace(user_dir / tmp_name, user_dir / final_name)
+        except FileNotFoundError:
+            # 已被替换过（并发的读取方或写入方）
+            pass
+    journal_path.unlink(missing_ok=True)
 
 
 def _load_result_data(path: Path) -> Dict[str, object]:
+    _recover_batch(path.parent)
     if path.exists():
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -79,8 +151,28 @@ def _load_result_data(path: Path) -> Dict[str, object]:
 
 def _save_result_data(path: Path, data: Dict[str, object]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _save_panel(
+    user_dir: Path,
+    matched_character: Optional[str],
+    image: bytes,
+    role_name: str,
+    score_results: Any,
+) -> None:
+    """保存面板图并更新 result.json；直接写入响应解码出的缓冲区，不再复制。"""
+    user_dir.mkdir(parents=True, exist_ok=True)
+    with open(user_dir / f"{matched_character}.webp", "wb") as f:
+        f.write(image)
+    if score_results is not None:
+        result_path = user_dir / "result.json"
+        result_data = _load_result_data(result_path)
+        result_data[role_name] = score_results
+        _save_result_data(result_path, result_data)
 
 
 def _get_score_templates() -> Optional[list[str]]:
@@ -138,11 +230,11 @@ def _replace_alias(command_str: str, alias_path: Path) -> str:
             for alias in sorted(alias_list, key=len, reverse=True):
                 if alias in command_str:
                     command_str = command_str.replace(alias, char_name)
-                    logger.info(f"[鸣潮评分·别名] 替换别名: {alias} -> {char_name}")
+                    logger.info(f"[鸣潮评分·别名{trace_tag()}] 替换别名: {alias} -> {char_name}")
                     matched_name = char_name
                     break
     except Exception as e:
-        logger.error(f"[鸣潮评分·别名] 加载本地别名文件失败: {e}")
+        logger.error(f"[鸣潮评分·别名{trace_tag()}] 加载本地别名文件失败: {e}")
     return command_str, matched_name
 
 
@@ -152,39 +244,102 @@ def _extract_role_from_command(command_str: str) -> str:
     return parts[0] if parts else ""
 
 
-async def _encode_images(upload_images):
-    images_b64 = []
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        for image_url in upload_images:
-            resp = await client.get(image_url)
-            resp.raise_for_status()
-            image_bytes = resp.content
+# 上传图片的体积上限；已是 WEBP 且不超过该大小的图片原样上传
+_MAX_UPLOAD_BYTES = 2 * 1024 * 1024
 
-            max_size_bytes = 2 * 1024 * 1024
 
-            with Image.open(BytesIO(image_bytes)) as img:
-                if img.mode not in ("RGB",):
-                    img = img.convert("RGB")
+def _is_upload_ready(image_bytes: bytes) -> bool:
+    """已经是不带透明通道、非动图的 WEBP 且不超过上限，无需重新编码（只看文件头，不解码）。
 
-                output_buffer = BytesIO()
-                quality = 100
+    带透明通道或动图的 WEBP 仍要经过 ``_compress_image`` 转成单帧 RGB，和其他格式的上传结果一致。
+    """
+    if len(image_bytes) >= _MAX_UPLOAD_BYTES or len(image_bytes) < 30:
+        return False
+    if image_bytes[:4] != b"RIFF" or image_bytes[8:12] != b"WEBP":
+        return False
+    chunk = image_bytes[12:16]
+    if chunk == b"VP8 ":
+        return True
+    if chunk == b"VP8L":
+        # 无损格式：签名后 32 位小端依次是宽、高各 14 位，第 29 位为 alpha_is_used
+        return image_bytes[20] == 0x2F and not (int.from_bytes(image_bytes[21:25], "little") >> 28) & 1
+    if chunk == b"VP8X":
+        # 扩展格式：标志字节中 0x10 为透明通道，0x02 为动图
+        return not image_bytes[20] & 0x12
+    return False
+
+
+def _compress_image(image_bytes: bytes) -> bytes:
+    from PIL import Image
+
+    max_size_bytes = _MAX_UPLOAD_BYTES
+
+    with Image.open(BytesIO(image_bytes)) as img:
+        if img.mode not in ("RGB",):
+            img = img.convert("RGB")
+
+        output_buffer = BytesIO()
+        quality = 100
+
+        while quality > 10:
+            output_buffer.seek(0)
+            output_buffer.truncate()
+            img.save(output_buffer, format="WEBP", quality=quality)
+            if output_buffer.tell() < max_size_bytes:
+                break
+            quality -= 5
+
+        return output_buffer.getvalue()
+
+
+async def _encode_images(upload_images: List[ImageSource]) -> List[bytes]:
+    import httpx
+
+    images = []
+    # 全部是内联图片时不建连接
+    client = httpx.AsyncClient(timeout=10.0) if any(isinstance(i, str) for i in upload_images) else None
+    try:
+        for image in upload_images:
+            if isinstance(image, bytes):
+                image_bytes = image
+            else:
+                with timed("download"):
+                    resp = await client.get(image)
+                    resp.raise_for_status()
+                    image_bytes = resp.content
 
-                while quality > 10:
-                    output_buffer.seek(0)
-                    output_buffer.truncate()
-                    img.save(output_buffer, format="WEBP", quality=quality)
-                    if output_buffer.tell() < max_size_bytes:
-                        break
-                    quality -= 5
+            if _is_upload_ready(image_bytes):
+                inc("image.passthrough")
+                images.append(image_bytes)
+                continue
 
-                compressed_image_bytes = output_buffer.getvalue()
+            # WEBP 压缩是 CPU 密集操作，放到线程里避免阻塞事件循环
+            with timed("webp"):
+                compressed_image_bytes = await asyncio.to_thread(_compress_image, image_bytes)
 
-            images_b64.append(base64.b64encode(compressed_image_bytes).decode("utf-8"))
-    return images_b64
+            images.append(compressed_image_bytes)
+    finally:
+        if client is not None:
+            await client.aclose()
+    return images
 
 
 async def _get_bound_uid(ev: Event) -> Optional[str]:
-    return await ScoreUser.get_uid_by_game(ev.user_id, ev.bot_id)
+    return await get_current_uid(ev.user_id, ev.bot_id)
+
+
+# 持有自动绑定任务的引用，避免被 GC 提前回收
+_adopt_tasks: Set["asyncio.Task[List[str]]"] = set()
+
+
+async def _adopt_xwuid_uid(user_id: str, bot_id: str, net_uid: str, group_id: Optional[str]) -> List[str]:
+    """把 xwuid 上的国际服 UID 加入本表并切换过去，返回新的 UID 列表。"""
+    code = await ScoreUser.insert_uid(user_id, bot_id, net_uid, group_id)
+    if code in (0, -2):
+        await ScoreUser.switch_uid_by_game(user_id, bot_id, net_uid)
+    invalidate_binding(user_id, bot_id)
+    logger.info(f"[鸣潮评分·UID解析{trace_tag()}] 自动从 xwuid 添加国际服 UID {net_uid}")
+    return await get_uid_list(user_id, bot_id)
 
 
 async def _resolve_score_uid(ev: Event) -> Optional[str]:
@@ -196,16 +351,19 @@ async def _resolve_score_uid(ev: Event) -> Optional[str]:
     user_id = ev.user_id
     bot_id = ev.bot_id
 
-    xw_net_uid = await find_xwuid_net_uid(user_id, bot_id)
-    if xw_net_uid:
-        score_uids = await ScoreUser.get_uid_list_by_game(user_id, bot_id) or []
-        if xw_net_uid not in score_uids:
-            code = await ScoreUser.insert_uid(user_id, bot_id, xw_net_uid, ev.group_id)
-            if code in (0, -2):
-                await ScoreUser.switch_uid_by_game(user_id, bot_id, xw_net_uid)
-            logger.info(f"[鸣潮评分·UID解析] 自动从 xwuid 添加国际服 UID {xw_net_uid}")
+    with timed("uid"):
+        xw_net_uid, score_uids = await gather_or_cancel(
+            find_xwuid_net_uid(user_id, bot_id),
+            get_uid_list(user_id, bot_id),
+        )
+    if xw_net_uid and xw_net_uid not in score_uids:
+        # 本分支可能因图片下载失败被取消；写库、切换与清缓存一旦开始就跑完，不留半切换的状态
+        task = asyncio.ensure_future(_adopt_xwuid_uid(user_id, bot_id, xw_net_uid, ev.group_id))
+        _adopt_tasks.add(task)
+        task.add_done_callback(_adopt_tasks.discard)
+        score_uids = await asyncio.shield(task)
 
-    return await ScoreUser.get_uid_by_game(user_id, bot_id)
+    return score_uids[0] if score_uids else None
 
 
 async def _build_user_data(
@@ -219,7 +377,8 @@ async def _build_user_data(
     user_data: Dict[str, object] = {"uid": uid}
     user_name = char_user_name
 
-    info = await fetch_baseinfo(ev.user_id, ev.bot_id, uid)
+    with timed("baseinfo"):
+        info = await fetch_baseinfo(ev.user_id, ev.bot_id, uid)
     if info:
         if not user_name and info.get("role_name"):
             user_name = str(info["role_name"])
@@ -238,6 +397,134 @@ async def _build_user_data(
     return user_data
 
 
+class _PipelineAbort(Exception):
+    """流水线某个分支需要直接回复用户并终止处理。"""
+
+    def __init__(self, msg: str):
+        super().__init__(msg)
+        self.msg = msg
+
+
+async def _prepare_images(upload_images, log_tag: str):
+    """下载并编码图片，失败时转成 ``_PipelineAbort`` 以便取消其它分支。"""
+    import httpx
+
+    try:
+        return await _encode_images(upload_images)
+    except httpx.RequestError as e:
+        logger.error(f"[鸣潮评分·{log_tag}{trace_tag()}] 下载图片失败: {e}")
+        raise _PipelineAbort("下载图片失败，请稍后再试。")
+    except Exception as e:
+        logger.error(f"[鸣潮评分·{log_tag}{trace_tag()}] 图片处理失败: {e}")
+        raise _PipelineAbort("图片处理失败，请稍后再试。")
+
+
+async def _replace_alias_async(command_str: str):
+    alias_path = _get_local_alias_path()
+    if not alias_path:
+        return command_str, None
+    with timed("alias"):
+        return await asyncio.to_thread(_replace_alias, command_str, alias_path)
+
+
+async def _get_user_lang_timed(user_id: str) -> str:
+    with timed("lang"):
+        return await get_user_lang(user_id)
+
+
+async def _enqueue_job(bot: Bot, ev: Event, kind: str, is_group: bool) -> Optional[JobTicket]:
+    """在全局调度器里排队，队满时回复并返回 None。"""
+    try:
+        ticket = score_scheduler.enqueue(ev.user_id, ev.group_id, kind)
+    except QueueFullError:
+        await bot.send(_format_msg("当前评分请求过多，请稍后再试。", is_group), at_sender=is_group)
+        return None
+    if not ticket.granted and seconfig.get_config("queuenotify").data:
+        try:
+            await bot.send(
+                _format_msg(f"排队中，前面还有{ticket.position}个任务，请稍候~", is_group),
+                at_sender=is_group,
+            )
+        except BaseException:
+            ticket.cancel()
+            raise
+    return ticket
+
+
+async def _reply_duplicate(bot: Bot, dedupe_key: str, is_group: bool) -> bool:
+    """重复命令：仍在处理则提示，刚完成则复用结果。返回是否已处理。"""
+    status, result = check_job(dedupe_key)
+    if status == DEDUPE_RUNNING:
+        await bot.send(_format_msg("相同的请求正在处理中，请稍候~", is_group), at_sender=is_group)
+        return True
+    if status == DEDUPE_DONE and result:
+        await bot.send(result)
+        return True
+    return False
+
+
+async def _claim_content_key(
+    bot: Bot, ev: Event, kind: str, images: List[bytes], is_group: bool, dedupe_keys: List[str]
+) -> bool:
+    """按编码后的图片内容再去重一次，返回是否已作为重复命令处理。
+
+    QQ 等平台的图片 URL 带每条消息的令牌，重发同一张截图时 URL 也不同，
+    只按 URL 去重几乎不会命中；这里省下的是重复的 API 调用。
+    """
+    key = make_job_key(ev.user_id, kind, ev.raw_text, images)
+    if key in dedupe_keys:
+        return False
+    if await _reply_duplicate(bot, key, is_group):
+        return True
+    start_job(key)
+    dedupe_keys.append(key)
+    return False
+
+
+async def _reply_degraded(bot: Bot, is_group: bool) -> bool:
+    """评分服务熔断中则直接回复降级提示，不再排队和下载图片。返回是否已处理。"""
+    retry_after = degraded_retry_after()
+    if retry_after is None:
+        return False
+    msg = f"{SERVICE_DEGRADED_MSG}（约 {retry_after:.0f} 秒后恢复探测）"
+    await bot.send(_format_msg(msg, is_group), at_sender=is_group)
+    return True
+
+
+async def _load_analysis_user(ev: Event):
+    """分析用的 ``(uid, lang, char_info, user_data)``，未绑定时中止。"""
+    uid, lang = await gather_or_cancel(_resolve_score_uid(ev), _get_user_lang_timed(ev.user_id))
+    if not uid:
+        raise _PipelineAbort("请先使用分析绑定UID后再进行分析")
+    char_info = load_char_info(ev.user_id, uid)
+    user_data = await _build_user_data(ev, uid, char_info.get("用户名", "").strip())
+    return uid, lang, char_info, user_data
+
+
+def _resolve_analysis_role(
+    command_str: str, matched_name: Optional[str], char_info: Dict[str, str]
+) -> Tuple[str, str]:
+    """解析命令里的角色名，并附加用户为该角色设置的信息。返回 ``(命令, 角色名)``。"""
+    role_name = _extract_role_from_command(command_str)
+    if role_name:
+        alias_path = _get_alias_path()
+        resolved_name = alias_to_char_name_optional(alias_path, role_name)
+        role_name = matched_name or resolved_name or role_name
+    role_info = char_info.get(matched_name, "").strip() if role_name and matched_name else ""
+    if role_info:
+        command_str = f"{command_str} {role_info}".strip()
+    return command_str, role_name
+
+
+async def _load_score_user_data(ev: Event) -> Optional[Dict[str, object]]:
+    """评分用的 user_data；未绑定 UID 时返回 None。"""
+    uid = await _resolve_score_uid(ev)
+    if not uid:
+        return None
+    char_info = load_char_info(ev.user_id, uid)
+    return await _build_user_data(ev, uid, char_info.get("用户名", "").strip())
+
+
 @sv_phantom_panel.on_regex(
     rf"^分析\s*(?P<char>{PATTERN})\s*(?P<type>面板|面包|麵包|🍞|card)$",
     block=True,
@@ -260,6 +547,7 @@ async def score_role_panel(bot: Bot, ev: Event):
     if not role_name:
         return await bot.send(_format_msg("未找到对应的角色别名，请检查输入", is_group), at_sender=is_group)
     user_dir = get_user_dir(ev.user_id, uid)
+    _recover_batch(user_dir)
     panel_path = user_dir / f"{role_name}.webp"
     if not panel_path.exists():
         return await bot.send(_format_msg("用户没有该角色面板图片，请使用分析指令获取", is_group), at_sender=is_group)
@@ -299,9 +587,9 @@ async def delete_role_panel(bot: Bot, ev: Event):
     if panel_exists:
         try:
             panel_path.unlink()
-            logger.info(f"[鸣潮评分·删除面板] 已删除面板图片: {panel_path}")
+            logger.info(f"[鸣潮评分·删除面板{trace_tag()}] 已删除面板图片: {panel_path}")
         except Exception as e:
-            logger.error(f"[鸣潮评分·删除面板] 删除面板图片失败: {e}")
+            logger.error(f"[鸣潮评分·删除面板{trace_tag()}] 删除面板图片失败: {e}")
             return await bot.send(_format_msg(f"删除面板图片失败: {e}", is_group), at_sender=is_group)
 
     if result_path.exists():
@@ -310,7 +598,7 @@ async def delete_role_panel(bot: Bot, ev: Event):
             score_exists = True
             del result_data[role_name]
             _save_result_data(result_path, result_data)
-            logger.info(f"[鸣潮评分·删除面板] 已删除评分数据: {role_name}")
+            logger.info(f"[鸣潮评分·删除面板{trace_tag()}] 已删除评分数据: {role_name}")
 
     if not panel_exists and not score_exists:
         return await bot.send(_format_msg(f"未找到{role_name}的面板数据", is_group), at_sender=is_group)
@@ -388,14 +676,9 @@ async def score_phantom_rank(bot: Bot, ev: Event):
     return await bot.send(msg, at_sender=False)
 
 @sv_phantom_score.on_command(("评分", "評分", "查分", "pf"), block=True)
-@sv_phantom_score.on_regex(
-    (
-        rf"({PATTERN})\s*(?:[cC](?:[oO][sS][tT])?\s*([134])|([134])\s*[cC](?:[oO][sS][tT])?)\s*({PATTERN})?$",
-        rf"({PATTERN})(?:评分|評分|查分)$",
-    ),
-    block=True,
-)
+@sv_phantom_score.on_regex((SCORE_COST_REGEX, SCORE_KEYWORD_REGEX), block=True)
 async def score_phantom_handler(bot: Bot, ev: Event):
+    start_trace("score")
     is_group = ev.group_id is not None
     alias_error = _check_alias_path()
     if alias_error:
@@ -407,99 +690,118 @@ async def score_phantom_handler(bot: Bot, ev: Event):
         await bot.send(_format_msg("请在发送命令的同时附带需要评分的声骸截图哦", is_group), at_sender=is_group)
         return
 
-    try:
-        images_b64 = await _encode_images(upload_images)
-    except httpx.RequestError as e:
-        logger.error(f"[鸣潮评分·评分] 下载图片失败: {e}")
-        await bot.send(_format_msg("下载图片失败，请稍后再试。", is_group), at_sender=is_group)
+    dedupe_key = make_job_key(ev.user_id, JOB_SCORE, ev.raw_text, upload_images)
+    if await _reply_duplicate(bot, dedupe_key, is_group):
         return
-    except Exception as e:
-        logger.error(f"[鸣潮评分·评分] 图片处理失败: {e}")
-        await bot.send(_format_msg("图片处理失败，请稍后再试。", is_group), at_sender=is_group)
+    if await _reply_degraded(bot, is_group):
         return
 
+    dedupe_keys = [dedupe_key]
+    start_job(dedupe_key)
+    result = None
+    try:
+        async with profile_request("score", ev.raw_text, ev.user_id, ev.group_id), capture_request(
+            "score", ev.raw_text, ev.user_id, ev.group_id
+        ):
+            with timed("total"):
+                result = await _run_score(bot, ev, upload_images, is_group, dedupe_keys)
+    finally:
+        for key in dedupe_keys:
+            finish_job(key, result)
+
+
+async def _run_score(
+    bot: Bot, ev: Event, upload_images, is_group: bool, dedupe_keys: List[str]
+) -> Optional[bytes]:
+    """评分主流程，返回发出的结果图（没有则为 None）。"""
+    # httpx / msgspec 等到第一次真正调用评分 API 时才导入，缩短 bot 启动时间
+    import httpx
+
+    from ..utils.score_client import post_score
+
     if ev.regex_group:
         command_str = ' '.join(g for g in ev.regex_group if g)
     else:
         command_str = ev.text.strip()
 
-    alias_path = _get_local_alias_path()
-    if alias_path:
-        command_str, _ = _replace_alias(command_str, alias_path)
+    # 图片下载编码与别名/语言/UID/基础信息查询互不依赖，并发执行
+    try:
+        images, (command_str, _), user_lang, user_data = await gather_or_cancel(
+            _prepare_images(upload_images, "评分"),
+            _replace_alias_async(command_str),
+            _get_user_lang_timed(ev.user_id),
+            _load_score_user_data(ev),
+        )
+    except _PipelineAbort as e:
+        await bot.send(_format_msg(e.msg, is_group), at_sender=is_group)
+        return None
+    if await _claim_content_key(bot, ev, JOB_SCORE, images, is_group, dedupe_keys):
+        return None
 
-    logger.info(f"[鸣潮评分·评分] 准备发送评分请求，命令参数: {command_str}")
+    logger.info(f"[鸣潮评分·评分{trace_tag()}] 准备发送评分请求，命令参数: {command_str}")
 
-    headers = {
-        "Authorization": f"Bearer {seconfig.get_config('xwtoken').data}",
-        "Content-Type": "application/json",
-    }
-    user_lang = await ScoreLangSettings.get_lang(ev.user_id)
     payload: Dict[str, object] = {
         "command_str": command_str,
-        "images_base64": images_b64,
     }
     templates = _get_score_templates()
     if templates:
         payload["templates"] = templates
 
-    uid = await _resolve_score_uid(ev)
-    if uid:
-        char_info = _load_char_info(_get_char_info_path(ev.user_id, uid))
-        user_data = await _build_user_data(ev, uid, char_info.get("用户名", "").strip())
+    if user_data:
         payload["user_data"] = user_data
 
     if user_lang:
         payload["lang"] = user_lang
 
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                seconfig.get_config("endpoint").data,
-                headers=headers,
-                json=payload,
-                timeout=20.0,
-            )
-            response.raise_for_status()
+    ticket = await _enqueue_job(bot, ev, JOB_SCORE, is_group)
+    if ticket is None:
+        return None
 
-            data = response.json()
-            message = data.get("message")
-            result_image_b64 = data.get("result_image_base64")
+    async with ticket:
+        record_stage("queue", ticket.wait_time)
+        try:
+            with timed("api"):
+                data = await post_score(payload, images)
+            del images
+            message = data.message
 
-            logger.info(f"[鸣潮评分·评分] API 响应消息: {message}")
+            logger.info(f"[鸣潮评分·评分{trace_tag()}] API 响应消息: {message}")
 
-            if result_image_b64:
-                result_image_data = base64.b64decode(result_image_b64)
-                await bot.send(result_image_data)
+            if data.result_image:
+                with timed("send"):
+                    await bot.send(data.result_image)
+                return data.result_image
             else:
                 await bot.send(_format_msg(f"处理完成，但未能生成图片：\n{message}", is_group), at_sender=is_group)
 
-    except httpx.HTTPStatusError as e:
-        error_msg = f"API 请求失败，服务器返回错误码: {e.response.status_code}"
-        try:
-            error_detail = e.response.json().get("detail", "无详细信息")
-            error_msg += f"\n错误信息: {error_detail}"
-        except Exception:
-            error_msg += f"\n原始响应: {e.response.text}"
-        logger.error(f"[鸣潮评分·评分] {error_msg}")
-        await bot.send(error_msg, at_sender=is_group)
+        except ServiceDegradedError as e:
+            logger.warning(f"[鸣潮评分·评分{trace_tag()}] {e}")
+            await bot.send(_format_msg(SERVICE_DEGRADED_MSG, is_group), at_sender=is_group)
 
-    except httpx.RequestError as e:
-        logger.error(f"[鸣潮评分·评分] 网络请求失败: {e}")
-        await bot.send(_format_msg(f"连接评分服务器失败。\n错误: {e}", is_group), at_sender=is_group)
+        except httpx.HTTPStatusError as e:
+            error_msg = f"API 请求失败，服务器返回错误码: {e.response.status_code}"
+            try:
+                error_detail = e.response.json().get("detail", "无详细信息")
+                error_msg += f"\n错误信息: {error_detail}"
+            except Exception:
+                error_msg += f"\n原始响应: {e.response.text}"
+            logger.error(f"[鸣潮评分·评分{trace_tag()}] {error_msg}")
+            await bot.send(error_msg, at_sender=is_group)
 
-    except Exception as e:
-        logger.exception(f"[鸣潮评分·评分] 处理评分时发生未知错误: {e}")
-        await bot.send(_format_msg(f"未知错误。联系小维\n错误详情: {e}", is_group), at_sender=is_group)
+        except httpx.RequestError as e:
+            logger.error(f"[鸣潮评分·评分{trace_tag()}] 网络请求失败: {e}")
+            await bot.send(_format_msg(f"连接评分服务器失败。\n错误: {e}", is_group), at_sender=is_group)
+
+        except Exception as e:
+            logger.exception(f"[鸣潮评分·评分{trace_tag()}] 处理评分时发生未知错误: {e}")
+            await bot.send(_format_msg(f"未知错误。联系小维\n错误详情: {e}", is_group), at_sender=is_group)
+    return None
 
 
 @sv_phantom_analysis.on_command(("分析",), block=True)
 async def analyze_phantom_handler(bot: Bot, ev: Event):
+    start_trace("analysis")
     is_group = ev.group_id is not None
-    uid = await _resolve_score_uid(ev)
-    if not uid:
-        await bot.send(_format_msg("请先使用分析绑定UID后再进行分析", is_group), at_sender=is_group)
-        return
-
     alias_error = _check_alias_path()
     if alias_error:
         await bot.send(_format_msg(alias_error, is_group), at_sender=is_group)
@@ -510,46 +812,56 @@ async def analyze_phantom_handler(bot: Bot, ev: Event):
         await bot.send(_format_msg("请在发送命令的同时附带需要分析的声骸截图哦", is_group), at_sender=is_group)
         return
 
-    try:
-        images_b64 = await _encode_images(upload_images)
-    except httpx.RequestError as e:
-        logger.error(f"[鸣潮评分·分析] 下载图片失败: {e}")
-        await bot.send(_format_msg("下载图片失败，请稍后再试。", is_group), at_sender=is_group)
+    dedupe_key = make_job_key(ev.user_id, JOB_ANALYSIS, ev.raw_text, upload_images)
+    if await _reply_duplicate(bot, dedupe_key, is_group):
         return
-    except Exception as e:
-        logger.error(f"[鸣潮评分·分析] 图片处理失败: {e}")
-        await bot.send(_format_msg("图片处理失败，请稍后再试。", is_group), at_sender=is_group)
+    if await _reply_degraded(bot, is_group):
         return
 
+    dedupe_keys = [dedupe_key]
+    start_job(dedupe_key)
+    result = None
+    try:
+        async with profile_request("analysis", ev.raw_text, ev.user_id, ev.group_id), capture_request(
+            "analysis", ev.raw_text, ev.user_id, ev.group_id
+        ):
+            with timed("total"):
+                result = await _run_analysis(bot, ev, upload_images, is_group, dedupe_keys)
+    finally:
+        for key in dedupe_keys:
+            finish_job(key, result)
+
+
+async def _run_analysis(
+    bot: Bot, ev: Event, upload_images, is_group: bool, dedupe_keys: List[str]
+) -> Optional[bytes]:
+    """分析主流程，返回发出的结果图（没有则为 None）。"""
+    import httpx
+
+    from ..utils.score_client import post_score
+
     command_str = ev.text.strip()
     has_args = bool(command_str)
-    alias_path = _get_local_alias_path()
-    if alias_path:
-        command_str, matched_name = _replace_alias(command_str, alias_path)
 
-    char_info_path = _get_char_info_path(ev.user_id, uid)
-    char_info = _load_char_info(char_info_path)
-    user_name = char_info.get("用户名", "").strip()
-    role_name = _extract_role_from_command(command_str)
-    if role_name:
-        alias_path = _get_alias_path()
-        resolved_name = alias_to_char_name_optional(alias_path, role_name)
-        role_name = matched_name or resolved_name or role_name
-    role_info = char_info.get(matched_name, "").strip() if role_name else ""
-    if role_info:
-        command_str = f"{command_str} {role_info}".strip()
+    # 图片下载编码与别名/UID/设置/基础信息查询并发执行，未绑定时取消图片下载
+    try:
+        images, (command_str, matched_name), user_context = await gather_or_cancel(
+            _prepare_images(upload_images, "分析"),
+            _replace_alias_async(command_str),
+            _load_analysis_user(ev),
+        )
+    except _PipelineAbort as e:
+        await bot.send(_format_msg(e.msg, is_group), at_sender=is_group)
+        return None
+    if await _claim_content_key(bot, ev, JOB_ANALYSIS, images, is_group, dedupe_keys):
+        return None
+    uid, analysis_lang, char_info, user_data = user_context
+    command_str, role_name = _resolve_analysis_role(command_str, matched_name, char_info)
 
-    logger.info(f"[鸣潮评分·分析] 准备发送分析请求，命令参数: {command_str}, 是否有参数: {has_args}")
+    logger.info(f"[鸣潮评分·分析{trace_tag()}] 准备发送分析请求，命令参数: {command_str}, 是否有参数: {has_args}")
 
-    headers = {
-        "Authorization": f"Bearer {seconfig.get_config('xwtoken').data}",
-        "Content-Type": "application/json",
-    }
-    user_data = await _build_user_data(ev, uid, user_name)
-    analysis_lang = await ScoreLangSettings.get_lang(ev.user_id)
     payload: Dict[str, object] = {
         "command_str": command_str,
-        "images_base64": images_b64,
         "user_data": user_data,
     }
     templates = _get_score_templates()
@@ -558,55 +870,312 @@ async def analyze_phantom_handler(bot: Bot, ev: Event):
     if analysis_lang:
         payload["lang"] = analysis_lang
 
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                seconfig.get_config("endpoint").data,
-                headers=headers,
-                json=payload,
-                timeout=20.0,
-            )
-            response.raise_for_status()
+    ticket = await _enqueue_job(bot, ev, JOB_ANALYSIS, is_group)
+    if ticket is None:
+        return None
 
-            data = response.json()
-            message = data.get("message")
-            result_image_b64 = data.get("result_image_base64")
-            score_results = data.get("score_results")
-            matched_character = data.get("matched_character")
+    async with ticket:
+        record_stage("queue", ticket.wait_time)
+        try:
+            with timed("api"):
+                data = await post_score(payload, images)
+            del images
+            message = data.message
+            result_image_data = data.result_image
 
-            logger.info(f"[鸣潮评分·分析] API 响应消息: {message}")
+            logger.info(f"[鸣潮评分·分析{trace_tag()}] API 响应消息: {message}")
 
-            if result_image_b64:
-                result_image_data = base64.b64decode(result_image_b64)
+            if result_image_data:
                 if role_name and has_args:
-                    user_dir = get_user_dir(ev.user_id, uid)
-                    user_dir.mkdir(parents=True, exist_ok=True)
-                    panel_path = user_dir / f"{matched_character}.webp"
-                    with open(panel_path, "wb") as f:
-                        f.write(result_image_data)
-                    if score_results is not None:
-                        result_path = user_dir / "result.json"
-                        result_data = _load_result_data(result_path)
-                        result_data[role_name] = score_results
-                        _save_result_data(result_path, result_data)
-                await bot.send(result_image_data)
+                    with timed("persist"):
+                        await asyncio.to_thread(
+                            _save_panel,
+                            get_user_dir(ev.user_id, uid),
+                            data.matched_character,
+                            result_image_data,
+                            role_name,
+                            data.score_results,
+                        )
+                with timed("send"):
+                    await bot.send(result_image_data)
+                return result_image_data
             else:
                 await bot.send(_format_msg(f"处理完成，但未能生成图片：\n{message}", is_group), at_sender=is_group)
 
-    except httpx.HTTPStatusError as e:
-        error_msg = f"API 请求失败，服务器返回错误码: {e.response.status_code}"
+        except ServiceDegradedError as e:
+            logger.warning(f"[鸣潮评分·分析{trace_tag()}] {e}")
+            await bot.send(_format_msg(SERVICE_DEGRADED_MSG, is_group), at_sender=is_group)
+
+        except httpx.HTTPStatusError as e:
+            error_msg = f"API 请求失败，服务器返回错误码: {e.response.status_code}"
+            try:
+                error_detail = e.response.json().get("detail", "无详细信息")
+                error_msg += f"\n错误信息: {error_detail}"
+            except Exception:
+                error_msg += f"\n原始响应: {e.response.text}"
+            logger.error(f"[鸣潮评分·分析{trace_tag()}] {error_msg}")
+            await bot.send(error_msg, at_sender=is_group)
+
+        except httpx.RequestError as e:
+            logger.error(f"[鸣潮评分·分析{trace_tag()}] 网络请求失败: {e}")
+            await bot.send(_format_msg(f"连接评分服务器失败。\n错误: {e}", is_group), at_sender=is_group)
+
+        except Exception as e:
+            logger.exception(f"[鸣潮评分·分析{trace_tag()}] 处理分析时发生未知错误: {e}")
+            await bot.send(_format_msg(f"未知错误。联系小维\n错误详情: {e}", is_group), at_sender=is_group)
+    return None
+
+
+class _BatchOutcome(NamedTuple):
+    command: str
+    role_name: str
+    matched: str
+    image: Optional[bytes]
+    score_results: Optional[List[float]]
+    error: str
+
+
+def _split_batch_command(text: str) -> List[str]:
+    """按逗号/分号/换行拆分每个角色的命令；没有分隔符时按空格拆分角色名。"""
+    if re.search(r"[,，;；\n]", text):
+        parts = re.split(r"[,，;；\n]", text)
+    else:
+        parts = text.split()
+    return [part.strip() for part in parts if part.strip()]
+
+
+_BATCH_COMMAND_RE = re.compile(rf"^.*?(?:{'|'.join(BATCH_COMMANDS)})")
+
+
+def _captioned_batch(ev: Event) -> Optional[List[Tuple[str, List[ImageSource]]]]:
+    """按图片前的文字给图片打标签，如「分析批量 长离[图][图] 今汐[图]」。
+
+    每组连续的图片归属紧挨在它前面的文字段里最后一个角色名（命令词及其前缀会被去掉）。
+    只有至少两组图片、且每组前面都有文字时才按标签分组，否则返回 None，按顺序匹配。
+    """
+    groups: List[Tuple[str, List[ImageSource]]] = []
+    # 上一组图片之后出现的新标签
+    caption: Optional[str] = None
+    for content in ev.content:
+        if content.type == "text" and isinstance(content.data, str):
+            parts = _split_batch_command(_BATCH_COMMAND_RE.sub("", content.data, count=1))
+            if parts:
+                caption = parts[-1]
+        elif content.type in ("img", "image"):
+            image = _image_source(content.data)
+            if image is None:
+                continue
+            if caption is not None:
+                groups.append((caption, []))
+                caption = None
+            elif not groups:
+                return None
+            groups[-1][1].append(image)
+    if len(groups) < 2:
+        return None
+    return groups
+
+
+def _batch_images_per_role(segments: List[str], images: List[ImageSource]) -> int:
+    """按顺序把图片分给各角色：数量相等时一人一张，整数倍时每人连续若干张；无法均分返回 0。"""
+    if not segments or not images or len(images) % len(segments):
+        return 0
+    return len(images) // len(segments)
+
+
+def _persist_batch(user_dir: Path, outcomes: List[_BatchOutcome]) -> None:
+    """事务性写入全部面板图与 result.json。
+
+    先把所有内容写成临时文件，再原子替换进提交日志 ``_BATCH_JOURNAL`` 作为提交点，
+    最后逐个替换到位并删除日志。提交前中断：旧数据不变，残留的临时文件在下一次批量写入时清理；
+    提交后中断：下一次读取 result.json 或面板时按日志补完。
+    同一角色在一批里出现多次（重复命令或同一角色的不同别名）时以最后一次为准。
+    """
+    with _batch_lock:
+        user_dir.mkdir(parents=True, exist_ok=True)
+        result_path = user_dir / "result.json"
+        result_data = _load_result_data(result_path)
+        for stale in user_dir.glob(".batch-*.tmp"):
+            stale.unlink(missing_ok=True)
+
+        panels: Dict[str, bytes] = {}
+        for outcome in outcomes:
+            if outcome.image is None:
+                continue
+            panels[outcome.matched] = outcome.image
+            if outcome.score_results is not None:
+                result_data[outcome.role_name] = outcome.score_results
+
+        # 临时文件名按序号区分，不依赖角色名
+        pairs: List[Tuple[str, str]] = []
+        journal_tmp = user_dir / ".batch-journal.tmp"
         try:
-            error_detail = e.response.json().get("detail", "无详细信息")
-            error_msg += f"\n错误信息: {error_detail}"
-        except Exception:
-            error_msg += f"\n原始响应: {e.response.text}"
-        logger.error(f"[鸣潮评分·分析] {error_msg}")
-        await bot.send(error_msg, at_sender=is_group)
+            for index, (matched, image) in enumerate(panels.items()):
+                tmp_name = f".batch-{index}.webp.tmp"
+                with open(user_dir / tmp_name, "wb") as f:
+                    f.write(image)
+                pairs.append((tmp_name, f"{matched}.webp"))
+            with open(user_dir / ".batch-result.json.tmp", "w", encoding="utf-8") as f:
+                json.dump(result_data, f, ensure_ascii=False, indent=2)
+            pairs.append((".batch-result.json.tmp", "result.json"))
+            with open(journal_tmp, "w", encoding="utf-8") as f:
+                json.dump(pairs, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(journal_tmp, user_dir / _BATCH_JOURNAL)
+        except BaseException:
+            for stale in user_dir.glob(".batch-*.tmp"):
+                stale.unlink(missing_ok=True)
+            raise
+        _recover_batch(user_dir)
+
+
+async def _run_batch_job(
+    ev: Event,
+    command_str: str,
+    images: List[bytes],
+    user_context,
+) -> _BatchOutcome:
+    import httpx
+
+    from ..utils.score_client import post_score
+
+    """执行一个角色的分析；所有异常都在这里转成失败结果，不影响同批的其他角色。"""
+    uid, lang, char_info, user_data = user_context
+    role_name: Optional[str] = None
+
+    def _failed(error: str) -> _BatchOutcome:
+        return _BatchOutcome(command_str, role_name or command_str, "", None, None, error)
 
-    except httpx.RequestError as e:
-        logger.error(f"[鸣潮评分·分析] 网络请求失败: {e}")
-        await bot.send(_format_msg(f"连接评分服务器失败。\n错误: {e}", is_group), at_sender=is_group)
+    try:
+        replaced, matched_name = await _replace_alias_async(command_str)
+        replaced, role_name = _resolve_analysis_role(replaced, matched_name, char_info)
+    except Exception as e:
+        logger.exception(f"[鸣潮评分·批量分析{trace_tag()}] {command_str} 解析角色失败: {e}")
+        return _failed("解析角色失败")
 
+    payload: Dict[str, object] = {
+        "command_str": replaced,
+        "user_data": user_data,
+    }
+    templates = _get_score_templates()
+    if templates:
+        payload["templates"] = templates
+    if lang:
+        payload["lang"] = lang
+
+    try:
+        ticket = score_scheduler.enqueue(ev.user_id, ev.group_id, JOB_ANALYSIS)
+    except QueueFullError:
+        return _failed("排队已满")
+
+    try:
+        async with ticket:
+            record_stage("queue", ticket.wait_time)
+            with timed("api"):
+                data = await post_score(payload, images)
+    except ServiceDegradedError:
+        return _failed("评分服务降级中")
+    except httpx.HTTPStatusError as e:
+        logger.error(f"[鸣潮评分·批量分析{trace_tag()}] {command_str} 请求失败: {e.response.status_code}")
+        return _failed(f"服务器返回错误码 {e.response.status_code}")
+    except httpx.RequestError as e:
+        logger.error(f"[鸣潮评分·批量分析{trace_tag()}] {command_str} 网络请求失败: {e}")
+        return _failed("连接评分服务器失败")
     except Exception as e:
-        logger.exception(f"[鸣潮评分·分析] 处理分析时发生未知错误: {e}")
-        await bot.send(_format_msg(f"未知错误。联系小维\n错误详情: {e}", is_group), at_sender=is_group)
+        logger.exception(f"[鸣潮评分·批量分析{trace_tag()}] {command_str} 未知错误: {e}")
+        return _failed(str(e))
+
+    if not data.result_image or not role_name:
+        return _failed(data.message or "未能生成结果")
+    return _BatchOutcome(
+        command_str,
+        role_name,
+        data.matched_character or role_name,
+        data.result_image,
+        data.score_results,
+        "",
+    )
+
+
+@sv_phantom_batch.on_command(BATCH_COMMANDS, block=True)
+async def batch_analyze_handler(bot: Bot, ev: Event):
+    start_trace("batch")
+    async with profile_request("batch", ev.raw_text, ev.user_id, ev.group_id), capture_request(
+        "batch", ev.raw_text, ev.user_id, ev.group_id
+    ):
+        with timed("total"):
+            return await _run_batch(bot, ev)
+
+
+async def _run_batch(bot: Bot, ev: Event):
+    is_group = ev.group_id is not None
+    alias_error = _check_alias_path()
+    if alias_error:
+        return await bot.send(_format_msg(alias_error, is_group), at_sender=is_group)
+
+    captioned = _captioned_batch(ev)
+    if captioned:
+        # 图片前带角色名：按标签分组，每个角色的图片数可以不同
+        segments = [caption for caption, _ in captioned]
+        upload_images = [image for _, group in captioned for image in group]
+        counts = [len(group) for _, group in captioned]
+    else:
+        segments = _split_batch_command(ev.text.strip())
+        if not segments:
+            msg = "请按顺序列出角色，如：分析批量 长离 今汐 椿，并附带对应数量的面板截图；也可以在每组截图前写上角色名"
+            return await bot.send(_format_msg(msg, is_group), at_sender=is_group)
+        upload_images = await get_image(ev)
+        per_role = _batch_images_per_role(segments, upload_images)
+        if not per_role:
+            msg = f"图片数量({len(upload_images)})需与角色数量({len(segments)})相同或为其整数倍"
+            return await bot.send(_format_msg(msg, is_group), at_sender=is_group)
+        counts = [per_role] * len(segments)
+    if len(segments) > BATCH_MAX_ROLES:
+        return await bot.send(_format_msg(f"单次最多批量分析{BATCH_MAX_ROLES}个角色", is_group), at_sender=is_group)
+    if await _reply_degraded(bot, is_group):
+        return
+
+    try:
+        images, user_context = await gather_or_cancel(
+            _prepare_images(upload_images, "批量分析"),
+            _load_analysis_user(ev),
+        )
+    except _PipelineAbort as e:
+        return await bot.send(_format_msg(e.msg, is_group), at_sender=is_group)
+
+    logger.info(
+        f"[鸣潮评分·批量分析{trace_tag()}] {len(segments)} 个角色，{'按标签' if captioned else '按顺序'}分配 "
+        f"{len(upload_images)} 张图"
+    )
+    offsets = [sum(counts[:i]) for i in range(len(counts) + 1)]
+    # 单个角色的失败在 _run_batch_job 内部收敛；这里只兜底意外异常与外层取消，
+    # 保证不会有角色任务在回复用户之后继续占用调度名额
+    outcomes: List[_BatchOutcome] = await gather_or_cancel(
+        *(
+            _run_batch_job(ev, segment, images[offsets[i]:offsets[i + 1]], user_context)
+            for i, segment in enumerate(segments)
+        )
+    )
+
+    uid = user_context[0]
+    succeeded = [outcome for outcome in outcomes if outcome.image is not None]
+    if succeeded:
+        try:
+            with timed("persist"):
+                await asyncio.to_thread(_persist_batch, get_user_dir(ev.user_id, uid), succeeded)
+        except Exception as e:
+            logger.exception(f"[鸣潮评分·批量分析{trace_tag()}] 保存结果失败: {e}")
+            return await bot.send(_format_msg(f"保存分析结果失败: {e}", is_group), at_sender=is_group)
+
+    msg_lines = ["=== 批量分析结果 ==="]
+    for outcome in outcomes:
+        if outcome.image is None:
+            msg_lines.append(f"{outcome.role_name}: 失败（{outcome.error}）")
+        elif isinstance(outcome.score_results, list) and outcome.score_results:
+            total_score = sum(outcome.score_results)
+            msg_lines.append(f"{outcome.role_name}: 总分{total_score:.2f} [{_get_rating(total_score)}]")
+        else:
+            msg_lines.append(f"{outcome.role_name}: 已生成面板")
+    msg_lines.append(f"成功 {len(succeeded)}/{len(outcomes)}，可用「分析<角色>面板」查看面板")
+    return await bot.send(_format_msg("\n".join(msg_lines), is_group), at_sender=is_group)
@@ -0,0 +1,36 @@
+"""ScoreEcho 启动预热。
+
+插件导入时只注册命令，目录创建、xwuid 解析与绘图资源（PIL）都放到启动钩子里。
+"""
+import asyncio
+from typing import Set
+
+from gsuid_core.logger import logger
+from gsuid_core.server import on_core_start
+
+from ..utils.resource import init_dir
+from ..utils.xwuid_bridge import load_baseinfo_cache, resolve_bridge
+
+# 持有后台任务的引用，避免被 GC 提前回收
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def _warmup() -> None:
+    try:
+        from ..utils.charlist_assets import warmup_assets
+        from ..utils.charlist_draw import prefetch_avatars
+
+        await asyncio.to_thread(warmup_assets)
+        await asyncio.to_thread(prefetch_avatars)
+    except Exception as e:
+        logger.exception(f"[鸣潮评分·启动] 资源预热失败: {e}")
+
+
+@on_core_start
+async def scoreecho_startup():
+    await asyncio.to_thread(init_dir)
+    resolve_bridge()
+    await load_baseinfo_cache()
+    task = asyncio.create_task(_warmup())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
@@ -1,7 +1,6 @@
-import json
 import re
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Optional
 
 from gsuid_core.bot import Bot
 from gsuid_core.models import Event
@@ -10,7 +9,9 @@ from gsuid_core.data_store import get_res_path
 
 from ..scoreecho_config.config import seconfig
 from ..utils.database.models import ScoreUser
-from ..utils.resource import CHAR_ALIAS_PATH, XW_CHAR_ALIAS_PATH, get_user_dir
+from ..utils.bind_cache import get_current_uid, get_uid_list, invalidate_binding
+from ..utils.settings_cache import load_char_info, save_char_info, set_user_lang
+from ..utils.resource import CHAR_ALIAS_PATH, XW_CHAR_ALIAS_PATH
 from ..utils.char_utils import PATTERN, alias_to_char_name_optional
 from ..utils.xwuid_bridge import email_login_entry as _xw_email_login_entry
 
@@ -25,29 +26,8 @@ async def score_email_login_entry(bot: Bot, ev: Event):
     return await _xw_email_login_entry(bot, ev)
 
 
-def _get_char_info_path(user_id: str, uid: str) -> Path:
-    return get_user_dir(user_id, uid) / "char_info.json"
-
-
-def _load_char_info(path: Path) -> Dict[str, str]:
-    if path.exists():
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    else:
-        data = {}
-    if "用户名" not in data:
-        data["用户名"] = ""
-    return data
-
-
-def _save_char_info(path: Path, data: Dict[str, str]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-
 async def _get_bound_uid(ev: Event) -> Optional[str]:
-    return await ScoreUser.get_uid_by_game(ev.user_id, ev.bot_id)
+    return await get_current_uid(ev.user_id, ev.bot_id)
 
 
 def _get_local_alias_path() -> Optional[Path]:
@@ -118,6 +98,7 @@ async def score_user_bind(bot: Bot, ev: Event):
         code = await ScoreUser.insert_uid(user_id, ev.bot_id, uid, ev.group_id)
         if code in (0, -2):
             await ScoreUser.switch_uid_by_game(user_id, ev.bot_id, uid)
+        invalidate_binding(user_id, ev.bot_id)
         msg_map = {
             0: f"分析UID[{uid}]绑定成功！",
             -1: f"分析UID[{uid}]位数不正确或为空！",
@@ -130,15 +111,16 @@ async def score_user_bind(bot: Bot, ev: Event):
         if not uid:
             return await bot.send(_format_msg(f"请使用【{PREFIXES[0]}分析切换 UID】进行切换", is_group), at_sender=is_group)
         retcode = await ScoreUser.switch_uid_by_game(user_id, ev.bot_id, uid)
+        invalidate_binding(user_id, ev.bot_id)
         if retcode == 0:
-            cur_uid = await ScoreUser.get_uid_by_game(user_id, ev.bot_id)
+            cur_uid = await get_current_uid(user_id, ev.bot_id)
             return await bot.send(_format_msg(f"已切换当前分析UID为[{cur_uid}]", is_group), at_sender=is_group)
         if retcode == -3:
             return await bot.send(_format_msg("当前仅绑定一个UID，无需切换", is_group), at_sender=is_group)
         return await bot.send(_format_msg("尚未绑定该UID或未绑定任何UID", is_group), at_sender=is_group)
 
     if "查看" in ev.command:
-        uid_list = await ScoreUser.get_uid_list_by_game(user_id, ev.bot_id)
+        uid_list = await get_uid_list(user_id, ev.bot_id)
         if not uid_list:
             return await bot.send(_format_msg("尚未绑定任何UID", is_group), at_sender=is_group)
         current_uid = uid_list[0]
@@ -152,6 +134,7 @@ async def score_user_bind(bot: Bot, ev: Event):
             bot_id=ev.bot_id,
             **{ScoreUser.get_gameid_name(None): None},
         )
+        invalidate_binding(user_id, ev.bot_id)
         if retcode == 0:
             return await bot.send(_format_msg("已删除全部绑定UID", is_group), at_sender=is_group)
         return await bot.send(_format_msg("尚未绑定任何UID", is_group), at_sender=is_group)
@@ -159,6 +142,7 @@ async def score_user_bind(bot: Bot, ev: Event):
     if not uid:
         return await bot.send(_format_msg(f"请使用【{PREFIXES[0]}分析删除 UID】删除", is_group), at_sender=is_group)
     data = await ScoreUser.delete_uid(user_id, ev.bot_id, uid)
+    invalidate_binding(user_id, ev.bot_id)
     msg_map = {0: f"已删除UID[{uid}]", -1: f"UID[{uid}]不在绑定列表中"}
     return await bot.send(_format_msg(msg_map.get(data, "删除失败，请稍后再试"), is_group), at_sender=is_group)
 
@@ -166,15 +150,13 @@ async def score_user_bind(bot: Bot, ev: Event):
 @sv_score_setting.on_regex(r"^分析[设設]置\s*(?:语言|語言)\s*(?P<lang>\S+)$", block=True)
 async def score_set_language(bot: Bot, ev: Event):
     is_group = ev.group_id is not None
-    from ..utils.database.models import ScoreLangSettings
-
     VALID_LANGS = {"chs", "cht", "en", "jp", "kr"}
     lang = (ev.regex_dict.get("lang") or "").strip().lower()
     if lang not in VALID_LANGS:
         msg = f"[分析] 语言设置参数无效\n可选: {', '.join(sorted(VALID_LANGS))}"
         return await bot.send(_format_msg(msg, is_group), at_sender=is_group)
     db_value = "" if lang == "chs" else lang
-    await ScoreLangSettings.set_lang(ev.user_id, db_value)
+    await set_user_lang(ev.user_id, db_value)
     msg = f"[分析] 语言已设置为 {lang}"
     return await bot.send(_format_msg(msg, is_group), at_sender=is_group)
 
@@ -188,10 +170,9 @@ async def score_set_username(bot: Bot, ev: Event):
     user_name = ev.regex_dict.get("name") if isinstance(ev.regex_dict, dict) else None
     if not user_name:
         return await bot.send(_format_msg("请提供用户名内容", is_group), at_sender=is_group)
-    char_info_path = _get_char_info_path(ev.user_id, uid)
-    data = _load_char_info(char_info_path)
+    data = load_char_info(ev.user_id, uid)
     data["用户名"] = user_name.strip()
-    _save_char_info(char_info_path, data)
+    save_char_info(ev.user_id, uid, data)
     return await bot.send(_format_msg("已设置用户名", is_group), at_sender=is_group)
 
 
@@ -250,10 +231,9 @@ async def score_set_role_info(bot: Bot, ev: Event):
     }
     for key, value in replacements.items():
         info = re.sub(rf"(?<!换){key}", value, info)
-    char_info_path = _get_char_info_path(ev.user_id, uid)
-    data = _load_char_info(char_info_path)
+    data = load_char_info(ev.user_id, uid)
     data[resolved] = info
-    _save_char_info(char_info_path, data)
+    save_char_info(ev.user_id, uid, data)
     return await bot.send(_format_msg(f"已设置{resolved}信息", is_group), at_sender=is_group)
 
 
@@ -283,8 +263,7 @@ async def score_view_role_info(bot: Bot, ev: Event):
     resolved = _resolve_char_name(raw_name.strip())
     if not resolved:
         return await bot.send(_format_msg("未找到对应的角色别名，请检查输入", is_group), at_sender=is_group)
-    char_info_path = _get_char_info_path(ev.user_id, uid)
-    data = _load_char_info(char_info_path)
+    data = load_char_info(ev.user_id, uid)
     info = data.get(resolved)
     if not info:
         return await bot.send(_format_msg(f"尚未设置{resolved}信息", is_group), at_sender=is_group)
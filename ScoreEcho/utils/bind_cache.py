@@ -0,0 +1,35 @@
+"""ScoreEcho UID 绑定缓存。
+
+按 ``(user_id, bot_id)`` 缓存 UID 列表（第一个为当前 UID），未命中时只查一次库。
+绑定 / 切换 / 删除命令需调用 ``invalidate_binding`` 使缓存失效。
+"""
+from typing import List, Optional, Tuple
+
+from .database.models import ScoreUser
+from .metrics import inc
+from .ttl_cache import TTLCache
+
+_BIND_TTL = 3600
+_BIND_MAXSIZE = 4096
+_bind_cache: TTLCache[Tuple[str, str], List[str]] = TTLCache(_BIND_MAXSIZE, _BIND_TTL)
+
+
+async def get_uid_list(user_id: str, bot_id: str) -> List[str]:
+    key = (user_id, bot_id)
+    cached = _bind_cache.get(key)
+    if cached is not None:
+        inc("cache.bind.hit")
+        return cached
+    inc("cache.bind.miss")
+    uid_list = await ScoreUser.get_uid_binding(user_id, bot_id)
+    _bind_cache.set(key, uid_list)
+    return uid_list
+
+
+async def get_current_uid(user_id: str, bot_id: str) -> Optional[str]:
+    uid_list = await get_uid_list(user_id, bot_id)
+    return uid_list[0] if uid_list else None
+
+
+def invalidate_binding(user_id: str, bot_id: str) -> None:
+    _bind_cache.pop((user_id, bot_id))
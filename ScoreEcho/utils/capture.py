@@ -0,0 +1,208 @@
+"""评分请求录制，用于复现线上流量。
+
+控制台开启 ``capture`` 后，每个评分 / 分析 / 批量分析请求结束时向
+``MAIN_PATH/capture/<段>/requests.jsonl`` 追加一行：归一化后的命令、各阶段耗时、
+每次评分 API 调用的 payload（不含 ``user_data``）、图片 sha256 与大小、返回状态。
+QQ 号、群号取值空间很小，直接哈希可以穷举还原，所以用户与群号记录为以本机随机盐
+（``MAIN_PATH/capture.salt``，不在 capture 目录里）计算的 HMAC：录制内同一用户仍可关联，
+拿到录制的人没有盐无法反查。``captureimages`` 开启时同时把上传的图片按 sha256
+存进与记录行同一段的 ``blobs`` 目录。
+
+每段超过 ``_SEGMENT_BYTES`` 后新开一段，只保留最新的 ``capturekeep`` 段（连同图片）。
+``python -m benchmarks.replay`` 可按原速或倍速把录制的请求重放到桩服务或真实地址。
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import secrets
+import shutil
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+from gsuid_core.logger import logger
+
+from ..scoreecho_config.config import seconfig
+from .dedupe import normalize_command
+from .metrics import current_stages, trace_tag
+from .resilience import ServiceDegradedError
+from .resource import MAIN_PATH
+
+CAPTURE_PATH = MAIN_PATH / "capture"
+CAPTURE_FILE = "requests.jsonl"
+SALT_PATH = MAIN_PATH / "capture.salt"
+
+_SEGMENT_BYTES = 64 * 1024 * 1024
+
+_current: ContextVar[Optional["CaptureRecord"]] = ContextVar("scoreecho_capture", default=None)
+_write_lock = threading.Lock()
+_segment: Optional[Path] = None
+_segment_bytes = 0
+_salt: Optional[bytes] = None
+
+
+class CaptureRecord:
+    def __init__(self, pipeline: str, command: str, user_id: str, group_id: Optional[str], with_images: bool):
+        self.pipeline = pipeline
+        self.command = normalize_command(command or "")
+        self.user_id = user_id
+        self.group_id = group_id
+        self.with_images = with_images
+        self.ts = time.time()
+        self.start = time.monotonic()
+        self.calls: List[Dict[str, Any]] = []
+        # sha256 -> 图片，请求结束时和记录行一起写进同一段
+        self.blobs: Dict[str, bytes] = {}
+
+
+def _load_salt() -> bytes:
+    """读取本机的录制盐，没有则生成。调用方持有 ``_write_lock``。"""
+    global _salt
+    if _salt is None:
+        try:
+            _salt = SALT_PATH.read_bytes()
+        except FileNotFoundError:
+            _salt = b""
+        if len(_salt) < 16:
+            _salt = secrets.token_bytes(32)
+            SALT_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = SALT_PATH.with_suffix(".tmp")
+            tmp_path.write_bytes(_salt)
+            tmp_path.replace(SALT_PATH)
+    return _salt
+
+
+def _anonymize(value: str) -> str:
+    return hmac.new(_load_salt(), str(value).encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+
+
+def call_status(error: Optional[BaseException]) -> Union[int, str]:
+    """把一次 API 调用的结果归类为 ``ok`` / HTTP 状态码 / ``timeout`` / ``network`` / ``degraded`` / ``error``。"""
+    if error is None:
+        return "ok"
+    import httpx
+
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.RequestError):
+        return "network"
+    if isinstance(error, ServiceDegradedError):
+        return "degraded"
+    return "error"
+
+
+def note_call(
+    payload: Dict[str, object],
+    images: List[bytes],
+    started: float,
+    error: Optional[BaseException] = None,
+) -> None:
+    """记录一次评分 API 调用；当前请求没有开启录制时什么都不做。"""
+    record = _current.get()
+    if record is None:
+        return
+    digests = [hashlib.sha256(image).hexdigest() for image in images]
+    record.calls.append(
+        {
+            "offset_ms": round((started - record.start) * 1000, 1),
+            "ms": round((time.monotonic() - started) * 1000, 1),
+            "payload": {k: v for k, v in payload.items() if k != "user_data"},
+            "images": [{"sha256": d, "bytes": len(image)} for d, image in zip(digests, images)],
+            "status": call_status(error),
+        }
+    )
+    if record.with_images:
+        record.blobs.update(zip(digests, images))
+
+
+def _open_segment(keep: int) -> Path:
+    """返回当前段目录，超过大小则新开一段并删掉多余的旧段。调用方持有 ``_write_lock``。"""
+    global _segment, _segment_bytes
+    if _segment is not None and _segment_bytes < _SEGMENT_BYTES and _segment.exists():
+        return _segment
+    CAPTURE_PATH.mkdir(parents=True, exist_ok=True)
+    name = time.strftime("%Y%m%d-%H%M%S")
+    segment = CAPTURE_PATH / name
+    suffix = 1
+    while segment.exists():
+        segment = CAPTURE_PATH / f"{name}-{suffix}"
+        suffix += 1
+    (segment / "blobs").mkdir(parents=True)
+    _segment, _segment_bytes = segment, 0
+    # 同一秒内轮转时新段可能复用已删除的名字，排序不可靠，新段本身不参与清理
+    segments = sorted(
+        (p for p in CAPTURE_PATH.iterdir() if p.is_dir() and p != segment), key=lambda p: p.name, reverse=True
+    )
+    for old in segments[max(keep, 1) - 1:]:
+        shutil.rmtree(old, ignore_errors=True)
+    return segment
+
+
+def _append(entry: Dict[str, Any], user_id: str, group_id: Optional[str], blobs: Dict[str, bytes]) -> None:
+    """把一个请求的图片和记录行写进同一段，段被轮转删除时两者一起走。"""
+    global _segment_bytes
+    keep = int(seconfig.get_config("capturekeep").data)
+    with _write_lock:
+        entry["user"] = _anonymize(user_id)
+        entry["group"] = _anonymize(group_id) if group_id else None
+        data = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        segment = _open_segment(keep)
+        for digest, image in blobs.items():
+            path = segment / "blobs" / digest
+            if path.exists():
+                continue
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(image)
+            tmp_path.replace(path)
+            _segment_bytes += len(image)
+        with open(segment / CAPTURE_FILE, "ab") as f:
+            f.write(data)
+        _segment_bytes += len(data)
+
+
+@asynccontextmanager
+async def capture_request(pipeline: str, command: str, user_id: str, group_id: Optional[str]) -> AsyncIterator[None]:
+    """包住一次请求；未开启录制时直接执行。"""
+    if not seconfig.get_config("capture").data:
+        yield
+        return
+
+    record = CaptureRecord(pipeline, command, user_id, group_id, bool(seconfig.get_config("captureimages").data))
+    token = _current.set(record)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+        if record.calls:
+            status = record.calls[-1]["status"]
+        else:
+            # 下载失败、未绑定、排队已满等，没有发出 API 请求
+            status = "aborted"
+        elapsed = time.monotonic() - record.start
+        stages = current_stages()
+        # 录制结束时调用方的 timed("total") 可能还没退出（取决于嵌套顺序），用录制自己的计时补上
+        stages.setdefault("total", elapsed)
+        # user / group 在写线程里算 HMAC，首次需要读盐文件
+        entry = {
+            "ts": round(record.ts, 3),
+            "pipeline": pipeline,
+            "trace_id": trace_tag().lstrip("#"),
+            "user": None,
+            "group": None,
+            "command": record.command,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "stages": {k: round(v * 1000, 1) for k, v in stages.items()},
+            "status": status,
+            "calls": record.calls,
+        }
+        try:
+            await asyncio.to_thread(_append, entry, record.user_id, record.group_id, record.blobs)
+        except OSError as e:
+            logger.warning(f"[鸣潮评分·录制{trace_tag()}] 写入录制失败: {e}")
@@ -1,8 +1,6 @@
 from typing import Dict, List, Optional
 from pathlib import Path
 
-from msgspec import json as msgjson
-
 from gsuid_core.logger import logger
 
 # 正则模式 - 从 XutheringWavesUID 复制
@@ -19,6 +17,8 @@ def load_alias_data(alias_path: Path):
     global char_alias_data
 
     if alias_path.exists():
+        from msgspec import json as msgjson
+
         try:
             with open(alias_path, "r", encoding="UTF-8") as f:
                 char_alias_data = msgjson.decode(f.read(), type=Dict[str, List[str]])
@@ -49,6 +49,8 @@ async def _async_download_and_load(alias_path: Path):
     from .alias_resource import ensure_alias_resource
     success = await ensure_alias_resource()
     if success:
+        from msgspec import json as msgjson
+
         # 重新加载
         global char_alias_data
         try:
@@ -1,15 +1,34 @@
 import json
 import shutil
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
 
 from gsuid_core.data_store import get_res_path
+from gsuid_core.logger import logger
 
 SCOREECHO_ASSET_ROOT = get_res_path() / "ScoreEcho" / "charlist"
 TEXTURE_PATH = SCOREECHO_ASSET_ROOT / "texture2d"
 FONT_PATH = SCOREECHO_ASSET_ROOT / "fonts"
 AVATAR_PATH = SCOREECHO_ASSET_ROOT / "avatar"
 MAP_PATH = SCOREECHO_ASSET_ROOT / "map"
+MANIFEST_PATH = SCOREECHO_ASSET_ROOT / "manifest.json"
+AVATAR_SPRITE_PATH = SCOREECHO_ASSET_ROOT / "avatar_sprite.png"
+AVATAR_SPRITE_INDEX_PATH = SCOREECHO_ASSET_ROOT / "avatar_sprite.json"
+
+# 索引未命中时，同一文件最多每隔这么多秒再查一次磁盘 / XWUID 资源
+_RECHECK_SECONDS = 60.0
+
+# 预热后的内存索引：渲染时先查这里，未命中才按节流回退到文件系统
+_warmup_lock = threading.Lock()
+_warmed_up = False
+_name_id_map: Dict[str, str] = {}
+_texture_files: Set[str] = set()
+_avatar_files: Set[str] = set()
+# 未命中的 key -> 上次检查时间（monotonic）
+_miss_checked: Dict[str, float] = {}
+_map_checked_at = 0.0
 
 
 def _get_xwuid_plugin_root() -> Path:
@@ -31,13 +50,22 @@ def _get_xwuid_resource_path() -> Path:
     return get_res_path() / "XutheringWavesUID" / "resource"
 
 
-def _copy_tree_once(src: Path, dst: Path) -> None:
-    if dst.exists():
-        return
+def _sync_tree(src: Path, dst: Path) -> None:
+    """把 src 下 dst 缺失或大小不一致的文件补齐（中断过的拷贝也能修复）。"""
     if not src.exists():
         return
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copytree(src, dst)
+    if not dst.exists():
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copytree(src, dst)
+        return
+    for src_file in src.rglob("*"):
+        if not src_file.is_file():
+            continue
+        dst_file = dst / src_file.relative_to(src)
+        if dst_file.exists() and dst_file.stat().st_size == src_file.stat().st_size:
+            continue
+        dst_file.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(src_file, dst_file)
 
 
 def _copy_file_once(src: Path, dst: Path) -> None:
@@ -49,15 +77,7 @@ def _copy_file_once(src: Path, dst: Path) -> None:
     shutil.copy2(src, dst)
 
 
-def ensure_assets() -> None:
-    _copy_tree_once(_get_xwuid_texture_path(), TEXTURE_PATH)
-    map_src = _get_xwuid_resource_path() / "map" / "id2name.json"
-    _copy_file_once(map_src, MAP_PATH / "id2name.json")
-    AVATAR_PATH.mkdir(parents=True, exist_ok=True)
-
-
-def load_name_id_map() -> Dict[str, str]:
-    ensure_assets()
+def _read_name_id_map() -> Dict[str, str]:
     id2name_path = MAP_PATH / "id2name.json"
     if not id2name_path.exists():
         return {}
@@ -68,18 +88,154 @@ def load_name_id_map() -> Dict[str, str]:
     return {name: str(role_id) for role_id, name in data.items()}
 
 
+def _sync_avatars() -> None:
+    """按 id2name.json 一次性补齐全部角色头像。"""
+    src_dir = _get_xwuid_resource_path() / "waves_avatar"
+    if not src_dir.exists():
+        return
+    for role_id in set(_name_id_map.values()):
+        filename = f"role_head_{role_id}.png"
+        _copy_file_once(src_dir / filename, AVATAR_PATH / filename)
+
+
+def _should_recheck(key: str) -> bool:
+    """节流未命中时的磁盘检查，避免缺图的角色每次渲染都 stat。"""
+    now = time.monotonic()
+    last = _miss_checked.get(key)
+    if last is not None and now - last < _RECHECK_SECONDS:
+        return False
+    _miss_checked[key] = now
+    return True
+
+
+def _list_files(path: Path) -> Dict[str, int]:
+    if not path.exists():
+        return {}
+    return {p.name: p.stat().st_size for p in path.iterdir() if p.is_file()}
+
+
+def _write_manifest(textures: Dict[str, int], avatars: Dict[str, int]) -> None:
+    manifest = {
+        "created_at": int(time.time()),
+        "roles": len(_name_id_map),
+        "textures": textures,
+        "avatars": avatars,
+    }
+    SCOREECHO_ASSET_ROOT.mkdir(parents=True, exist_ok=True)
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def warmup_assets(force: bool = False) -> None:
+    """拷贝/校验练度图资源，构建名称→ID 映射和资源清单。
+
+    插件启动时在后台线程里调用一次；之后的渲染只读内存索引。
+    """
+    global _warmed_up, _name_id_map, _texture_files, _avatar_files
+
+    with _warmup_lock:
+        if _warmed_up and not force:
+            return
+        start = time.perf_counter()
+        _sync_tree(_get_xwuid_texture_path(), TEXTURE_PATH)
+        map_src = _get_xwuid_resource_path() / "map" / "id2name.json"
+        _copy_file_once(map_src, MAP_PATH / "id2name.json")
+        AVATAR_PATH.mkdir(parents=True, exist_ok=True)
+
+        try:
+            _name_id_map = _read_name_id_map()
+        except Exception as e:
+            logger.error(f"[鸣潮评分·资源] 读取 id2name.json 失败: {e}")
+            _name_id_map = {}
+        _sync_avatars()
+        textures = _list_files(TEXTURE_PATH)
+        avatars = _list_files(AVATAR_PATH)
+        _texture_files = set(textures)
+        _avatar_files = set(avatars)
+        _miss_checked.clear()
+        try:
+            _write_manifest(textures, avatars)
+        except OSError as e:
+            logger.warning(f"[鸣潮评分·资源] 写入资源清单失败: {e}")
+        _warmed_up = True
+        logger.info(
+            f"[鸣潮评分·资源] 资源预热完成: {len(_name_id_map)} 角色, "
+            f"{len(textures)} 贴图, 耗时 {time.perf_counter() - start:.2f}s"
+        )
+
+
+def ensure_assets() -> None:
+    """未预热时（启动钩子尚未跑完）同步预热一次，之后为空操作。"""
+    if not _warmed_up:
+        warmup_assets()
+
+
+def _refresh_name_id_map() -> None:
+    """XWUID 更新了 id2name.json 时重新拷贝并读取，每 ``_RECHECK_SECONDS`` 最多检查一次。"""
+    global _map_checked_at, _name_id_map
+    now = time.monotonic()
+    if now - _map_checked_at < _RECHECK_SECONDS:
+        return
+    _map_checked_at = now
+    src = _get_xwuid_resource_path() / "map" / "id2name.json"
+    dst = MAP_PATH / "id2name.json"
+    try:
+        src_stat = src.stat()
+    except OSError:
+        return
+    try:
+        dst_stat = dst.stat()
+        if (dst_stat.st_mtime_ns, dst_stat.st_size) == (src_stat.st_mtime_ns, src_stat.st_size):
+            return
+    except OSError:
+        pass
+    with _warmup_lock:
+        try:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, dst)
+            _name_id_map = _read_name_id_map()
+        except Exception as e:
+            logger.warning(f"[鸣潮评分·资源] 更新 id2name.json 失败: {e}")
+            return
+    logger.info(f"[鸣潮评分·资源] id2name.json 已更新: {len(_name_id_map)} 角色")
+
+
+def load_name_id_map() -> Dict[str, str]:
+    ensure_assets()
+    _refresh_name_id_map()
+    return _name_id_map
+
+
+def get_texture_path(filename: str) -> Optional[Path]:
+    """按清单返回贴图路径；清单里没有时回退检查磁盘并从 XWUID 补拷，仍没有则返回 None。"""
+    ensure_assets()
+    dst = TEXTURE_PATH / filename
+    if filename in _texture_files:
+        return dst
+    if not _should_recheck(f"texture:{filename}"):
+        return None
+    _copy_file_once(_get_xwuid_texture_path() / filename, dst)
+    if not dst.exists():
+        return None
+    _texture_files.add(filename)
+    return dst
+
+
 def ensure_avatar(role_id: str) -> Optional[Path]:
+    """按清单返回头像路径；清单里没有时回退检查磁盘并从 XWUID 补拷，仍没有则返回 None。"""
     ensure_assets()
     if not role_id:
         return None
     filename = f"role_head_{role_id}.png"
     dst = AVATAR_PATH / filename
-    if dst.exists():
+    if filename in _avatar_files:
         return dst
-    src = _get_xwuid_resource_path() / "waves_avatar" / filename
-    if not src.exists():
+    if not _should_recheck(f"avatar:{filename}"):
         return None
-    shutil.copy2(src, dst)
+    _copy_file_once(_get_xwuid_resource_path() / "waves_avatar" / filename, dst)
+    if not dst.exists():
+        return None
+    _avatar_files.add(filename)
     return dst
 
 
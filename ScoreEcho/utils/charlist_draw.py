@@ -1,14 +1,21 @@
+import json
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 
+from gsuid_core.logger import logger
+
+from ..scoreecho_config.config import seconfig
 from .charlist_assets import (
-    TEXTURE_PATH,
+    AVATAR_SPRITE_INDEX_PATH,
+    AVATAR_SPRITE_PATH,
     XW_FONT_PATH,
     ensure_assets,
     ensure_avatar,
+    get_texture_path,
     load_name_id_map,
 )
 from .score_rank import get_score_grade
@@ -18,6 +25,13 @@ GOLD = (233, 203, 142)
 SPECIAL_GOLD = (255, 203, 99)
 GREY = (175, 175, 175)
 
+AVATAR_SIZE = 120
+_SPRITE_COLUMNS = 16
+
+# role_id -> 已加遮罩并缩放到 AVATAR_SIZE 的头像；只缓存真实头像，缺图的占位不缓存
+_avatar_cache: Dict[str, Image.Image] = {}
+
+@lru_cache(maxsize=None)
 def _load_font(size: int) -> ImageFont.FreeTypeFont:
     font_path = XW_FONT_PATH / "waves_fonts.ttf"
     if font_path.exists():
@@ -30,28 +44,116 @@ def _load_image(path: Path) -> Image.Image:
     return Image.open(path).convert("RGBA")
 
 
-def _make_avatar(role_id: str) -> Image.Image:
+@lru_cache(maxsize=1)
+def _load_avatar_mask() -> Optional[Image.Image]:
+    mask_path = get_texture_path("avatar_mask.png")
+    if not mask_path:
+        return None
+    return _load_image(mask_path).resize((160, 160)).split()[-1]
+
+
+def _mask_avatar(pic: Image.Image) -> Image.Image:
     """
-    Generate character avatar with mask.
+    Apply the avatar mask and resize for a row.
     """
-    avatar_path = ensure_avatar(role_id)
-    if avatar_path and avatar_path.exists():
-        pic = _load_image(avatar_path)
-    else:
-        pic = Image.new("RGBA", (160, 160), (70, 70, 70, 255))
-        draw = ImageDraw.Draw(pic)
-        draw.text((80, 80), "?", fill="white", anchor="mm")
-
     # Resize to standard size for processing
     pic = pic.resize((160, 160))
     
     # Apply Mask
-    mask_path = TEXTURE_PATH / "avatar_mask.png"
-    if mask_path.exists():
-        mask = _load_image(mask_path).resize((160, 160)).split()[-1]
+    mask = _load_avatar_mask()
+    if mask:
         pic.putalpha(mask)
     
-    return pic
+    # Resize avatar to fit nicely in row - slightly smaller than full height
+    return pic.resize((AVATAR_SIZE, AVATAR_SIZE))
+
+
+@lru_cache(maxsize=1)
+def _placeholder_avatar() -> Image.Image:
+    pic = Image.new("RGBA", (160, 160), (70, 70, 70, 255))
+    draw = ImageDraw.Draw(pic)
+    draw.text((80, 80), "?", fill="white", anchor="mm")
+    return _mask_avatar(pic)
+
+
+def get_avatar(role_id: str) -> Image.Image:
+    """取处理好的 120x120 头像，未缓存时生成一次。
+
+    头像文件缺失时返回占位图且不缓存；``ensure_avatar`` 对缺失的头像按节流重新检查磁盘
+    并从 XWUID 补拷，文件补齐后最多 ``_RECHECK_SECONDS`` 秒内的下一次渲染即换成真实头像。
+    """
+    avatar = _avatar_cache.get(role_id)
+    if avatar is None:
+        avatar_path = ensure_avatar(role_id)
+        if not avatar_path:
+            return _placeholder_avatar()
+        avatar = _mask_avatar(_load_image(avatar_path))
+        _avatar_cache[role_id] = avatar
+    return avatar
+
+
+def _avatar_signatures(role_ids: List[str]) -> Dict[str, List[int]]:
+    """有头像文件的角色 -> 源文件 (mtime_ns, size)，用于判断精灵图是否过期。"""
+    signatures = {}
+    for role_id in role_ids:
+        avatar_path = ensure_avatar(role_id)
+        if not avatar_path:
+            continue
+        try:
+            stat = avatar_path.stat()
+        except OSError:
+            continue
+        signatures[role_id] = [stat.st_mtime_ns, stat.st_size]
+    return signatures
+
+
+def _load_avatar_sprite(signatures: Dict[str, List[int]]) -> bool:
+    if not AVATAR_SPRITE_PATH.exists() or not AVATAR_SPRITE_INDEX_PATH.exists():
+        return False
+    with open(AVATAR_SPRITE_INDEX_PATH, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    # 精灵图只含真实头像；任一源文件新增、删除或变化都重建
+    if index.get("size") != AVATAR_SIZE or index.get("sources") != signatures:
+        return False
+    sprite = _load_image(AVATAR_SPRITE_PATH)
+    for i, role_id in enumerate(index["ids"]):
+        x = (i % _SPRITE_COLUMNS) * AVATAR_SIZE
+        y = (i // _SPRITE_COLUMNS) * AVATAR_SIZE
+        _avatar_cache[role_id] = sprite.crop((x, y, x + AVATAR_SIZE, y + AVATAR_SIZE))
+    return True
+
+
+def _save_avatar_sprite(signatures: Dict[str, List[int]]) -> None:
+    role_ids = sorted(signatures)
+    rows = (len(role_ids) + _SPRITE_COLUMNS - 1) // _SPRITE_COLUMNS
+    sprite = Image.new("RGBA", (_SPRITE_COLUMNS * AVATAR_SIZE, max(rows, 1) * AVATAR_SIZE))
+    for i, role_id in enumerate(role_ids):
+        x = (i % _SPRITE_COLUMNS) * AVATAR_SIZE
+        y = (i // _SPRITE_COLUMNS) * AVATAR_SIZE
+        sprite.paste(_avatar_cache[role_id], (x, y))
+    sprite.save(AVATAR_SPRITE_PATH, format="PNG")
+    with open(AVATAR_SPRITE_INDEX_PATH, "w", encoding="utf-8") as f:
+        json.dump({"size": AVATAR_SIZE, "ids": role_ids, "sources": signatures}, f)
+
+
+def prefetch_avatars() -> None:
+    """预生成全部角色头像；开启 avatarsprite 时优先读写磁盘精灵图。"""
+    role_ids = sorted(set(load_name_id_map().values()))
+    use_sprite = bool(seconfig.get_config("avatarsprite").data)
+    signatures = _avatar_signatures(role_ids) if use_sprite else {}
+    if use_sprite:
+        try:
+            if _load_avatar_sprite(signatures):
+                return
+        except Exception as e:
+            logger.warning(f"[鸣潮评分·资源] 读取头像精灵图失败，重新生成: {e}")
+    for role_id in role_ids:
+        get_avatar(role_id)
+    if use_sprite and signatures:
+        try:
+            _save_avatar_sprite(signatures)
+        except Exception as e:
+            logger.warning(f"[鸣潮评分·资源] 保存头像精灵图失败: {e}")
 
 
 def draw_charlist_image(result_data: Dict[str, object], uid: str = "", name: str = "") -> bytes:
@@ -85,8 +187,8 @@ def draw_charlist_image(result_data: Dict[str, object], uid: str = "", name: str
     total_h = header_h + len(items) * (row_h + 15) + footer_h + margin_top
 
     # Create Background
-    bg_path = TEXTURE_PATH / "bg3.png"
-    if bg_path.exists():
+    bg_path = get_texture_path("bg3.png")
+    if bg_path:
         bg_img = _load_image(bg_path)
         # Resize/Crop to cover
         bg_ratio = bg_img.width / bg_img.height
@@ -138,8 +240,8 @@ def draw_charlist_image(result_data: Dict[str, object], uid: str = "", name: str
     y_offset = header_h
     
     # Load row background
-    row_bg_path = TEXTURE_PATH / "bar_5star.png"
-    if row_bg_path.exists():
+    row_bg_path = get_texture_path("bar_5star.png")
+    if row_bg_path:
         row_bg_base = _load_image(row_bg_path)
     else:
         row_bg_base = Image.new("RGBA", (card_w - 60, row_h), (0, 0, 0, 100))
@@ -147,13 +249,11 @@ def draw_charlist_image(result_data: Dict[str, object], uid: str = "", name: str
     for role_name, score, grade in items:
         # Create row canvas
         row_w = card_w - 80
-        row_img = row_bg_base.resize((row_w, row_h)) if row_bg_path.exists() else row_bg_base.resize((row_w, row_h))
+        row_img = row_bg_base.resize((row_w, row_h))
 
         # 1. Avatar (Left side)
         role_id = name_id_map.get(role_name, "")
-        avatar = _make_avatar(role_id)
-        # Resize avatar to fit nicely in row - slightly smaller than full height
-        avatar = avatar.resize((120, 120))
+        avatar = get_avatar(role_id)
         # Place avatar - Offset similar to XutheringWavesUID (60, 0) relative to bar?
         # In our redesign we are centering it vertically in the bar
         row_img.paste(avatar, (20, 10), avatar)
@@ -166,9 +266,9 @@ def draw_charlist_image(result_data: Dict[str, object], uid: str = "", name: str
         draw_row.text((160, 50), role_name, fill="white", font=font_row_name, anchor="lm")
         
         # 3. Grade Icon (Right side)
-        score_bg_path = TEXTURE_PATH / f"score_{grade.lower()}.png"
+        score_bg_path = get_texture_path(f"score_{grade.lower()}.png")
         grade_end_x = row_w - 20
-        if score_bg_path.exists():
+        if score_bg_path:
             grade_icon = _load_image(score_bg_path)
             # Resize if too big
             grade_icon = grade_icon.resize((int(grade_icon.width * 0.9), int(grade_icon.height * 0.9)))
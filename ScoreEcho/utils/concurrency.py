@@ -0,0 +1,28 @@
+"""并发小工具。"""
+import asyncio
+from typing import Any, Awaitable, List
+
+
+async def gather_or_cancel(*aws: Awaitable[Any]) -> List[Any]:
+    """并发执行多个分支，任一分支抛错时取消其余分支并抛出该异常。
+
+    外层被取消时同样会取消全部分支。返回值顺序与传入顺序一致。
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    if pending:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for task in tasks:
+        if task in done and task.exception() is not None:
+            raise task.exception()  # type: ignore[misc]
+    return [task.result() for task in tasks]
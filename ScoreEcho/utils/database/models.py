@@ -1,4 +1,4 @@
-from typing import Any, Dict, Type, TypeVar, Optional
+from typing import Any, Dict, List, Type, TypeVar, Optional
 
 from sqlmodel import Field, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,6 +12,23 @@ class ScoreUser(Bind, table=True):
     __tablename__ = "ScoreEcho"
     uid: Optional[str] = Field(default=None, title="ScoreEcho UID")
 
+    @classmethod
+    @with_session
+    async def get_uid_binding(
+        cls,
+        session: AsyncSession,
+        user_id: str,
+        bot_id: str,
+    ) -> List[str]:
+        """一次查询取出绑定的 UID 列表，第一个为当前 UID。"""
+        result = await session.execute(
+            select(cls.uid).where(cls.user_id == user_id, cls.bot_id == bot_id)
+        )
+        raw = result.scalars().first()
+        if not raw:
+            return []
+        return [uid for uid in raw.split("_") if uid]
+
 
 T_ScoreLangSettings = TypeVar("T_ScoreLangSettings", bound="ScoreLangSettings")
 
@@ -0,0 +1,72 @@
+"""重复命令去重。
+
+同一用户带同样图片重发同一条命令时：
+- 上一条还在处理：直接提示仍在处理中；
+- 上一条在 ``dedupewindow`` 秒内已完成：复用上次的结果图，不再请求 API。
+
+每个请求查两次：收到消息时按图片 URL / 内联内容查，命中时连下载和编码都省掉；
+图片编码完成后按编码结果的内容再查一次，覆盖 URL 每次都不同的平台。
+"""
+import hashlib
+import time
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from ..scoreecho_config.config import seconfig
+from .metrics import inc
+from .ttl_cache import TTLCache
+
+DEDUPE_NEW = "new"
+DEDUPE_RUNNING = "running"
+DEDUPE_DONE = "done"
+
+# 窗口可在控制台调整，缓存本身按上限 TTL 保存，命中时再按当前窗口判断
+_MAX_WINDOW = 3600
+_running: Dict[str, float] = {}
+_completed: TTLCache[str, bytes] = TTLCache(256, _MAX_WINDOW)
+
+
+def _get_window() -> int:
+    return min(max(0, int(seconfig.get_config("dedupewindow").data)), _MAX_WINDOW)
+
+
+def normalize_command(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def make_job_key(user_id: str, kind: str, command: str, images: Iterable[Union[str, bytes]]) -> str:
+    """``images`` 为 URL 时按 URL 文本区分，为字节时按内容区分。"""
+    digest = hashlib.sha1()
+    for part in (user_id, kind, normalize_command(command)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    for image in images:
+        digest.update(hashlib.sha1(image if isinstance(image, bytes) else image.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+def check_job(key: str) -> Tuple[str, Optional[bytes]]:
+    """返回 ``(状态, 已完成的结果)``；窗口为 0 时始终视为新任务。"""
+    window = _get_window()
+    if not window:
+        return DEDUPE_NEW, None
+    started = _running.get(key)
+    if started is not None and time.time() - started < _MAX_WINDOW:
+        inc("dedupe.running")
+        return DEDUPE_RUNNING, None
+    entry = _completed.get_entry(key)
+    if entry and time.time() - entry[0] < window:
+        inc("dedupe.reused")
+        return DEDUPE_DONE, entry[1]
+    return DEDUPE_NEW, None
+
+
+def start_job(key: str) -> None:
+    if _get_window():
+        _running[key] = time.time()
+
+
+def finish_job(key: str, result: Optional[bytes]) -> None:
+    """任务结束；只有成功产出结果图的任务才会被后续重复命令复用。"""
+    _running.pop(key, None)
+    if result and _get_window():
+        _completed.set(key, result)
@@ -0,0 +1,198 @@
+"""评分 API 的全局任务调度。
+
+所有评分/分析请求在调用远端 API 前都要在这里排队：
+- 同时在途的请求数不超过 ``maxinflight``；
+- 排队数超过 ``queuelimit`` 时直接拒绝（``QueueFullError``）；
+- 按群、再按群内用户做加权公平调度：每次放行累计份额最少的群里份额最少的用户，
+  一个人连发十张图不会饿死同群其他人，一个刷屏的群也不会饿死其他群；
+  仍有任务在途的群 / 用户保留份额，新加入的从最近一次放行时的份额（虚拟时间）起步；
+- ``分析`` 会落盘、结果图更大，份额按 2 计，快速 ``评分`` 按 1 计，
+  同一用户自己的任务里评分先于分析。
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from ..scoreecho_config.config import seconfig
+
+JOB_SCORE = "score"
+JOB_ANALYSIS = "analysis"
+
+_JOB_COST: Dict[str, float] = {JOB_SCORE: 1.0, JOB_ANALYSIS: 2.0}
+
+
+class QueueFullError(Exception):
+    """排队数已达上限。"""
+
+
+class JobTicket:
+    """一次排队凭据，``async with ticket:`` 等到放行，退出时归还名额。"""
+
+    def __init__(self, scheduler: "ScoreScheduler", group: str, user: str, kind: str, position: int):
+        self.group = group
+        self.user = user
+        self.kind = kind
+        self.cost = _JOB_COST.get(kind, 1.0)
+        # 入队时排在前面的任务数：在途的加上等待中的（近似位置，公平调度下可能被插队或提前）
+        self.position = position
+        self.granted = False
+        self.released = False
+        self.enqueued_at = time.monotonic()
+        self.granted_at: Optional[float] = None
+        self._scheduler = scheduler
+        self._event = asyncio.Event()
+
+    @property
+    def wait_time(self) -> float:
+        """排队等待的秒数。"""
+        return (self.granted_at or time.monotonic()) - self.enqueued_at
+
+    def cancel(self) -> None:
+        """放弃该任务（未进入 ``async with`` 时使用）。"""
+        self._scheduler._abandon(self)
+
+    async def __aenter__(self) -> "JobTicket":
+        if not self.granted:
+            try:
+                await self._event.wait()
+            except asyncio.CancelledError:
+                self._scheduler._abandon(self)
+                raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._scheduler._release(self)
+
+
+class ScoreScheduler:
+    def __init__(self):
+        # group -> user -> 等待中的任务
+        self._waiting: Dict[str, Dict[str, Deque[JobTicket]]] = {}
+        self._group_share: Dict[str, float] = {}
+        self._user_share: Dict[Tuple[str, str], float] = {}
+        # 在途任务数，有在途任务的群 / 用户即使暂时没在排队也保留份额
+        self._running_groups: Dict[str, int] = {}
+        self._running_users: Dict[Tuple[str, str], int] = {}
+        # 最近一次放行时该群 / 该群内用户的份额，新加入者从这里起步
+        self._virtual = 0.0
+        self._user_virtual: Dict[str, float] = {}
+        self._depth = 0
+        self._inflight = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._depth
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @staticmethod
+    def _max_inflight() -> int:
+        return max(1, int(seconfig.get_config("maxinflight").data))
+
+    @staticmethod
+    def _queue_limit() -> int:
+        return max(0, int(seconfig.get_config("queuelimit").data))
+
+    def enqueue(self, user_id: str, group_id: Optional[str], kind: str) -> JobTicket:
+        """登记一个任务；有空闲名额时立即放行，否则排队。"""
+        if self._depth >= self._queue_limit() and self._inflight >= self._max_inflight():
+            raise QueueFullError()
+
+        group = str(group_id) if group_id else f"private:{user_id}"
+        user = str(user_id)
+        ticket = JobTicket(self, group, user, kind, self._inflight + self._depth)
+
+        users = self._waiting.get(group)
+        if users is None:
+            # 新加入的群从虚拟时间起步，既不插队也不被饿死；刚放行过的群保留已用的份额
+            self._group_share[group] = max(self._group_share.get(group, 0.0), self._virtual)
+            users = self._waiting[group] = {}
+        queue = users.get(user)
+        if queue is None:
+            key = (group, user)
+            self._user_share[key] = max(self._user_share.get(key, 0.0), self._user_virtual.get(group, 0.0))
+            queue = users[user] = deque()
+        if kind == JOB_SCORE:
+            # 同一用户的快速评分排在自己的分析任务前面
+            index = next((i for i, t in enumerate(queue) if t.kind != JOB_SCORE), len(queue))
+            queue.insert(index, ticket)
+        else:
+            queue.append(ticket)
+        self._depth += 1
+        self._dispatch()
+        return ticket
+
+    def _dispatch(self) -> None:
+        while self._depth and self._inflight < self._max_inflight():
+            group = min(self._waiting, key=self._group_share.__getitem__)
+            users = self._waiting[group]
+            user = min(users, key=lambda u: self._user_share[(group, u)])
+            queue = users[user]
+            ticket = queue.popleft()
+
+            key = (group, user)
+            self._virtual = self._group_share[group]
+            self._user_virtual[group] = self._user_share[key]
+            self._group_share[group] += ticket.cost
+            self._user_share[key] += ticket.cost
+            self._running_groups[group] = self._running_groups.get(group, 0) + 1
+            self._running_users[key] = self._running_users.get(key, 0) + 1
+            if not queue:
+                del users[user]
+            if not users:
+                del self._waiting[group]
+
+            self._depth -= 1
+            self._inflight += 1
+            ticket.granted = True
+            ticket.granted_at = time.monotonic()
+            ticket._event.set()
+
+    def _remove_waiting(self, ticket: JobTicket) -> None:
+        users = self._waiting.get(ticket.group)
+        queue = users.get(ticket.user) if users else None
+        if not queue or ticket not in queue:
+            return
+        queue.remove(ticket)
+        self._depth -= 1
+        if not queue:
+            del users[ticket.user]  # type: ignore[union-attr]
+        if not users:
+            del self._waiting[ticket.group]
+        self._forget_idle(ticket.group, ticket.user)
+
+    def _forget_idle(self, group: str, user: str) -> None:
+        """既不在排队也没有在途任务的群 / 用户不再保留份额。"""
+        key = (group, user)
+        users = self._waiting.get(group)
+        if not self._running_users.get(key) and not (users and user in users):
+            self._user_share.pop(key, None)
+            self._running_users.pop(key, None)
+        if not self._running_groups.get(group) and users is None:
+            self._group_share.pop(group, None)
+            self._running_groups.pop(group, None)
+            self._user_virtual.pop(group, None)
+
+    def _abandon(self, ticket: JobTicket) -> None:
+        """等待中被取消：已放行则归还名额，否则移出队列。"""
+        if ticket.granted:
+            self._release(ticket)
+        else:
+            self._remove_waiting(ticket)
+
+    def _release(self, ticket: JobTicket) -> None:
+        if ticket.released:
+            return
+        ticket.released = True
+        self._inflight -= 1
+        key = (ticket.group, ticket.user)
+        self._running_groups[ticket.group] -= 1
+        self._running_users[key] -= 1
+        self._forget_idle(ticket.group, ticket.user)
+        self._dispatch()
+
+
+score_scheduler = ScoreScheduler()
@@ -0,0 +1,125 @@
+"""评分/分析流水线的分阶段耗时与计数。
+
+- ``start_trace(pipeline)``：每个请求开头调用，生成 trace id，
+  之后同一上下文（含 ``gather`` 出的子任务）里的 ``trace_tag()`` 都带上它；
+- ``timed(stage)``：用单调时钟记录一个阶段的耗时，计入 ``<pipeline>.<stage>`` 直方图；
+- ``inc(name)``：计数器（缓存命中、重试、上下行字节数等）；
+- ``current_stages()``：当前请求各阶段的累计耗时（供请求录制使用）。
+
+只在事件循环线程里写入，不加锁；直方图保留最近的固定数量样本计算 p50/p95/p99。
+"""
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+_HISTOGRAM_SAMPLES = 2048
+_THROUGHPUT_SAMPLES = 4096
+
+# (pipeline, trace_id)
+_trace: ContextVar[Optional[Tuple[str, str]]] = ContextVar("scoreecho_trace", default=None)
+# 当前请求的 stage -> 累计秒数；子任务复制上下文后共用同一个 dict
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("scoreecho_stages", default=None)
+
+
+class Histogram:
+    def __init__(self):
+        self.samples: Deque[float] = deque(maxlen=_HISTOGRAM_SAMPLES)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"count": 0, "sum": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+        def pick(q: float) -> float:
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "p50": pick(0.50),
+            "p95": pick(0.95),
+            "p99": pick(0.99),
+        }
+
+
+_histograms: Dict[str, Histogram] = {}
+_counters: Dict[str, int] = {}
+# pipeline -> 最近请求的开始时间，用于计算吞吐
+_recent: Dict[str, Deque[float]] = {}
+
+
+def start_trace(pipeline: str) -> str:
+    trace_id = secrets.token_hex(4)
+    _trace.set((pipeline, trace_id))
+    _stages.set({})
+    inc(f"{pipeline}.requests")
+    recent = _recent.get(pipeline)
+    if recent is None:
+        recent = _recent[pipeline] = deque(maxlen=_THROUGHPUT_SAMPLES)
+    recent.append(time.monotonic())
+    return trace_id
+
+
+def trace_tag() -> str:
+    """附在 ``[鸣潮评分·…]`` 标签里的 trace id，没有 trace 时为空串。"""
+    current = _trace.get()
+    return f"#{current[1]}" if current else ""
+
+
+def observe(name: str, value: float) -> None:
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = Histogram()
+    histogram.observe(value)
+
+
+def inc(name: str, value: int = 1) -> None:
+    _counters[name] = _counters.get(name, 0) + value
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """计入当前流水线的阶段耗时；不在 trace 内时计入 ``other.<stage>``。"""
+    current = _trace.get()
+    observe(f"{current[0] if current else 'other'}.{stage}", seconds)
+    stages = _stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+def current_stages() -> Dict[str, float]:
+    return dict(_stages.get() or {})
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.monotonic() - start)
+
+
+def throughput(window: float = 60.0) -> Dict[str, float]:
+    """各流水线最近 ``window`` 秒内的每分钟请求数。"""
+    since = time.monotonic() - window
+    return {
+        pipeline: sum(1 for t in list(recent) if t >= since) * 60.0 / window
+        for pipeline, recent in sorted(_recent.items())
+    }
+
+
+def snapshot() -> Dict[str, Dict]:
+    return {
+        "histograms": {name: h.summary() for name, h in sorted(_histograms.items())},
+        "counters": dict(sorted(_counters.items())),
+    }
@@ -0,0 +1,112 @@
+"""运维数据汇总：吞吐、阶段耗时、排队、缓存命中率、地址健康与磁盘占用。
+
+只在查看页面或被抓取时汇总，热路径上仍只有 ``metrics`` 的计数与采样。
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .job_queue import score_scheduler
+from .metrics import snapshot, throughput
+from .resilience import health_snapshot
+from .resource import USER_PATH
+
+_DISK_TTL = 60.0
+_disk_cache: Optional[Tuple[float, Dict[str, int]]] = None
+
+_CACHE_NAMES = ("bind", "lang", "char_info", "baseinfo")
+
+
+def _scan_disk() -> Dict[str, int]:
+    total = 0
+    files = 0
+    for root, _, names in os.walk(USER_PATH):
+        for name in names:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+            files += 1
+    return {"bytes": total, "files": files}
+
+
+async def disk_usage() -> Dict[str, int]:
+    """``USER_PATH`` 下的文件数与总字节数，扫描结果缓存 60 秒。"""
+    global _disk_cache
+    now = time.monotonic()
+    if _disk_cache is None or now - _disk_cache[0] > _DISK_TTL:
+        _disk_cache = (now, await asyncio.to_thread(_scan_disk))
+    return _disk_cache[1]
+
+
+def cache_ratios(counters: Dict[str, int]) -> List[Dict[str, Any]]:
+    rows = []
+    for name in _CACHE_NAMES:
+        hit = counters.get(f"cache.{name}.hit", 0)
+        miss = counters.get(f"cache.{name}.miss", 0)
+        rows.append({"cache": name, "hit": hit, "miss": miss, "ratio": hit / (hit + miss) if hit + miss else None})
+    return rows
+
+
+async def collect_ops() -> Dict[str, Any]:
+    data = snapshot()
+    return {
+        "throughput": throughput(),
+        "queue": {"depth": score_scheduler.queue_depth, "inflight": score_scheduler.inflight},
+        "histograms": data["histograms"],
+        "counters": data["counters"],
+        "caches": cache_ratios(data["counters"]),
+        "endpoints": health_snapshot(),
+        "disk": await disk_usage(),
+    }
+
+
+def _metric_name(name: str) -> str:
+    return "scoreecho_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(ops: Dict[str, Any]) -> str:
+    """Prometheus 文本格式；直方图以 summary 的分位数形式导出。"""
+    lines: List[str] = []
+
+    lines.append("# TYPE scoreecho_stage_seconds summary")
+    for name, summary in ops["histograms"].items():
+        pipeline, _, stage = name.partition(".")
+        labels = f'pipeline="{_label(pipeline)}",stage="{_label(stage)}"'
+        for q in ("p50", "p95", "p99"):
+            lines.append(f'scoreecho_stage_seconds{{{labels},quantile="0.{q[1:]}"}} {summary[q]:.6f}')
+        lines.append(f"scoreecho_stage_seconds_sum{{{labels}}} {summary['sum']:.6f}")
+        lines.append(f"scoreecho_stage_seconds_count{{{labels}}} {summary['count']}")
+
+    for name, value in ops["counters"].items():
+        metric = _metric_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+
+    lines.append("# TYPE scoreecho_requests_per_minute gauge")
+    for pipeline, rpm in ops["throughput"].items():
+        lines.append(f'scoreecho_requests_per_minute{{pipeline="{_label(pipeline)}"}} {rpm:.3f}')
+
+    lines.append("# TYPE scoreecho_queue_depth gauge")
+    lines.append(f"scoreecho_queue_depth {ops['queue']['depth']}")
+    lines.append("# TYPE scoreecho_queue_inflight gauge")
+    lines.append(f"scoreecho_queue_inflight {ops['queue']['inflight']}")
+
+    # 同一指标族的 TYPE 与样本必须连续，逐族输出
+    lines.append("# TYPE scoreecho_endpoint_open gauge")
+    for row in ops["endpoints"]:
+        lines.append(f'scoreecho_endpoint_open{{endpoint="{_label(row["endpoint"])}"}} {int(row["state"] != "closed")}')
+    lines.append("# TYPE scoreecho_endpoint_failures gauge")
+    for row in ops["endpoints"]:
+        lines.append(f'scoreecho_endpoint_failures{{endpoint="{_label(row["endpoint"])}"}} {row["failures"]}')
+
+    lines.append("# TYPE scoreecho_user_disk_bytes gauge")
+    lines.append(f"scoreecho_user_disk_bytes {ops['disk']['bytes']}")
+    lines.append("# TYPE scoreecho_user_disk_files gauge")
+    lines.append(f"scoreecho_user_disk_files {ops['disk']['files']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,253 @@
+"""按需采样的性能剖析。
+
+控制台 ``profilerate``（按百分比随机抽样）或 ``profileslowms``（超过该耗时的请求）
+任一开启时，请求期间由两个采样器以 ``_SAMPLE_INTERVAL``（20ms）间隔记录调用栈：
+
+- 事件循环内的采样任务展开请求协程的 ``cr_await`` 链，记录它挂起在哪里（等 API、等线程等）；
+- 后台线程用 ``sys._current_frames()`` 记录事件循环线程正在执行什么（找阻塞事件循环的 CPU 开销）。
+
+抽中的请求从头开始采样；只因 ``profileslowms`` 而跟踪的请求在耗时达到阈值的
+``_SLOW_ARM_FRACTION`` 后才开始采样，正常请求不会启动采样任务和线程，
+代价是慢请求剖析缺少最前面那一段。有请求在采样时，每个采样周期事件循环内展开一次协程链，
+后台线程取一次 ``sys._current_frames()``，并持有一次 GIL。
+
+请求结束时命中抽样或超过阈值才写盘，保存到 ``MAIN_PATH/profiles``，
+只保留最新的 ``profilekeep`` 个文件。两项都关闭时 ``profile_request`` 只做一次配置判断。
+"""
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import FrameType
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from gsuid_core.logger import logger
+
+from ..scoreecho_config.config import seconfig
+from .metrics import trace_tag
+from .resource import MAIN_PATH
+
+PROFILE_PATH = MAIN_PATH / "profiles"
+
+_SAMPLE_INTERVAL = 0.02
+# 只为慢请求跟踪时，耗时达到阈值的该比例才开始采样
+_SLOW_ARM_FRACTION = 0.5
+_MAX_STACK_DEPTH = 48
+_TOP_STACKS = 50
+# 事件循环空闲时停在这些文件里，摘要中不算占用
+_IDLE_FILES = ("selectors.py", "base_events.py")
+
+Stack = Tuple[str, ...]
+
+
+class ProfileSession:
+    def __init__(self, task: "asyncio.Task[Any]", meta: Dict[str, Any], sampled: bool):
+        self.task = task
+        self.meta = meta
+        self.sampled = sampled
+        self.start = time.monotonic()
+        self.armed_at: Optional[float] = None
+        self.task_stacks: Counter = Counter()
+        self.loop_stacks: Counter = Counter()
+
+
+_sessions: Set[ProfileSession] = set()
+_sessions_lock = threading.Lock()
+_sampler_task: Optional["asyncio.Task[None]"] = None
+_sampler_thread: Optional[threading.Thread] = None
+_write_lock = threading.Lock()
+
+
+def _format_frame(frame: FrameType) -> str:
+    return f"{Path(frame.f_code.co_filename).name}:{frame.f_lineno}:{frame.f_code.co_name}"
+
+
+def _frame_stack(frame: Optional[FrameType]) -> Stack:
+    stack: List[str] = []
+    while frame is not None and len(stack) < _MAX_STACK_DEPTH:
+        stack.append(_format_frame(frame))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+def _task_stack(task: "asyncio.Task[Any]") -> Stack:
+    """沿 ``cr_await`` 展开挂起中的协程链（``get_stack`` 对挂起的协程只给最外层一帧）。"""
+    stack: List[str] = []
+    awaitable: Any = task.get_coro()
+    while awaitable is not None and len(stack) < _MAX_STACK_DEPTH:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            # 挂在 Future 上（gather / to_thread / IO 等待）
+            stack.append(type(awaitable).__name__)
+            break
+        stack.append(_format_frame(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return tuple(stack)
+
+
+async def _sample_tasks() -> None:
+    global _sampler_task
+    try:
+        while _sessions:
+            for session in list(_sessions):
+                if not session.task.done():
+                    session.task_stacks[_task_stack(session.task)] += 1
+            await asyncio.sleep(_SAMPLE_INTERVAL)
+    finally:
+        _sampler_task = None
+
+
+def _sample_loop_thread(loop_thread_id: int) -> None:
+    global _sampler_thread
+    while True:
+        with _sessions_lock:
+            if not _sessions:
+                _sampler_thread = None
+                return
+            frame = sys._current_frames().get(loop_thread_id)
+            stack = _frame_stack(frame)
+            for session in _sessions:
+                session.loop_stacks[stack] += 1
+        time.sleep(_SAMPLE_INTERVAL)
+
+
+def _ensure_samplers() -> None:
+    global _sampler_task, _sampler_thread
+    if _sampler_task is None:
+        _sampler_task = asyncio.create_task(_sample_tasks())
+    if _sampler_thread is None:
+        _sampler_thread = threading.Thread(
+            target=_sample_loop_thread,
+            args=(threading.get_ident(),),
+            name="scoreecho-profiler",
+            daemon=True,
+        )
+        _sampler_thread.start()
+
+
+def _arm(session: ProfileSession) -> None:
+    """开始为该请求采样。"""
+    session.armed_at = time.monotonic()
+    with _sessions_lock:
+        _sessions.add(session)
+    _ensure_samplers()
+
+
+def _top(stacks: Counter) -> List[Dict[str, Any]]:
+    return [
+        {"stack": ";".join(stack), "count": count}
+        for stack, count in stacks.most_common(_TOP_STACKS)
+    ]
+
+
+def _write_profile(data: Dict[str, Any], keep: int) -> Path:
+    with _write_lock:
+        PROFILE_PATH.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(data["started_at"]))
+        path = PROFILE_PATH / f"{stamp}_{data['pipeline']}_{data['trace_id'] or 'none'}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        files = sorted(PROFILE_PATH.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for old in files[max(keep, 1):]:
+            old.unlink(missing_ok=True)
+    return path
+
+
+@asynccontextmanager
+async def profile_request(pipeline: str, command: str, user_id: str, group_id: Optional[str]) -> AsyncIterator[None]:
+    """包住一次请求；未开启剖析时直接执行。"""
+    rate = int(seconfig.get_config("profilerate").data)
+    slow_ms = int(seconfig.get_config("profileslowms").data)
+    task = asyncio.current_task()
+    if (rate <= 0 and slow_ms <= 0) or task is None:
+        yield
+        return
+
+    sampled = rate > 0 and random.random() * 100 < rate
+    if not sampled and slow_ms <= 0:
+        yield
+        return
+
+    session = ProfileSession(
+        task,
+        {"pipeline": pipeline, "command": command, "user_id": user_id, "group_id": group_id},
+        sampled,
+    )
+    arm_handle: Optional[asyncio.TimerHandle] = None
+    if sampled:
+        _arm(session)
+    else:
+        arm_handle = asyncio.get_running_loop().call_later(slow_ms * _SLOW_ARM_FRACTION / 1000, _arm, session)
+    try:
+        yield
+    finally:
+        if arm_handle is not None:
+            arm_handle.cancel()
+        with _sessions_lock:
+            _sessions.discard(session)
+        elapsed_ms = (time.monotonic() - session.start) * 1000
+        slow = slow_ms > 0 and elapsed_ms >= slow_ms
+        if session.sampled or slow:
+            data = {
+                **session.meta,
+                "trace_id": trace_tag().lstrip("#"),
+                "started_at": time.time() - elapsed_ms / 1000,
+                "elapsed_ms": round(elapsed_ms, 1),
+                "reason": "slow" if slow else "sampled",
+                "interval_ms": _SAMPLE_INTERVAL * 1000,
+                "sampled_from_ms": round((session.armed_at - session.start) * 1000, 1) if session.armed_at else None,
+                "task_stacks": _top(session.task_stacks),
+                "loop_stacks": _top(session.loop_stacks),
+            }
+            keep = int(seconfig.get_config("profilekeep").data)
+            try:
+                path = await asyncio.to_thread(_write_profile, data, keep)
+                logger.info(f"[鸣潮评分·性能{trace_tag()}] {elapsed_ms:.0f}ms，剖析已保存: {path.name}")
+            except OSError as e:
+                logger.warning(f"[鸣潮评分·性能{trace_tag()}] 保存剖析失败: {e}")
+
+
+def _leaf(stack: str) -> str:
+    """最内层的代码位置（跳过末尾的 Future 等非协程对象）。"""
+    frames = [frame for frame in stack.split(";") if ":" in frame]
+    return frames[-1] if frames else (stack or "-")
+
+
+def _load_profiles(limit: int) -> List[Dict[str, Any]]:
+    if not PROFILE_PATH.exists():
+        return []
+    files = sorted(PROFILE_PATH.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    profiles = []
+    for path in files[:limit]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def summarize_profiles(limit: int = 10) -> str:
+    """最近几份剖析的摘要：耗时、原因、命令，以及挂起最多与占用事件循环最多的位置。"""
+    profiles = _load_profiles(limit)
+    if not profiles:
+        return "暂无性能剖析记录（控制台开启 profilerate 或 profileslowms 后生成）"
+    lines = [f"最近 {len(profiles)} 份性能剖析："]
+    for data in profiles:
+        stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(data["started_at"]))
+        lines.append(
+            f"{stamp} [{data['pipeline']}#{data['trace_id']}] {data['elapsed_ms']:.0f}ms"
+            f"（{data['reason']}） {data['command']}"
+        )
+        if data["task_stacks"]:
+            top = data["task_stacks"][0]
+            lines.append(f"  挂起最多: {_leaf(top['stack'])} ×{top['count']}")
+        busy = [s for s in data["loop_stacks"] if not _leaf(s["stack"]).startswith(_IDLE_FILES)]
+        if busy:
+            lines.append(f"  事件循环占用: {_leaf(busy[0]['stack'])} ×{busy[0]['count']}")
+    return "\n".join(lines)
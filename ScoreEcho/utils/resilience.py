@@ -0,0 +1,245 @@
+"""评分 API 的超时、对冲与熔断。
+
+- 超时：按该地址最近成功请求的耗时分布推算（p99 的 2 倍，限制在 10~60 秒），
+  样本不足时沿用原来的 20 秒；
+- 对冲：开启 ``hedge`` 后，请求超过 p95 仍未返回时再发一份到 ``hedgeendpoint``
+  （为空则同一地址），先成功的为准，另一份取消；
+- 熔断：连续失败（超时、网络错误、5xx）达到阈值后熔断，期间直接返回
+  ``ServiceDegradedError``；每过 ``_PROBE_INTERVAL`` 秒半开一次，放行一个真实请求试探，
+  成功则恢复，失败则继续熔断。主地址与对冲地址各自统计。
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, TypeVar
+
+from gsuid_core.logger import logger
+
+from ..scoreecho_config.config import seconfig
+from .metrics import inc, trace_tag
+
+T = TypeVar("T")
+
+_LATENCY_WINDOW = 200
+_MIN_SAMPLES = 20
+_DEFAULT_DEADLINE = 20.0
+_MIN_DEADLINE = 10.0
+_MAX_DEADLINE = 60.0
+_DEADLINE_FACTOR = 2.0
+
+_FAILURE_THRESHOLD = 5
+_PROBE_INTERVAL = 30.0
+
+SERVICE_DEGRADED_MSG = "评分服务暂时不可用（服务降级中），请稍后再试"
+
+
+class ServiceDegradedError(Exception):
+    """地址已熔断。"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"{endpoint} 熔断中，约 {retry_after:.0f} 秒后重试")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class EndpointHealth:
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        # 半开时放行的试探请求是否还在进行
+        self.trial_inflight = False
+
+    @property
+    def is_half_open(self) -> bool:
+        return self.opened_at is not None and time.monotonic() - self.opened_at >= _PROBE_INTERVAL
+
+    @property
+    def is_open(self) -> bool:
+        """熔断中且当前不能放行试探请求。"""
+        return self.opened_at is not None and (self.trial_inflight or not self.is_half_open)
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.is_half_open else "open"
+
+    def acquire(self) -> Optional[bool]:
+        """请求前调用：熔断中返回 None（拒绝），否则返回本次是否为半开试探。"""
+        if self.opened_at is None:
+            return False
+        if self.is_open:
+            return None
+        self.trial_inflight = True
+        return True
+
+    def release_trial(self) -> None:
+        self.trial_inflight = False
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < _MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def deadline(self) -> float:
+        p99 = self.percentile(0.99)
+        if p99 is None:
+            return _DEFAULT_DEADLINE
+        return min(_MAX_DEADLINE, max(_MIN_DEADLINE, p99 * _DEADLINE_FACTOR))
+
+    def retry_after(self) -> float:
+        """距下次可放行试探的秒数；半开试探进行中时按 1 秒算，不会提示用户 0 秒。"""
+        if self.opened_at is None:
+            return 0.0
+        return max(1.0, _PROBE_INTERVAL - (time.monotonic() - self.opened_at))
+
+    def record_success(self, elapsed: float) -> None:
+        self.latencies.append(elapsed)
+        self.record_reachable()
+
+    def record_reachable(self) -> None:
+        """服务端正常处理了请求（含 4xx），清零连续失败；半开时解除熔断。"""
+        self.failures = 0
+        if self.opened_at is not None:
+            self.opened_at = None
+            logger.info(f"[鸣潮评分·熔断] {self.endpoint} 试探请求成功，解除熔断")
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None:
+            # 半开试探失败，重新计时
+            self.opened_at = time.monotonic()
+            logger.warning(f"[鸣潮评分·熔断] {self.endpoint} 试探请求失败，继续熔断")
+        elif self.failures >= _FAILURE_THRESHOLD:
+            self.opened_at = time.monotonic()
+            inc("breaker.opened")
+            logger.warning(f"[鸣潮评分·熔断] {self.endpoint} 连续失败 {self.failures} 次，进入熔断")
+
+
+_health: Dict[str, EndpointHealth] = {}
+
+
+def get_health(endpoint: str) -> EndpointHealth:
+    health = _health.get(endpoint)
+    if health is None:
+        health = _health[endpoint] = EndpointHealth(endpoint)
+    return health
+
+
+def health_snapshot() -> List[Dict[str, Any]]:
+    """各地址的熔断状态与延迟分布，供运维页面展示。"""
+    return [
+        {
+            "endpoint": endpoint,
+            "state": health.state,
+            "failures": health.failures,
+            "samples": len(health.latencies),
+            "p50": health.percentile(0.50),
+            "p95": health.percentile(0.95),
+            "deadline": health.deadline(),
+        }
+        for endpoint, health in sorted(_health.items())
+    ]
+
+
+def degraded_retry_after(endpoint: Optional[str] = None) -> Optional[float]:
+    """地址处于熔断时返回预计的重试等待秒数，否则返回 None。"""
+    health = _health.get(endpoint or seconfig.get_config("endpoint").data)
+    if health is None or not health.is_open:
+        return None
+    return health.retry_after()
+
+
+def _is_failure(exc: BaseException) -> bool:
+    import httpx
+
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (httpx.RequestError, asyncio.TimeoutError))
+
+
+async def _tracked(call: Callable[[str], Awaitable[T]], endpoint: str) -> T:
+    """调用一个地址并记到该地址的健康统计上；被取消（对冲落败、整体超时）不计。"""
+    import httpx
+
+    health = get_health(endpoint)
+    start = time.monotonic()
+    try:
+        result = await call(endpoint)
+    except Exception as e:
+        if _is_failure(e):
+            health.record_failure()
+        elif isinstance(e, httpx.HTTPStatusError):
+            # 4xx 说明服务本身可达
+            health.record_reachable()
+        raise
+    health.record_success(time.monotonic() - start)
+    return result
+
+
+async def _hedged(
+    call: Callable[[str], Awaitable[T]], endpoint: str, hedge_endpoint: str, delay: Optional[float]
+) -> T:
+    pending: Set["asyncio.Task[T]"] = {asyncio.ensure_future(_tracked(call, endpoint))}
+    try:
+        if delay is not None:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                pending = done
+            else:
+                hedge_health = get_health(hedge_endpoint)
+                # 与主地址相同时主请求已经放行过，不再单独判断
+                hedge_trial = hedge_health.acquire() if hedge_endpoint != endpoint else False
+                if hedge_trial is None:
+                    logger.debug(f"[鸣潮评分·对冲{trace_tag()}] 对冲地址 {hedge_endpoint} 熔断中，不发送对冲请求")
+                else:
+                    inc("retry.hedge")
+                    logger.debug(f"[鸣潮评分·对冲{trace_tag()}] 超过 p95（{delay:.1f}s），向 {hedge_endpoint} 发送对冲请求")
+                    hedge_task = asyncio.ensure_future(_tracked(call, hedge_endpoint))
+                    if hedge_trial:
+                        # 任务可能在开始前就被取消，用回调释放试探名额
+                        hedge_task.add_done_callback(lambda _: hedge_health.release_trial())
+                    pending.add(hedge_task)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def call_with_resilience(endpoint: str, call: Callable[[str], Awaitable[T]]) -> T:
+    """以自适应超时、对冲与熔断包装一次 API 调用，``call`` 接收实际请求的地址。"""
+    import httpx
+
+    health = get_health(endpoint)
+    trial = health.acquire()
+    if trial is None:
+        inc("breaker.rejected")
+        raise ServiceDegradedError(endpoint, health.retry_after())
+
+    delay = None
+    hedge_endpoint = endpoint
+    if seconfig.get_config("hedge").data:
+        delay = health.percentile(0.95)
+        hedge_endpoint = str(seconfig.get_config("hedgeendpoint").data).strip() or endpoint
+
+    deadline = health.deadline()
+    try:
+        return await asyncio.wait_for(_hedged(call, endpoint, hedge_endpoint, delay), deadline)
+    except asyncio.TimeoutError as e:
+        # 超时时各分支已被取消、没有记录，整体算主地址一次失败
+        health.record_failure()
+        raise httpx.TimeoutException(f"评分服务器 {deadline:.0f} 秒内未响应") from e
+    finally:
+        if trial:
+            health.release_trial()
@@ -16,12 +16,10 @@ XW_CHAR_ALIAS_PATH = XW_ALIAS_PATH / "char_alias.json"
 
 
 def init_dir() -> None:
+    """创建数据目录；在启动钩子里调用，导入本模块时不做文件操作。"""
     USER_PATH.mkdir(parents=True, exist_ok=True)
     ALIAS_PATH.mkdir(parents=True, exist_ok=True)
 
 
 def get_user_dir(user_id: str, uid: str) -> Path:
     return USER_PATH / str(user_id) / str(uid)
-
-
-init_dir()
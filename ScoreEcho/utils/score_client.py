@@ -0,0 +1,318 @@
+"""评分 API 客户端。
+
+支持两种上传方式（控制台 ``transport`` 配置）：
+- ``base64``：图片 base64 后放进 JSON 的 ``images_base64``（默认，兼容所有服务端）；
+- ``multipart``：``multipart/form-data`` 上传，``payload`` 字段为 JSON 元数据，
+  每张图片作为一个 ``images`` 文件字段直接发送原始 WEBP 字节，请求体比 base64 小 25%
+  （base64 比原始字节大 1/3，见 ``benchmarks.bench_transport``）。
+
+``base64`` 方式可按 ``compression`` 配置给 JSON 请求体加 ``Content-Encoding``
+（gzip / zstd），压缩在线程中进行；压缩后不够小（``compressratio``）时发送原文。
+某个地址返回 415 时记住该地址不支持这种编码，回退并重发。
+multipart 里是已经压缩过的 WEBP，不再压缩。
+
+开启 ``hashupload`` 后按内容寻址两阶段上传：先只发送命令与图片 sha256
+（``image_digests``），服务端已有全部图片时直接返回结果，否则在 ``missing_digests``
+中列出缺少的摘要，再只补传这些图片（``images_by_digest``）。
+服务端不支持（404/415/422，或 400 且响应提到 ``image_digests``）时改发完整请求，
+并在一段时间内不再尝试；补传后仍缺图时改为完整上传一次。
+
+超时、对冲与熔断见 ``resilience``。
+"""
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import httpx
+import msgspec
+from gsuid_core.logger import logger
+
+from ..scoreecho_config.config import COMPRESSION_OPTIONS, TRANSPORT_OPTIONS, seconfig
+from .capture import note_call
+from .metrics import inc, timed, trace_tag
+from .resilience import call_with_resilience
+from .ttl_cache import TTLCache
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TRANSPORT_BASE64 = "base64"
+TRANSPORT_MULTIPART = "multipart"
+
+ENCODING_GZIP = "gzip"
+ENCODING_ZSTD = "zstd"
+
+# endpoint -> 该地址返回过 415 的编码
+_rejected_encodings: Dict[str, Set[str]] = {}
+
+# 列表按顺序上传；字典为两阶段上传时按摘要补传的图片
+Images = Union[List[bytes], Dict[str, bytes]]
+
+# 这些状态说明服务端不认识两阶段上传；400 只有响应里提到 image_digests 时才算，
+# 否则多半是请求本身有问题，完整重传也一样会失败，还白白多花一次额度
+_HASH_FALLBACK_STATUS = frozenset({404, 415, 422})
+# 不支持两阶段上传的地址，过期后重新探测（服务端可能已升级）
+_HASH_UNSUPPORTED_TTL = 3600
+_hash_unsupported: TTLCache[str, bool] = TTLCache(64, _HASH_UNSUPPORTED_TTL)
+
+
+def get_transport() -> str:
+    transport = str(seconfig.get_config("transport").data).strip().lower()
+    return transport if transport in TRANSPORT_OPTIONS else TRANSPORT_BASE64
+
+
+def _b64(image: bytes) -> str:
+    return base64.b64encode(image).decode("ascii")
+
+
+def _json_body(payload: Dict[str, object], images: Images) -> Dict[str, object]:
+    body = dict(payload)
+    if isinstance(images, dict):
+        body["images_by_digest"] = {digest: _b64(image) for digest, image in images.items()}
+    else:
+        body["images_base64"] = [_b64(image) for image in images]
+    return body
+
+
+def build_request_kwargs(
+    payload: Dict[str, object], images: Images, transport: str
+) -> Dict[str, Any]:
+    """按上传方式组装 ``httpx`` 的请求参数（不含鉴权头）。"""
+    if transport == TRANSPORT_MULTIPART:
+        if isinstance(images, dict):
+            files = [
+                ("images_by_digest", (f"{digest}.webp", image, "image/webp"))
+                for digest, image in images.items()
+            ]
+        else:
+            files = [
+                ("images", (f"{index}.webp", image, "image/webp"))
+                for index, image in enumerate(images)
+            ]
+        return {
+            "data": {"payload": json.dumps(payload, ensure_ascii=False)},
+            "files": files,
+        }
+    return {"json": _json_body(payload, images)}
+
+
+def get_content_encoding(endpoint: str) -> Optional[str]:
+    """按配置与该地址的协商结果选出请求体编码，不压缩时返回 None。"""
+    setting = str(seconfig.get_config("compression").data).strip().lower()
+    if setting not in COMPRESSION_OPTIONS or setting == "none":
+        return None
+    if setting == ENCODING_GZIP:
+        candidates = [ENCODING_GZIP]
+    else:
+        # 未安装 zstandard 时 zstd/auto 都退回 gzip
+        candidates = [ENCODING_ZSTD, ENCODING_GZIP] if zstandard else [ENCODING_GZIP]
+    rejected = _rejected_encodings.get(endpoint, set())
+    return next((c for c in candidates if c not in rejected), None)
+
+
+def _compress(raw: bytes, encoding: str) -> bytes:
+    if encoding == ENCODING_ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return gzip.compress(raw, compresslevel=6)
+
+
+def build_compressed_kwargs(
+    payload: Dict[str, object], images: Images, encoding: str, max_ratio: float
+) -> Tuple[Dict[str, Any], bool]:
+    """序列化并压缩 base64 请求体（较耗 CPU，在线程中调用）。
+
+    返回 ``(请求参数, 是否已压缩)``；压缩收益不足时返回未压缩的原文。
+    """
+    body = _json_body(payload, images)
+    raw = msgspec.json.encode(body)
+    del body
+    headers = {"Content-Type": "application/json"}
+    compressed = _compress(raw, encoding)
+    if len(compressed) > len(raw) * max_ratio:
+        return {"content": raw, "headers": headers}, False
+    headers["Content-Encoding"] = encoding
+    return {"content": compressed, "headers": headers}, True
+
+
+def image_digests(images: List[bytes]) -> List[str]:
+    return [hashlib.sha256(image).hexdigest() for image in images]
+
+
+class ScoreResponse(msgspec.Struct):
+    """评分 API 响应；结果图在解码时直接从 base64 转成 bytes，不保留中间字符串。
+
+    msgspec 只接受标准 base64。服务端返回带换行或 ``data:`` 前缀的 base64、
+    非字符串的 ``message`` 等时由 ``_decode_lenient`` 兜底，行为与旧的 ``b64decode`` 一致。
+    """
+
+    message: Optional[str] = None
+    result_image: Optional[bytes] = msgspec.field(default=None, name="result_image_base64")
+    score_results: Any = None
+    matched_character: Optional[str] = None
+    missing_digests: Optional[List[str]] = None
+
+
+_response_decoder = msgspec.json.Decoder(ScoreResponse)
+
+
+def _decode_lenient(raw: bytes) -> ScoreResponse:
+    """宽松解码：先解析成 dict，再逐个字段容错（较慢，在线程中调用）。"""
+    data = msgspec.json.decode(raw)
+    if not isinstance(data, dict):
+        raise ValueError(f"评分服务器返回了非对象的 JSON: {type(data).__name__}")
+    image = data.get("result_image_base64")
+    if isinstance(image, str) and image:
+        if image.startswith("data:") and "," in image:
+            image = image.split(",", 1)[1]
+        # 非严格模式会忽略换行等非 base64 字符
+        result_image: Optional[bytes] = base64.b64decode(image)
+    else:
+        result_image = None
+    message = data.get("message")
+    matched = data.get("matched_character")
+    missing = data.get("missing_digests")
+    return ScoreResponse(
+        message=None if message is None else str(message),
+        result_image=result_image,
+        score_results=data.get("score_results"),
+        matched_character=None if matched is None else str(matched),
+        missing_digests=[str(d) for d in missing] if isinstance(missing, list) else None,
+    )
+
+
+async def post_score(
+    payload: Dict[str, object],
+    images: List[bytes],
+    endpoint: Optional[str] = None,
+) -> ScoreResponse:
+    """调用评分 API；HTTP 错误抛 ``httpx.HTTPStatusError``，熔断中抛 ``ServiceDegradedError``。
+
+    ``endpoint`` 为空时使用控制台配置的地址。
+    """
+    endpoint = endpoint or seconfig.get_config("endpoint").data
+    started = time.monotonic()
+    try:
+        response = await call_with_resilience(endpoint, lambda ep: _post_to(ep, payload, images))
+    except Exception as e:
+        note_call(payload, images, started, e)
+        raise
+    note_call(payload, images, started)
+    return response
+
+
+async def _post_to(endpoint: str, payload: Dict[str, object], images: List[bytes]) -> ScoreResponse:
+    if images and seconfig.get_config("hashupload").data and endpoint not in _hash_unsupported:
+        digests = await asyncio.to_thread(image_digests, images)
+        hashed_payload = dict(payload, image_digests=digests)
+        try:
+            data = await _send(endpoint, {"json": hashed_payload})
+        except httpx.HTTPStatusError as e:
+            if not _hash_upload_rejected(e.response):
+                raise
+            _hash_unsupported.set(endpoint, True)
+            inc("retry.hash_fallback")
+            logger.info(f"[鸣潮评分·上传{trace_tag()}] {endpoint} 不支持哈希上传（{e.response.status_code}），改为完整上传")
+        else:
+            if not data.missing_digests:
+                inc("hash.images_skipped", len(digests))
+                return data
+            missing = set(data.missing_digests)
+            inc("hash.images_skipped", len(digests) - len(missing))
+            logger.debug(f"[鸣潮评分·上传{trace_tag()}] 服务端缺少 {len(missing)}/{len(digests)} 张图片，补传")
+            upload = {d: image for d, image in zip(digests, images) if d in missing}
+            data = await _post_images(endpoint, hashed_payload, upload)
+            if not data.missing_digests or data.result_image:
+                return data
+            # 补传后仍然缺图（服务端缓存在两次请求之间被淘汰等），改为完整上传一次
+            inc("retry.hash_missing")
+            logger.warning(
+                f"[鸣潮评分·上传{trace_tag()}] 补传后服务端仍缺少 {len(data.missing_digests)} 张图片，改为完整上传"
+            )
+    return await _post_images(endpoint, payload, images)
+
+
+def _hash_upload_rejected(response: "httpx.Response") -> bool:
+    if response.status_code in _HASH_FALLBACK_STATUS:
+        return True
+    return response.status_code == 400 and "image_digests" in response.text
+
+
+async def _post_images(endpoint: str, payload: Dict[str, object], images: Images) -> ScoreResponse:
+    transport = get_transport()
+    encoding = get_content_encoding(endpoint) if transport == TRANSPORT_BASE64 else None
+    if encoding:
+        max_ratio = min(max(int(seconfig.get_config("compressratio").data), 0), 100) / 100
+        request_kwargs, compressed = await asyncio.to_thread(
+            build_compressed_kwargs, payload, images, encoding, max_ratio
+        )
+        try:
+            return await _send(endpoint, request_kwargs)
+        except httpx.HTTPStatusError as e:
+            if not compressed or e.response.status_code != 415:
+                raise
+            _rejected_encodings.setdefault(endpoint, set()).add(encoding)
+            inc("retry.encoding")
+            logger.warning(f"[鸣潮评分·上传{trace_tag()}] {endpoint} 不支持 {encoding} 压缩，改为发送原文")
+        del request_kwargs
+    return await _send(endpoint, build_request_kwargs(payload, images, transport))
+
+
+async def _read_body(response: "httpx.Response") -> bytearray:
+    """按块把响应体读进一个缓冲区。
+
+    ``response.aread()`` 先攒下全部分块再整体拼接，拼接瞬间分块列表与结果同时存在；
+    未压缩且带 ``Content-Length`` 的响应（评分服务的常态）这里按长度预分配，逐块拷入，
+    峰值只有一份响应体。
+    """
+    length = response.headers.get("Content-Length")
+    identity = response.headers.get("Content-Encoding", "identity") == "identity"
+    if not (length and length.isdigit() and identity):
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+        return body
+    body = bytearray(int(length))
+    view = memoryview(body)
+    filled = 0
+    try:
+        async for chunk in response.aiter_bytes():
+            end = filled + len(chunk)
+            if end > len(body):
+                raise httpx.DecodingError(f"响应体超过 Content-Length（{length} 字节）", request=response.request)
+            view[filled:end] = chunk
+            filled = end
+    finally:
+        view.release()
+    if filled != len(body):
+        del body[filled:]
+    return body
+
+
+async def _send(endpoint: str, request_kwargs: Dict[str, Any]) -> ScoreResponse:
+    headers = {"Authorization": f"Bearer {seconfig.get_config('xwtoken').data}"}
+    headers.update(request_kwargs.get("headers", {}))
+    kwargs = {k: v for k, v in request_kwargs.items() if k != "headers"}
+    # 整体超时由 resilience 按延迟分布控制，这里只兜底
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        async with client.stream("POST", endpoint, headers=headers, **kwargs) as response:
+            if response.is_error:
+                # 错误响应整体读入，调用方要从 e.response 取 text / json
+                await response.aread()
+                raw: Union[bytes, bytearray] = response.content
+            else:
+                raw = await _read_body(response)
+    inc("bytes.up", int(response.request.headers.get("Content-Length") or 0))
+    inc("bytes.down", len(raw))
+    response.raise_for_status()
+    with timed("decode"):
+        try:
+            return _response_decoder.decode(raw)
+        except msgspec.ValidationError:
+            inc("decode.lenient")
+            return await asyncio.to_thread(_decode_lenient, raw)
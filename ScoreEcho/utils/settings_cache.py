@@ -0,0 +1,63 @@
+"""用户设置快照缓存。
+
+缓存语言设置（按 user_id）与 ``char_info.json``（按 user_id + uid），
+设置命令写入时同步更新缓存，热点用户的评分/分析请求不再读库或读盘。
+"""
+import json
+from pathlib import Path
+from typing import Dict, Tuple
+
+from .database.models import ScoreLangSettings
+from .metrics import inc
+from .resource import get_user_dir
+from .ttl_cache import TTLCache
+
+_SETTINGS_TTL = 6 * 3600
+_SETTINGS_MAXSIZE = 4096
+
+_lang_cache: TTLCache[str, str] = TTLCache(_SETTINGS_MAXSIZE, _SETTINGS_TTL)
+_char_info_cache: TTLCache[Tuple[str, str], Dict[str, str]] = TTLCache(_SETTINGS_MAXSIZE, _SETTINGS_TTL)
+
+
+def get_char_info_path(user_id: str, uid: str) -> Path:
+    return get_user_dir(user_id, uid) / "char_info.json"
+
+
+async def get_user_lang(user_id: str) -> str:
+    lang = _lang_cache.get(user_id)
+    inc("cache.lang.hit" if lang is not None else "cache.lang.miss")
+    if lang is None:
+        lang = await ScoreLangSettings.get_lang(user_id)
+        _lang_cache.set(user_id, lang)
+    return lang
+
+
+async def set_user_lang(user_id: str, lang: str) -> None:
+    await ScoreLangSettings.set_lang(user_id, lang)
+    _lang_cache.set(user_id, lang)
+
+
+def load_char_info(user_id: str, uid: str) -> Dict[str, str]:
+    """读取角色信息，返回副本，修改后需调用 ``save_char_info``。"""
+    key = (user_id, uid)
+    data = _char_info_cache.get(key)
+    inc("cache.char_info.hit" if data is not None else "cache.char_info.miss")
+    if data is None:
+        path = get_char_info_path(user_id, uid)
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        else:
+            data = {}
+        if "用户名" not in data:
+            data["用户名"] = ""
+        _char_info_cache.set(key, data)
+    return dict(data)
+
+
+def save_char_info(user_id: str, uid: str, data: Dict[str, str]) -> None:
+    path = get_char_info_path(user_id, uid)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    _char_info_cache.set((user_id, uid), dict(data))
@@ -0,0 +1,59 @@
+"""带 TTL 与 LRU 上限的进程内缓存。"""
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Iterator, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """超过 ``ttl`` 秒的条目视为过期，超过 ``maxsize`` 时淘汰最久未使用的条目。
+
+    非线程安全，只在事件循环内使用。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get_entry(key) is not None
+
+    def get_entry(self, key: K) -> Optional[Tuple[float, V]]:
+        """返回 ``(写入时间, 值)``，不存在或已过期返回 None。"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] >= self.ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self.get_entry(key)
+        return entry[1] if entry else default
+
+    def set(self, key: K, value: V, stored_at: Optional[float] = None) -> None:
+        self._data[key] = (time.time() if stored_at is None else stored_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def items(self) -> Iterator[Tuple[K, Tuple[float, V]]]:
+        """按 LRU 顺序（最久未用在前）遍历未过期条目。"""
+        now = time.time()
+        for key, entry in list(self._data.items()):
+            if now - entry[0] < self.ttl:
+                yield key, entry
@@ -3,25 +3,58 @@
 提供:
 - ``email_login_entry``：复用 xwuid 的 launcher SDK 登录命令
 - ``find_xwuid_net_uid``：在 xwuid 的 ``WavesBind`` 里找该用户绑定的国际服 UID
-- ``fetch_baseinfo``：拉 launcher SDK 玩家基础信息(24h 内存缓存)
+- ``fetch_baseinfo``：拉 launcher SDK 玩家基础信息(24h LRU 缓存，落盘，合并并发请求)
 - ``get_avatar_url``：从 Event 解析头像 URL(QQ 官机 / onebot 通用)
 
 xwuid 不存在时所有方法降级为不可用 / None,不影响 ScoreEcho 主功能。
+xwuid 的符号只在启动时(或首次使用时)解析一次并缓存。
 """
 
 from __future__ import annotations
 
+import asyncio
+import importlib
+import json
+import os
+import threading
 import time
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 from gsuid_core.bot import Bot
 from gsuid_core.logger import logger
 from gsuid_core.models import Event
 
+from .metrics import inc
+from .resource import MAIN_PATH
+from .ttl_cache import TTLCache
+
 
 _NET_UID_THRESHOLD = 200000000
+
+_XW_ROOT = "plugins.XutheringWavesUID.XutheringWavesUID"
+_XW_SYMBOLS: Dict[str, Tuple[str, str]] = {
+    "email_login_entry": (f"{_XW_ROOT}.wutheringwaves_login.email_login", "email_login_entry"),
+    "WavesBind": (f"{_XW_ROOT}.utils.database.models", "WavesBind"),
+    "fetch_launcher_panel": (f"{_XW_ROOT}.utils.api.launcher_chain", "fetch_launcher_panel"),
+}
+# 名称 -> 解析结果；None 表示 xwuid 不可用，不再重复尝试 import
+_xw_resolved: Dict[str, Any] = {}
+
+# 没有国际服 UID 的用户短时间内不再查 WavesBind。
+# 通过 xwuid 自己的命令绑定时不会通知本插件，新 UID 最多晚这么久才被发现
+_NO_NET_UID_TTL = 60
+_no_net_uid_cache: TTLCache[Tuple[str, str], bool] = TTLCache(8192, _NO_NET_UID_TTL)
 _BASEINFO_TTL = 24 * 3600
-_baseinfo_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_BASEINFO_MAXSIZE = 2048
+# 条目寿命超过该比例时先返回旧值，同时在后台刷新
+_BASEINFO_REFRESH_AHEAD = 0.8
+_BASEINFO_CACHE_PATH = MAIN_PATH / "cache" / "baseinfo.json"
+
+_baseinfo_cache: TTLCache[str, Dict[str, Any]] = TTLCache(_BASEINFO_MAXSIZE, _BASEINFO_TTL)
+_baseinfo_inflight: Dict[str, "asyncio.Task[Optional[Dict[str, Any]]]"] = {}
+# 从磁盘恢复缓存的加载任务；并发调用共享同一次加载
+_baseinfo_load: Optional["asyncio.Task[None]"] = None
+_baseinfo_dump_lock = threading.Lock()
 
 
 def is_net_uid(uid: str) -> bool:
@@ -31,61 +64,121 @@ def is_net_uid(uid: str) -> bool:
         return False
 
 
+def _get_xw_symbol(name: str) -> Any:
+    if name in _xw_resolved:
+        return _xw_resolved[name]
+    module_name, attr = _XW_SYMBOLS[name]
+    try:
+        value = getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError):
+        value = None
+    _xw_resolved[name] = value
+    return value
+
+
+def resolve_bridge() -> bool:
+    """解析并缓存全部 xwuid 符号，返回 xwuid 是否可用。启动时调用一次。"""
+    available = all(_get_xw_symbol(name) is not None for name in _XW_SYMBOLS)
+    if available:
+        logger.info("[鸣潮评分·桥接] 已检测到 XutheringWavesUID")
+    else:
+        logger.info("[鸣潮评分·桥接] 未检测到完整的 XutheringWavesUID，相关功能降级")
+    return available
+
+
 async def email_login_entry(bot: Bot, ev: Event):
     """触发 xwuid 的邮箱登录流程；xwuid 不在时给提示。"""
-    try:
-        from plugins.XutheringWavesUID.XutheringWavesUID.wutheringwaves_login.email_login import (
-            email_login_entry as entry,
-        )
-    except ImportError:
+    entry = _get_xw_symbol("email_login_entry")
+    if entry is None:
         at_sender = ev.group_id is not None
         return await bot.send(
             "分析登录依赖 XutheringWavesUID 插件，未检测到该插件。",
             at_sender=at_sender,
         )
-    return await entry(bot, ev)
+    try:
+        return await entry(bot, ev)
+    finally:
+        # 登录完成后才可能新增国际服 UID；登录过程中的查询会写回负缓存，结束后再清一次
+        invalidate_net_uid(ev.user_id, ev.bot_id)
+
+
+def invalidate_net_uid(user_id: str, bot_id: str) -> None:
+    _no_net_uid_cache.pop((user_id, bot_id))
 
 
 async def find_xwuid_net_uid(user_id: str, bot_id: str) -> Optional[str]:
     """在 xwuid 的 WavesBind 里找该用户绑定的第一个国际服 UID。"""
-    try:
-        from plugins.XutheringWavesUID.XutheringWavesUID.utils.database.models import (
-            WavesBind,
-        )
-    except ImportError:
+    waves_bind = _get_xw_symbol("WavesBind")
+    if waves_bind is None:
+        return None
+    key = (user_id, bot_id)
+    if key in _no_net_uid_cache:
         return None
     try:
-        uid_list = await WavesBind.get_uid_list_by_game(user_id, bot_id) or []
+        uid_list = await waves_bind.get_uid_list_by_game(user_id, bot_id) or []
     except Exception:
         logger.exception("[鸣潮评分·桥接] 查询 xwuid WavesBind 失败")
         return None
     for uid in uid_list:
         if is_net_uid(uid):
             return uid
+    _no_net_uid_cache.set(key, True)
     return None
 
 
-async def fetch_baseinfo(user_id: str, bot_id: str, uid: str) -> Optional[Dict[str, Any]]:
-    """拉取 launcher SDK 玩家基础信息（24h 内存缓存）。
-
-    返回 ``{role_name, union_level, world_level}`` 或 ``None``。
-    仅对国际服 UID 生效。
-    """
-    if not is_net_uid(uid):
-        return None
+def _read_baseinfo_file() -> Dict[str, Any]:
+    """读取并解析磁盘上的基础信息缓存；在线程里调用，不碰内存缓存。"""
+    if not _BASEINFO_CACHE_PATH.exists():
+        return {}
     try:
-        from plugins.XutheringWavesUID.XutheringWavesUID.utils.api.launcher_chain import (
-            fetch_launcher_panel,
-        )
-    except ImportError:
-        return None
+        with open(_BASEINFO_CACHE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.warning(f"[鸣潮评分·桥接] 读取基础信息缓存失败: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def _restore_baseinfo_cache() -> None:
+    data = await asyncio.to_thread(_read_baseinfo_file)
+    # TTLCache 不是线程安全的，写入回到事件循环上进行
+    for uid, entry in data.items():
+        if _baseinfo_cache.get_entry(uid) is not None:
+            # 加载期间已经拉到更新的数据
+            continue
+        try:
+            stored_at, info = entry
+            _baseinfo_cache.set(uid, info, stored_at=float(stored_at))
+        except (TypeError, ValueError):
+            continue
+
+
+async def load_baseinfo_cache() -> None:
+    """从磁盘恢复基础信息缓存（重启后免去重新拉取 launcher），只加载一次。"""
+    global _baseinfo_load
+    if _baseinfo_load is None:
+        _baseinfo_load = asyncio.ensure_future(_restore_baseinfo_cache())
+    if not _baseinfo_load.done():
+        # shield：某个等待方被取消时不影响加载本身
+        await asyncio.shield(_baseinfo_load)
+
 
-    now = time.time()
-    cached = _baseinfo_cache.get(uid)
-    if cached and now - cached[0] < _BASEINFO_TTL:
-        return cached[1]
+def _dump_baseinfo_cache(entries: Dict[str, Any]) -> None:
+    with _baseinfo_dump_lock:
+        _BASEINFO_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _BASEINFO_CACHE_PATH.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, _BASEINFO_CACHE_PATH)
 
-    panel = await fetch_launcher_panel(user_id, bot_id, uid)
+
+async def _refresh_baseinfo(
+    fetch: Callable[[str, str, str], Awaitable[Any]],
+    user_id: str,
+    bot_id: str,
+    uid: str,
+) -> Optional[Dict[str, Any]]:
+    panel = await fetch(user_id, bot_id, uid)
     if panel is None:
         return None
 
@@ -95,10 +188,61 @@ async def fetch_baseinfo(user_id: str, bot_id: str, uid: str) -> Optional[Dict[s
         "union_level": base.level,
         "world_level": base.worldLevel,
     }
-    _baseinfo_cache[uid] = (now, info)
+    _baseinfo_cache.set(uid, info)
+    entries = {k: [stored_at, v] for k, (stored_at, v) in _baseinfo_cache.items()}
+    try:
+        await asyncio.to_thread(_dump_baseinfo_cache, entries)
+    except Exception as e:
+        logger.warning(f"[鸣潮评分·桥接] 保存基础信息缓存失败: {e}")
     return info
 
 
+def _on_refresh_done(uid: str, task: "asyncio.Task[Optional[Dict[str, Any]]]") -> None:
+    _baseinfo_inflight.pop(uid, None)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"[鸣潮评分·桥接] 拉取 UID {uid} 基础信息失败: {task.exception()}")
+
+
+def _start_refresh(
+    fetch: Callable[[str, str, str], Awaitable[Any]],
+    user_id: str,
+    bot_id: str,
+    uid: str,
+) -> "asyncio.Task[Optional[Dict[str, Any]]]":
+    """同一 UID 同时只发一次 launcher 请求，其余调用复用该任务。"""
+    task = _baseinfo_inflight.get(uid)
+    if task is None:
+        task = asyncio.create_task(_refresh_baseinfo(fetch, user_id, bot_id, uid))
+        _baseinfo_inflight[uid] = task
+        task.add_done_callback(lambda t: _on_refresh_done(uid, t))
+    return task
+
+
+async def fetch_baseinfo(user_id: str, bot_id: str, uid: str) -> Optional[Dict[str, Any]]:
+    """拉取 launcher SDK 玩家基础信息（24h LRU 缓存，重启后从磁盘恢复）。
+
+    返回 ``{role_name, union_level, world_level}`` 或 ``None``。
+    仅对国际服 UID 生效。
+    """
+    if not is_net_uid(uid):
+        return None
+    fetch_launcher_panel = _get_xw_symbol("fetch_launcher_panel")
+    if fetch_launcher_panel is None:
+        return None
+
+    await load_baseinfo_cache()
+    entry = _baseinfo_cache.get_entry(uid)
+    inc("cache.baseinfo.hit" if entry else "cache.baseinfo.miss")
+    if entry:
+        stored_at, info = entry
+        if time.time() - stored_at > _BASEINFO_TTL * _BASEINFO_REFRESH_AHEAD:
+            _start_refresh(fetch_launcher_panel, user_id, bot_id, uid)
+        return info
+
+    # shield：某个等待方被取消时不影响共享的请求
+    return await asyncio.shield(_start_refresh(fetch_launcher_panel, user_id, bot_id, uid))
+
+
 def get_avatar_url(ev: Event) -> Optional[str]:
     """从 Event 解析头像 URL。
 
@@ -0,0 +1 @@
+"""ScoreEcho benchmarks."""
@@ -0,0 +1,141 @@
+"""50 个并发分析请求的峰值内存：桩服务 + 真实 ``post_score`` + 面板落盘。
+
+对比三种响应处理方式，各在独立子进程中运行：
+- ``legacy``：``response.json()`` 后再 ``b64decode``，与旧实现一致；
+- ``buffered``：``client.post`` 整体读入响应体，再用 msgspec 直接把 ``result_image_base64`` 解码为 bytes；
+- ``stream``：当前实现，按 ``Content-Length`` 预分配缓冲区逐块读入响应体，再同样解码。
+
+桩服务在另一个子进程中运行，不计入被测进程的内存。
+
+用法（仓库根目录，需安装插件依赖）::
+
+    python -m benchmarks.bench_memory --concurrency 50
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from .stub_server import spawn
+
+
+async def _legacy_post(endpoint: str, payload: dict, images: list) -> dict:
+    import httpx
+
+    from ScoreEcho.utils.score_client import build_request_kwargs, get_transport
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        response = await client.post(endpoint, **build_request_kwargs(payload, images, get_transport()))
+        response.raise_for_status()
+        data = response.json()
+    data["result_image"] = base64.b64decode(data["result_image_base64"])
+    return data
+
+
+async def _buffered_post(endpoint: str, payload: dict, images: list):
+    import httpx
+
+    from ScoreEcho.utils.score_client import _response_decoder, build_request_kwargs, get_transport
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        response = await client.post(endpoint, **build_request_kwargs(payload, images, get_transport()))
+        response.raise_for_status()
+    return _response_decoder.decode(response.content)
+
+
+async def _one(mode: str, endpoint: str, index: int, images: list, out_dir: Path) -> None:
+    from ScoreEcho.scoreecho_score import _save_panel
+    from ScoreEcho.utils.score_client import post_score
+
+    payload = {"command_str": f"长离 {index}", "user_data": {"uid": "100000001"}}
+    user_dir = out_dir / str(index)
+    if mode == "legacy":
+        data = await _legacy_post(endpoint, payload, images)
+        await asyncio.to_thread(
+            _save_panel, user_dir, data["matched_character"], data["result_image"], "长离", data["score_results"]
+        )
+    else:
+        if mode == "buffered":
+            response = await _buffered_post(endpoint, payload, images)
+        else:
+            response = await post_score(payload, images, endpoint=endpoint)
+        await asyncio.to_thread(
+            _save_panel, user_dir, response.matched_character, response.result_image, "长离", response.score_results
+        )
+
+
+def _measure(mode: str, endpoint: str, concurrency: int, image_count: int, image_size: int) -> dict:
+    images = [os.urandom(image_size) for _ in range(image_count)]
+
+    async def run() -> float:
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(_one(mode, endpoint, i, images, Path(tmp)) for i in range(concurrency))
+            )
+            return time.perf_counter() - start
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    elapsed = asyncio.run(run())
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "tracemalloc_peak_kb": traced_peak // 1024,
+        "peak_rss_kb": rss_after,
+        "peak_rss_delta_kb": rss_after - rss_before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--images", type=int, default=3, help="每个请求的图片数")
+    parser.add_argument("--image-size", type=int, default=300 * 1024)
+    parser.add_argument("--result-size", type=int, default=600_000, help="桩服务返回的结果图字节数")
+    parser.add_argument("--mode", choices=("legacy", "buffered", "stream"), help="只测量一种方式（子进程内部使用）")
+    parser.add_argument("--endpoint", help="子进程内部使用")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_measure(args.mode, args.endpoint, args.concurrency, args.images, args.image_size)))
+        return
+
+    stub, endpoint = spawn(["--result-size", str(args.result_size)])
+    try:
+        results = []
+        for mode in ("legacy", "buffered", "stream"):
+            output = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.bench_memory",
+                    "--mode", mode,
+                    "--endpoint", endpoint,
+                    "--concurrency", str(args.concurrency),
+                    "--images", str(args.images),
+                    "--image-size", str(args.image_size),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        print(json.dumps(results, indent=2))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""评分兜底正则的匹配开销：未锚定的旧写法 vs 带前瞻预检的锚定写法。
+
+在一批模拟群聊消息上（闲聊、表情、链接、带数字的游戏讨论，夹杂少量真实评分命令）
+分别用 ``re.search`` 跑两条正则，先逐条确认新旧写法的匹配结果与分组完全一致，
+再报告每条消息的平均耗时与最长消息的耗时。
+
+用法（仓库根目录，需安装插件依赖）::
+
+    python -m benchmarks.bench_regex
+    python -m benchmarks.bench_regex --corpus messages.txt   # 每行一条消息（已去掉命令前缀）
+"""
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+from typing import List, Optional
+
+CHAT = [
+    "今天深塔打得好累啊，有没有人一起",
+    "哈哈哈哈哈哈",
+    "😂😂😂",
+    "这个版本的角色强度怎么样",
+    "刚出了一个双暴头，开心",
+    "有没有大佬帮我看看这套声骸",
+    "明天几点维护来着",
+    "我的长离还差一个暴击头",
+    "你们抽了吗",
+    "https://www.bilibili.com/video/BV1xx411c7mD",
+    "@群主 什么时候发红包",
+    "cc 你在吗",
+    "这个 boss 有点难打，打了 3 次才过",
+    "4星武器还是5星武器",
+    "第4层怎么打",
+    "c语言作业写完了吗",
+    "合鸣效果选哪个比较好",
+    "周本打完了 今天体力还剩 120",
+    "OK 👌",
+    "声骸强化到 25 级要多少经验",
+]
+GAME_TALK = [
+    "我抽了3c的声骸 但是没出双暴 好气",
+    "4c主词条选暴击还是爆伤",
+    "1c的声骸随便用就行",
+    "c4 位置放什么",
+    "cost4 的声骸掉率好低",
+]
+COMMANDS = [
+    "长离4c",
+    "今汐 c4 爆伤",
+    "卡提希娅 4c暴击",
+    "椿3c",
+    "守岸人评分",
+    "珂莱塔 cost4",
+    "相里要 1c",
+    "赞妮評分",
+]
+
+
+def build_corpus(count: int, seed: int = 0) -> List[str]:
+    """按大致比例混合：闲聊 85%、带 cost 字样的游戏讨论 12%、真实评分命令 3%；长度从几个字到几百字。"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.03:
+            corpus.append(rng.choice(COMMANDS))
+            continue
+        pool = GAME_TALK if roll < 0.15 else CHAT
+        parts = [rng.choice(pool) for _ in range(rng.choice((1, 1, 1, 2, 3, 8)))]
+        corpus.append(rng.choice(("", " ", "，", "\n")).join(parts))
+    return corpus
+
+
+def _time_per_message(pattern: "re.Pattern[str]", corpus: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in corpus:
+            pattern.search(message)
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus)
+
+
+def _groups(pattern: "re.Pattern[str]", message: str):
+    match = pattern.search(message)
+    return match.groups() if match else None
+
+
+def main(argv: Optional[list] = None) -> None:
+    from ScoreEcho.scoreecho_score import SCORE_COST_REGEX, SCORE_KEYWORD_REGEX
+    from ScoreEcho.utils.char_utils import PATTERN
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=5000, help="模拟消息条数")
+    parser.add_argument("--corpus", type=Path, help="真实消息文件，每行一条")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        corpus = [line.rstrip("\n") for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+    else:
+        corpus = build_corpus(args.count)
+
+    # 未锚定的旧写法，作为对照
+    legacy = {
+        "cost": rf"({PATTERN})\s*(?:[cC](?:[oO][sS][tT])?\s*([134])|([134])\s*[cC](?:[oO][sS][tT])?)\s*({PATTERN})?$",
+        "keyword": rf"({PATTERN})(?:评分|評分|查分)$",
+    }
+    current = {"cost": SCORE_COST_REGEX, "keyword": SCORE_KEYWORD_REGEX}
+    longest = max(corpus, key=len)
+
+    results = []
+    for name in ("cost", "keyword"):
+        old, new = re.compile(legacy[name]), re.compile(current[name])
+        mismatches = [m for m in corpus if _groups(old, m) != _groups(new, m)]
+        if mismatches:
+            raise SystemExit(f"{name}: {len(mismatches)} 条消息新旧结果不一致，例如 {mismatches[0]!r}")
+        old_us = _time_per_message(old, corpus, args.repeat) * 1e6
+        new_us = _time_per_message(new, corpus, args.repeat) * 1e6
+        results.append(
+            {
+                "regex": name,
+                "messages": len(corpus),
+                "matched": sum(1 for m in corpus if new.search(m)),
+                "legacy_us_per_msg": round(old_us, 3),
+                "anchored_us_per_msg": round(new_us, 3),
+                "speedup": round(old_us / new_us, 2) if new_us else None,
+                "longest_len": len(longest),
+                "legacy_longest_us": round(_time_per_message(old, [longest], args.repeat * 20) * 1e6, 3),
+                "anchored_longest_us": round(_time_per_message(new, [longest], args.repeat * 20) * 1e6, 3),
+            }
+        )
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""对比 base64 与 multipart 两种上传方式：9 张图请求的线上字节数与峰值 RSS。
+
+每种方式在独立子进程里构造并序列化一次完整请求体，避免互相影响峰值内存。
+图片用随机字节模拟（WEBP 已压缩，熵接近随机数据）。
+
+用法（仓库根目录，需安装插件依赖）::
+
+    python -m benchmarks.bench_transport
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+
+IMAGE_COUNT = 9
+IMAGE_SIZE = 1500 * 1024
+
+
+def _measure(transport: str) -> dict:
+    import httpx
+
+    from ScoreEcho.utils.score_client import build_request_kwargs
+
+    images = [os.urandom(IMAGE_SIZE) for _ in range(IMAGE_COUNT)]
+    payload = {"command_str": "长离 4c", "user_data": {"uid": "100000001"}}
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    request = httpx.Request(
+        "POST", "http://127.0.0.1/score", **build_request_kwargs(payload, images, transport)
+    )
+    body = request.read()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "transport": transport,
+        "images": IMAGE_COUNT,
+        "raw_image_bytes": IMAGE_COUNT * IMAGE_SIZE,
+        "wire_bytes": len(body),
+        "peak_rss_kb": rss_after,
+        "peak_rss_delta_kb": rss_after - rss_before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transport", help="只测量一种方式（子进程内部使用）")
+    args = parser.parse_args()
+
+    if args.transport:
+        print(json.dumps(_measure(args.transport)))
+        return
+
+    results = []
+    for transport in ("base64", "multipart"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_transport", "--transport", transport],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    base = results[0]["wire_bytes"]
+    for result in results:
+        result["wire_vs_base64"] = f"{result['wire_bytes'] / base - 1:+.1%}"
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""基准测试共用的假 Bot / Event 与本地测试数据。
+
+只在基准进程内使用：把别名表、用户目录、评分地址等指向临时目录与本地桩服务，
+并预热 UID / 语言缓存，使基准不依赖数据库和外网。
+"""
+import functools
+import json
+import random
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class FakeBot:
+    """记录 ``bot.send`` 的调用，不真正发送。"""
+
+    def __init__(self):
+        self.sent: List[Tuple[float, Any]] = []
+
+    async def send(self, message: Any, at_sender: bool = False) -> None:
+        self.sent.append((time.monotonic(), message))
+
+    @property
+    def images(self) -> List[bytes]:
+        return [m for _, m in self.sent if isinstance(m, (bytes, bytearray))]
+
+
+def make_event(
+    text: str,
+    image_urls: List[str],
+    user_id: str = "bench-10001",
+    group_id: Optional[str] = "bench-group",
+    bot_id: str = "bench",
+    raw_text: Optional[str] = None,
+    regex_group: Tuple[Optional[str], ...] = (),
+) -> SimpleNamespace:
+    """按处理器实际读取的字段构造事件。"""
+    return SimpleNamespace(
+        bot_id=bot_id,
+        user_id=user_id,
+        group_id=group_id,
+        user_type="group" if group_id else "direct",
+        user_pm=6,
+        text=text,
+        raw_text=raw_text if raw_text is not None else text,
+        regex_group=regex_group,
+        regex_dict={},
+        content=[SimpleNamespace(type="image", data=url) for url in image_urls],
+        image=image_urls[0] if image_urls else None,
+        sender={},
+    )
+
+
+def synthetic_screenshot(width: int = 1280, height: int = 720, noisy: bool = False, seed: int = 0) -> bytes:
+    """生成一张 PNG 截图：``noisy`` 为高熵画面（触发 WEBP 降质循环），否则为扁平 UI 色块。"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    if noisy:
+        channels = [Image.effect_noise((width, height), 64 + rng.random() * 64) for _ in range(3)]
+        img = Image.merge("RGB", channels)
+    else:
+        img = Image.new("RGB", (width, height), (24, 26, 32))
+        draw = ImageDraw.Draw(img)
+        for _ in range(40):
+            x, y = rng.randrange(width), rng.randrange(height)
+            w, h = rng.randrange(40, 400), rng.randrange(10, 120)
+            color = tuple(rng.randrange(256) for _ in range(3))
+            draw.rectangle((x, y, x + w, y + h), fill=color)
+            draw.text((x + 4, y + 4), f"暴击伤害 {rng.random() * 40:.1f}%", fill=(255, 255, 255))
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def write_screenshots(directory: Path, count: int, noisy_every: int = 3) -> List[Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = directory / f"shot_{index}.png"
+        path.write_bytes(synthetic_screenshot(noisy=noisy_every > 0 and index % noisy_every == 0, seed=index))
+        paths.append(path)
+    return paths
+
+
+def synthetic_alias_table(roles: int = 90, aliases_per_role: int = 12, seed: int = 0) -> Dict[str, List[str]]:
+    """与真实别名表规模相当的合成表（角色名 -> 别名列表），别名 2~5 字、互不重复。"""
+    rng = random.Random(seed)
+
+    def word() -> str:
+        return "".join(chr(0x4E00 + rng.randrange(0x5000)) for _ in range(rng.randint(2, 5)))
+
+    seen = set()
+    table: Dict[str, List[str]] = {}
+    while len(table) < roles:
+        aliases = []
+        while len(aliases) < aliases_per_role:
+            alias = word()
+            if alias not in seen:
+                seen.add(alias)
+                aliases.append(alias)
+        table[aliases[0]] = aliases
+    return table
+
+
+def write_alias_table(path: Path, table: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[str]]:
+    table = table or synthetic_alias_table()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(table, ensure_ascii=False), encoding="utf-8")
+    return table
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args) -> None:  # noqa: A002
+        pass
+
+
+def serve_directory(directory: Path) -> Tuple[ThreadingHTTPServer, str]:
+    """在后台线程里提供静态文件下载，返回 ``(server, base_url)``。"""
+    handler = functools.partial(_QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def override_config(**values: Any) -> Dict[str, Any]:
+    """只在内存里修改插件配置（不写回 config.json），返回旧值以便恢复。"""
+    from ScoreEcho.scoreecho_config.config import seconfig
+
+    old = {}
+    for key, value in values.items():
+        config = seconfig.get_config(key)
+        old[key] = config.data
+        config.data = value
+    return old
+
+
+def isolate_plugin(workdir: Path, alias_path: Path) -> None:
+    """把别名表与用户目录指向临时目录。"""
+    from ScoreEcho import scoreecho_score
+
+    scoreecho_score._get_local_alias_path = lambda: alias_path
+    scoreecho_score._get_alias_path = lambda: alias_path
+    user_root = workdir / "user"
+    scoreecho_score.get_user_dir = lambda user_id, uid: user_root / str(user_id) / str(uid)
+
+
+def prime_user(user_id: str, bot_id: str, uid: str = "100000001", lang: str = "zh") -> None:
+    """预热 UID 绑定、语言与 xwuid 负缓存，处理器不再查库。"""
+    from ScoreEcho.utils import bind_cache, settings_cache, xwuid_bridge
+
+    xwuid_bridge._no_net_uid_cache.set((user_id, bot_id), True)
+    bind_cache._bind_cache.set((user_id, bot_id), [uid])
+    settings_cache._lang_cache.set(user_id, lang)
+    settings_cache._char_info_cache.set((user_id, uid), {"用户名": "bench"})
@@ -0,0 +1,263 @@
+"""按目标速率驱动真实评分/分析处理器的压测工具。
+
+请求按泊松过程到达（开环：不等上一个完成），每个请求构造一个假 Event，
+经 ``score_phantom_handler`` / ``analyze_phantom_handler`` 走完整流程：下载截图、
+别名替换、排队、调用评分地址、落盘、发送。评分地址默认是子进程里的
+``benchmarks.stub_server``，可配置延迟分布与错误率，不消耗线上额度。
+
+报告：实际到达速率与完成吞吐、端到端 p50/p95/p99、按回复归类的错误数、
+插件自身的分阶段直方图与计数器，以及进程峰值 RSS。
+
+用法（仓库根目录，需安装插件依赖）::
+
+    python -m benchmarks.loadgen --rate 5 --duration 60 --latency lognormal:800,0.6
+    python -m benchmarks.loadgen --rate 20 --error-rate 0.1 --set maxinflight=8 --out load.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import fakes
+from .stub_server import parse_latency, spawn
+
+# 开环压测时同时未完成的请求上限，超过后新到达的请求计为 skipped
+MAX_OUTSTANDING = 2000
+_RSS_INTERVAL = 0.5
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _current_rss_kb() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() // 1024
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.sent = 0
+        self.skipped = 0
+        self.rss_samples: List[int] = []
+
+    def record(self, elapsed: float, bot: fakes.FakeBot) -> None:
+        if bot.images:
+            self.latencies.append(elapsed)
+            self.outcomes["ok"] += 1
+            return
+        texts = [str(m).strip() for _, m in bot.sent if not isinstance(m, (bytes, bytearray))]
+        # 只取回复的第一行归类（错误码、降级、排队已满等）
+        self.outcomes[texts[-1].splitlines()[0][:40] if texts else "no reply"] += 1
+
+
+async def _sample_rss(stats: LoadStats, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        stats.rss_samples.append(_current_rss_kb())
+        try:
+            await asyncio.wait_for(stop.wait(), _RSS_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _one(handler, event, stats: LoadStats) -> None:
+    bot = fakes.FakeBot()
+    start = time.perf_counter()
+    try:
+        await handler(bot, event)
+    except Exception as e:
+        stats.outcomes[f"exception: {type(e).__name__}"] += 1
+        return
+    stats.record(time.perf_counter() - start, bot)
+
+
+async def run_load(args: argparse.Namespace, endpoint: str, workdir: Path) -> Dict[str, Any]:
+    from ScoreEcho.scoreecho_score import analyze_phantom_handler, score_phantom_handler
+    from ScoreEcho.utils import metrics
+
+    alias_path = args.alias or workdir / "char_alias.json"
+    if args.alias is None:
+        fakes.write_alias_table(alias_path)
+    with open(alias_path, "r", encoding="utf-8") as f:
+        roles = list(json.load(f))[:20]
+
+    images_dir = args.images_dir
+    if images_dir is None:
+        images_dir = workdir / "screenshots"
+        fakes.write_screenshots(images_dir, max(args.images, 3))
+    paths = sorted(p for p in images_dir.iterdir() if p.is_file())
+    files, base_url = fakes.serve_directory(images_dir)
+    urls = [f"{base_url}/{p.name}" for p in paths]
+
+    overrides: Dict[str, Any] = {
+        "endpoint": endpoint,
+        "queuenotify": False,
+        "dedupewindow": 0,
+        "profilerate": 0,
+        "profileslowms": 0,
+    }
+    for item in args.set or []:
+        key, _, value = item.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    fakes.override_config(**overrides)
+    fakes.isolate_plugin(workdir, alias_path)
+    users = [f"load-{i}" for i in range(args.users)]
+    for user_id in users:
+        fakes.prime_user(user_id, "bench")
+
+    rng = random.Random(args.seed)
+    stats = LoadStats()
+    tasks = set()
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(_sample_rss(stats, stop))
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    next_at = start
+    while True:
+        next_at += rng.expovariate(args.rate)
+        if next_at >= deadline:
+            break
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        if len(tasks) >= MAX_OUTSTANDING:
+            stats.skipped += 1
+            continue
+        role = rng.choice(roles)
+        image_urls = rng.sample(urls, min(args.images, len(urls)))
+        group_id = None if rng.random() < 0.2 else f"group-{rng.randrange(10)}"
+        if rng.random() < args.analysis_ratio:
+            handler = analyze_phantom_handler
+            event = fakes.make_event(f"{role} 4c", image_urls, user_id=rng.choice(users), bot_id="bench", group_id=group_id)
+        else:
+            handler = score_phantom_handler
+            event = fakes.make_event(
+                f"{role}4c", image_urls, user_id=rng.choice(users), bot_id="bench", group_id=group_id,
+                regex_group=(role, "4", None, None),
+            )
+        stats.sent += 1
+        task = asyncio.create_task(_one(handler, event, stats))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    arrivals_done = time.perf_counter()
+
+    if tasks:
+        _, pending = await asyncio.wait(set(tasks), timeout=args.drain)
+        for task in pending:
+            task.cancel()
+        if pending:
+            stats.outcomes["unfinished"] += len(pending)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+    files.shutdown()
+
+    ordered = sorted(stats.latencies)
+    snapshot = metrics.snapshot()
+    return {
+        "target_rate": args.rate,
+        "duration_s": args.duration,
+        "sent": stats.sent,
+        "skipped": stats.skipped,
+        "arrival_rate": round(stats.sent / (arrivals_done - start), 3),
+        "throughput": round(stats.outcomes["ok"] / elapsed, 3),
+        "elapsed_s": round(elapsed, 3),
+        "outcomes": dict(stats.outcomes.most_common()),
+        "latency_ms": {
+            "p50": round(_percentile(ordered, 0.50) * 1000, 1),
+            "p95": round(_percentile(ordered, 0.95) * 1000, 1),
+            "p99": round(_percentile(ordered, 0.99) * 1000, 1),
+            "max": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+        },
+        "memory_kb": {
+            "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "rss_start": stats.rss_samples[0] if stats.rss_samples else 0,
+            "rss_end": _current_rss_kb(),
+        },
+        "stages_ms": {
+            name: {"count": h["count"], **{k: round(h[k] * 1000, 1) for k in ("p50", "p95", "p99")}}
+            for name, h in snapshot["histograms"].items()
+        },
+        "counters": snapshot["counters"],
+    }
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=5.0, help="目标到达速率（请求/秒）")
+    parser.add_argument("--duration", type=float, default=30.0, help="发送请求的时长（秒）")
+    parser.add_argument("--drain", type=float, default=120.0, help="停止发送后等待未完成请求的最长时间（秒）")
+    parser.add_argument("--analysis-ratio", type=float, default=0.3, help="分析请求占比，其余为评分")
+    parser.add_argument("--users", type=int, default=50, help="模拟的用户数")
+    parser.add_argument("--images", type=int, default=1, help="每个请求附带的截图数")
+    parser.add_argument("--images-dir", type=Path, help="截图目录，默认生成合成截图")
+    parser.add_argument("--alias", type=Path, help="别名表 char_alias.json，默认生成合成表")
+    parser.add_argument("--endpoint", help="压测指定的评分地址，不启动桩服务")
+    parser.add_argument("--latency", default="lognormal:800,0.5", help="桩服务延迟分布，见 benchmarks.stub_server")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="桩服务随机错误比例")
+    parser.add_argument("--error-status", default="500,503", help="桩服务注入的错误码")
+    parser.add_argument("--result-size", type=int, default=600_000, help="桩服务结果图字节数")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="在内存中覆盖插件配置，可重复")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="报告 JSON 输出路径，默认打印到标准输出")
+    args = parser.parse_args(argv)
+    if args.rate <= 0 or args.duration <= 0:
+        parser.error("--rate 与 --duration 必须大于 0")
+    try:
+        parse_latency(args.latency)
+    except ValueError as e:
+        parser.error(str(e))
+
+    stub = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        stub, endpoint = spawn([
+            "--latency", args.latency,
+            "--error-rate", str(args.error_rate),
+            "--error-status", args.error_status,
+            "--result-size", str(args.result_size),
+            "--seed", str(args.seed),
+        ])
+    try:
+        with tempfile.TemporaryDirectory(prefix="scoreecho-load-") as tmp:
+            report = asyncio.run(run_load(args, endpoint, Path(tmp)))
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+    report["endpoint"] = "stub" if stub is not None else endpoint
+    report["stub"] = {"latency": args.latency, "error_rate": args.error_rate} if stub is not None else None
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+    print(
+        f"sent {report['sent']}  ok {report['outcomes'].get('ok', 0)}  "
+        f"throughput {report['throughput']}/s  p50/p95/p99 "
+        f"{report['latency_ms']['p50']}/{report['latency_ms']['p95']}/{report['latency_ms']['p99']} ms  "
+        f"peak RSS {report['memory_kb']['peak_rss'] // 1024} MB",
+        file=sys.stderr,
+    )
+    if not args.out:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""重放 ``capture`` 录制的评分请求。
+
+按录制时的时间间隔（``--speed`` 倍速，0 为不等待）把每次评分 API 调用重新发出，
+走插件真实的 ``post_score``：上传方式、压缩、哈希上传、超时与熔断都按当前配置
+（可用 ``--set`` 在内存中覆盖）。默认发往子进程里的 ``benchmarks.stub_server``，
+``--endpoint`` 可指向真实地址。
+
+重放只重发 API 调用，端到端耗时按「录制的 ``total`` − 录制的 API 耗时 + 重放的 API 耗时」估算，
+与录制的 ``total`` 分位数一起报告（只统计全部调用都重放成功的请求）。
+
+录制时开启了 ``captureimages`` 则发送原图；否则用同样大小的随机字节代替，
+这只适合桩服务，发往真实地址时会跳过缺图的调用。
+
+用法（仓库根目录，需安装插件依赖）::
+
+    python -m benchmarks.replay path/to/ScoreEcho/capture --speed 2
+    python -m benchmarks.replay path/to/capture/20250101-120000 --endpoint https://example/score --speed 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import fakes
+from .stub_server import parse_latency, spawn
+
+CAPTURE_FILE = "requests.jsonl"
+_QUANTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+
+
+def _capture_files(path: Path) -> List[Path]:
+    if path.is_file():
+        return [path]
+    return sorted(path.rglob(CAPTURE_FILE))
+
+
+def load_calls(path: Path, pipeline: Optional[str] = None) -> List[Tuple[float, Dict[str, Any], Dict[str, Any]]]:
+    """读取录制，返回按原始发出时间排序的 ``(时间戳, 请求记录, 调用)``。"""
+    calls = []
+    for capture_file in _capture_files(path):
+        with open(capture_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 进程中断时最后一行可能不完整
+                    continue
+                if pipeline and record.get("pipeline") != pipeline:
+                    continue
+                for call in record.get("calls", []):
+                    calls.append((record["ts"] + call["offset_ms"] / 1000, record, call))
+    calls.sort(key=lambda item: item[0])
+    return calls
+
+
+def index_blobs(path: Path) -> Dict[str, Path]:
+    root = path.parent if path.is_file() else path
+    return {blob.name: blob for blob in root.rglob("blobs/*") if blob.is_file() and not blob.suffix}
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def replay(
+    calls: List[Tuple[float, Dict[str, Any], Dict[str, Any]]],
+    blobs: Dict[str, Path],
+    endpoint: str,
+    speed: float,
+    synthesize: bool,
+) -> Dict[str, Any]:
+    from ScoreEcho.utils.capture import call_status
+    from ScoreEcho.utils.score_client import post_score
+
+    latencies: List[float] = []
+    recorded_ms: List[float] = []
+    transitions: Counter = Counter()
+    skipped = 0
+    # id(请求记录) -> [重放成功的调用数, 重放的 API 总耗时 ms]
+    replayed: Dict[int, List[float]] = {}
+
+    def load_images(call: Dict[str, Any]) -> Optional[List[bytes]]:
+        images = []
+        for image in call["images"]:
+            blob = blobs.get(image["sha256"])
+            if blob is not None:
+                images.append(blob.read_bytes())
+            elif synthesize:
+                images.append(os.urandom(image["bytes"]))
+            else:
+                return None
+        return images
+
+    async def one(record: Dict[str, Any], call: Dict[str, Any]) -> None:
+        nonlocal skipped
+        images = await asyncio.to_thread(load_images, call)
+        if images is None:
+            skipped += 1
+            return
+        start = time.perf_counter()
+        error = None
+        try:
+            await post_score(call["payload"], images, endpoint=endpoint)
+        except Exception as e:
+            error = e
+        status = call_status(error)
+        if status == "ok":
+            latency = time.perf_counter() - start
+            latencies.append(latency)
+            recorded_ms.append(call["ms"])
+            totals = replayed.setdefault(id(record), [0, 0.0])
+            totals[0] += 1
+            totals[1] += latency * 1000
+        transitions[f"{call['status']} -> {status}"] += 1
+
+    origin = calls[0][0] if calls else 0.0
+    started = time.perf_counter()
+    tasks = []
+    for ts, record, call in calls:
+        if speed > 0:
+            await asyncio.sleep(max(0.0, started + (ts - origin) / speed - time.perf_counter()))
+        tasks.append(asyncio.create_task(one(record, call)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    recorded = sorted(recorded_ms)
+    records = {id(record): record for _, record, _ in calls}
+    e2e_recorded: List[float] = []
+    e2e_estimated: List[float] = []
+    for key, (count, replayed_ms) in replayed.items():
+        record = records[key]
+        if count != len(record["calls"]):
+            continue
+        total = record.get("stages", {}).get("total", record["elapsed_ms"])
+        e2e_recorded.append(total)
+        e2e_estimated.append(total - sum(call["ms"] for call in record["calls"]) + replayed_ms)
+    e2e_recorded.sort()
+    e2e_estimated.sort()
+    return {
+        "calls": len(calls),
+        "skipped": skipped,
+        "elapsed_s": round(elapsed, 3),
+        "recorded_span_s": round(calls[-1][0] - origin, 3) if calls else 0.0,
+        "throughput": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "status": dict(transitions.most_common()),
+        "latency_ms": {
+            "p50": round(_percentile(ordered, 0.50) * 1000, 1),
+            "p95": round(_percentile(ordered, 0.95) * 1000, 1),
+            "p99": round(_percentile(ordered, 0.99) * 1000, 1),
+        },
+        "recorded_latency_ms": {
+            "p50": _percentile(recorded, 0.50),
+            "p95": _percentile(recorded, 0.95),
+            "p99": _percentile(recorded, 0.99),
+        },
+        "end_to_end_ms": {
+            "requests": len(e2e_recorded),
+            "recorded": {q: round(_percentile(e2e_recorded, v), 1) for q, v in _QUANTILES},
+            "estimated": {q: round(_percentile(e2e_estimated, v), 1) for q, v in _QUANTILES},
+        },
+    }
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", type=Path, help="capture 目录、其中某一段目录或某个 requests.jsonl")
+    parser.add_argument("--speed", type=float, default=1.0, help="重放倍速，1 为原速，0 为不等待全部立即发出")
+    parser.add_argument("--pipeline", choices=("score", "analysis", "batch"), help="只重放某一类请求")
+    parser.add_argument("--limit", type=int, help="最多重放的调用数")
+    parser.add_argument("--endpoint", help="重放到指定地址，不启动桩服务")
+    parser.add_argument("--latency", default="lognormal:800,0.5", help="桩服务延迟分布，见 benchmarks.stub_server")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="桩服务随机错误比例")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="在内存中覆盖插件配置，可重复")
+    parser.add_argument("--out", type=Path, help="报告 JSON 输出路径，默认打印到标准输出")
+    args = parser.parse_args(argv)
+    if args.speed < 0:
+        parser.error("--speed 不能为负数")
+    try:
+        parse_latency(args.latency)
+    except ValueError as e:
+        parser.error(str(e))
+
+    calls = load_calls(args.capture, args.pipeline)
+    if args.limit:
+        calls = calls[: args.limit]
+    if not calls:
+        raise SystemExit(f"{args.capture} 中没有可重放的评分调用")
+    blobs = index_blobs(args.capture)
+
+    overrides: Dict[str, Any] = {}
+    for item in args.set or []:
+        key, _, value = item.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    if overrides:
+        fakes.override_config(**overrides)
+
+    stub = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        stub, endpoint = spawn(["--latency", args.latency, "--error-rate", str(args.error_rate)])
+    try:
+        report = asyncio.run(replay(calls, blobs, endpoint, args.speed, synthesize=stub is not None))
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+    report["endpoint"] = "stub" if stub is not None else endpoint
+    report["speed"] = args.speed
+    report["blobs"] = len(blobs)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+    print(
+        f"replayed {report['calls'] - report['skipped']}/{report['calls']} calls in {report['elapsed_s']}s  "
+        f"p50/p95/p99 {report['latency_ms']['p50']}/{report['latency_ms']['p95']}/{report['latency_ms']['p99']} ms",
+        file=sys.stderr,
+    )
+    if not args.out:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
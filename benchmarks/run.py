@@ -0,0 +1,432 @@
+"""插件热点路径的基准测试，结果写成 JSON，便于对比不同版本。
+
+覆盖：
+- ``encode``：``_encode_images`` 下载并压缩一组截图（本机静态文件服务），以及内联图片与已是 WEBP 的图片；
+- ``alias``：``_replace_alias`` 与 ``alias_to_char_name_optional`` 在完整别名表上查找；
+- ``charlist``：``draw_charlist_image`` 绘制 10 / 50 / 100 个角色；
+- ``persist``：``_save_panel`` 与批量分析的 ``_persist_batch`` 落盘；
+- ``e2e``：评分与分析处理器对本地桩服务跑完整流程（假 Bot / Event）；
+- ``overlap``：评分处理器在基础信息查询有延迟时，并发准备与逐个顺序执行的端到端耗时对比；
+- ``import``：新进程里 ``python -X importtime`` 导入插件的耗时（宿主模块先导入，只算插件自身），
+  并列出自身耗时最多的模块与被提前导入的重依赖。
+
+全程只访问本机：截图、别名表默认由 ``benchmarks.fakes`` 生成，评分地址指向
+``benchmarks.stub_server``，用户目录指向临时目录，配置只在内存里修改。
+
+用法（仓库根目录，需安装插件依赖）::
+
+    python -m benchmarks.run --out before.json
+    python -m benchmarks.run --out after.json --compare before.json
+    python -m benchmarks.run --suite alias --suite charlist --alias path/to/char_alias.json
+    python -m benchmarks.run --suite import
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from . import fakes
+
+SUITES = ("encode", "alias", "charlist", "persist", "e2e", "overlap", "import")
+CHARLIST_SIZES = (10, 50, 100)
+# overlap 中模拟的 launcher 基础信息查询耗时（缓存未命中）
+BASEINFO_LATENCY = 0.3
+# gsuid_core 加载插件前已经导入的宿主模块，导入耗时不算在插件头上
+HOST_MODULES = (
+    "fastapi",
+    "sqlmodel",
+    "fastapi_amis_admin.amis.components",
+    "gsuid_core.bot",
+    "gsuid_core.logger",
+    "gsuid_core.models",
+    "gsuid_core.server",
+    "gsuid_core.sv",
+    "gsuid_core.web_app",
+    "gsuid_core.webconsole.mount_app",
+)
+# 处理器首次需要时才应导入的重依赖
+HEAVY_MODULES = ("PIL", "httpx", "msgspec", "zstandard")
+# 对比时超过该比例的变慢标为回归
+REGRESSION_THRESHOLD = 0.10
+
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "repeat": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+    }
+
+
+def _bench(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _stats(samples)
+
+
+async def _abench(fn: Callable[[], Awaitable[Any]], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return _stats(samples)
+
+
+async def bench_encode(workdir: Path, images_dir: Optional[Path], repeat: int) -> Dict[str, Any]:
+    from ScoreEcho.scoreecho_score import _encode_images
+
+    if images_dir is None:
+        images_dir = workdir / "screenshots"
+        fakes.write_screenshots(images_dir, 3)
+    paths = sorted(p for p in images_dir.iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg", ".webp"))
+    if not paths:
+        raise SystemExit(f"{images_dir} 里没有截图")
+    server, base_url = fakes.serve_directory(images_dir)
+    try:
+        urls = [f"{base_url}/{p.name}" for p in paths]
+        encoded = await _encode_images(urls)
+        result = await _abench(lambda: _encode_images(urls), repeat, warmup=0)
+    finally:
+        server.shutdown()
+    result.update(
+        images=len(paths),
+        input_bytes=sum(p.stat().st_size for p in paths),
+        output_bytes=sum(len(b) for b in encoded),
+    )
+    # 适配器内联的图片：不下载；已压缩过的 WEBP 原样通过
+    inline = [p.read_bytes() for p in paths]
+    return {
+        "encode_images": result,
+        "encode_images_inline": await _abench(lambda: _encode_images(inline), repeat, warmup=0),
+        "encode_images_webp_passthrough": await _abench(lambda: _encode_images(encoded), repeat, warmup=0),
+    }
+
+
+def _sample_commands(table: Dict[str, List[str]], count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    names = list(table)
+    commands = []
+    for _ in range(count):
+        alias = rng.choice(table[rng.choice(names)])
+        commands.append(f"{alias} {rng.choice('134')}c 暴击 攻击")
+    return commands
+
+
+def bench_alias(alias_path: Path, repeat: int) -> Dict[str, Any]:
+    from ScoreEcho.scoreecho_score import _replace_alias
+    from ScoreEcho.utils import char_utils
+
+    with open(alias_path, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    commands = _sample_commands(table, 50)
+    char_utils.ensure_data_loaded(alias_path, force=True)
+    known = [command.split()[0] for command in commands]
+
+    def replace_all() -> None:
+        for command in commands:
+            _replace_alias(command, alias_path)
+
+    def lookup_known() -> None:
+        for name in known:
+            char_utils.alias_to_char_name_optional(alias_path, name)
+
+    def lookup_missing() -> None:
+        # 找不到时会完整扫两遍表，是最慢的路径
+        for _ in known:
+            char_utils.alias_to_char_name_optional(alias_path, "不存在的角色名")
+
+    per_batch = {"batch": len(commands)}
+    return {
+        "replace_alias": {**_bench(replace_all, repeat), **per_batch},
+        "alias_lookup_known": {**_bench(lookup_known, repeat), **per_batch},
+        "alias_lookup_missing": {**_bench(lookup_missing, repeat), **per_batch},
+        "alias_table": {"roles": len(table), "aliases": sum(len(v) for v in table.values())},
+    }
+
+
+def _charlist_data(count: int, seed: int = 0) -> Dict[str, List[float]]:
+    from ScoreEcho.utils.charlist_assets import load_name_id_map
+
+    rng = random.Random(seed)
+    names = list(load_name_id_map()) or [f"角色{i}" for i in range(count)]
+    data = {}
+    for index in range(count):
+        name = names[index % len(names)]
+        if name in data:
+            name = f"{name}{index}"
+        data[name] = [round(rng.uniform(20, 50), 2) for _ in range(5)]
+    return data
+
+
+def bench_charlist(repeat: int) -> Dict[str, Any]:
+    from ScoreEcho.utils.charlist_draw import draw_charlist_image
+
+    results = {}
+    for size in CHARLIST_SIZES:
+        data = _charlist_data(size)
+        results[f"charlist_{size}"] = _bench(lambda: draw_charlist_image(data, uid="100000001", name="bench"), repeat)
+    return results
+
+
+def bench_persist(workdir: Path, repeat: int) -> Dict[str, Any]:
+    from ScoreEcho.scoreecho_score import _BatchOutcome, _persist_batch, _save_panel
+
+    image = os.urandom(600_000)
+    user_dir = workdir / "persist" / "100000001"
+    # result.json 里已有 50 个角色，接近老用户的规模
+    for index in range(50):
+        _save_panel(user_dir, f"角色{index}", image, f"角色{index}", [30.0] * 5)
+
+    counter = iter(range(10**9))
+
+    def save_one() -> None:
+        index = next(counter) % 50
+        _save_panel(user_dir, f"角色{index}", image, f"角色{index}", [31.0] * 5)
+
+    outcomes = [
+        _BatchOutcome(f"角色{i}", f"角色{i}", f"角色{i}", image, [32.0] * 5, "") for i in range(10)
+    ]
+    return {
+        "save_panel": _bench(save_one, repeat),
+        "persist_batch_10": _bench(lambda: _persist_batch(user_dir, outcomes), repeat),
+    }
+
+
+async def bench_e2e(workdir: Path, alias_path: Path, images_dir: Optional[Path], repeat: int) -> Dict[str, Any]:
+    from ScoreEcho.scoreecho_score import analyze_phantom_handler, score_phantom_handler
+
+    from .stub_server import start_in_thread
+
+    if images_dir is None:
+        images_dir = workdir / "screenshots"
+        if not images_dir.exists():
+            fakes.write_screenshots(images_dir, 3)
+    paths = sorted(p for p in images_dir.iterdir() if p.is_file())
+    with open(alias_path, "r", encoding="utf-8") as f:
+        role = next(iter(json.load(f)))
+
+    stub, endpoint = start_in_thread()
+    files, base_url = fakes.serve_directory(images_dir)
+    fakes.override_config(endpoint=endpoint, queuenotify=False, dedupewindow=0, profilerate=0, profileslowms=0)
+    fakes.isolate_plugin(workdir, alias_path)
+    fakes.prime_user("bench-10001", "bench")
+    urls = [f"{base_url}/{p.name}" for p in paths]
+
+    async def run(handler, text: str, regex_group=()) -> None:
+        bot = fakes.FakeBot()
+        await handler(bot, fakes.make_event(text, urls, regex_group=regex_group))
+        if not bot.images:
+            raise RuntimeError(f"处理器没有发出结果图: {bot.sent}")
+
+    try:
+        return {
+            "e2e_score": await _abench(lambda: run(score_phantom_handler, f"{role}4c", (role, "4", None, None)), repeat),
+            "e2e_analysis": await _abench(lambda: run(analyze_phantom_handler, f"{role} 4c"), repeat),
+        }
+    finally:
+        files.shutdown()
+        stub.shutdown()
+
+
+def _importtime(module: str) -> List[Tuple[int, int, int, str]]:
+    """新进程里导入 ``module``，解析 ``-X importtime`` 输出中属于它的部分：``(层级, 自身 µs, 累计 µs, 模块名)``。"""
+    code = "; ".join(f"import {name}" for name in (*HOST_MODULES, module))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            # 表头
+            continue
+        level = (len(name) - len(name.lstrip())) // 2
+        rows.append((level, int(self_us), int(cumulative_us), name.strip()))
+    # 子模块先于父模块输出：从插件那一行往回数到上一个顶层导入为止
+    end = max(i for i, row in enumerate(rows) if row[0] == 0 and row[3] == module)
+    start = end
+    while start > 0 and rows[start - 1][0] > 0:
+        start -= 1
+    return rows[start : end + 1]
+
+
+def bench_import(repeat: int) -> Dict[str, Any]:
+    samples = []
+    rows: List[Tuple[int, int, int, str]] = []
+    for _ in range(repeat):
+        rows = _importtime("ScoreEcho")
+        samples.append(rows[-1][2] / 1e6)
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:10]
+    loaded = {row[3].split(".")[0] for row in rows}
+    return {
+        "import_plugin": {
+            **_stats(samples),
+            "modules": len(rows),
+            "slowest_self_ms": {name: round(self_us / 1000, 3) for _, self_us, _, name in slowest},
+            "heavy_loaded": sorted(loaded.intersection(HEAVY_MODULES)),
+        }
+    }
+
+
+async def _sequential(*aws: Awaitable[Any]) -> List[Any]:
+    """``gather_or_cancel`` 的顺序版本，即并发准备之前的执行方式。"""
+    return [await aw for aw in aws]
+
+
+async def bench_overlap(workdir: Path, alias_path: Path, images_dir: Optional[Path], repeat: int) -> Dict[str, Any]:
+    """基础信息查询固定延迟 ``BASEINFO_LATENCY`` 秒，对比准备阶段并发与顺序执行的评分耗时。"""
+    from ScoreEcho import scoreecho_score
+
+    from .stub_server import start_in_thread
+
+    if images_dir is None:
+        images_dir = workdir / "screenshots"
+        if not images_dir.exists():
+            fakes.write_screenshots(images_dir, 3)
+    paths = sorted(p for p in images_dir.iterdir() if p.is_file())
+    with open(alias_path, "r", encoding="utf-8") as f:
+        role = next(iter(json.load(f)))
+
+    stub, endpoint = start_in_thread()
+    files, base_url = fakes.serve_directory(images_dir)
+    fakes.override_config(endpoint=endpoint, queuenotify=False, dedupewindow=0, profilerate=0, profileslowms=0)
+    fakes.isolate_plugin(workdir, alias_path)
+    fakes.prime_user("bench-10001", "bench")
+    urls = [f"{base_url}/{p.name}" for p in paths]
+
+    async def slow_baseinfo(*args: Any) -> None:
+        await asyncio.sleep(BASEINFO_LATENCY)
+        return None
+
+    async def run() -> None:
+        bot = fakes.FakeBot()
+        event = fakes.make_event(f"{role}4c", urls, regex_group=(role, "4", None, None))
+        await scoreecho_score.score_phantom_handler(bot, event)
+        if not bot.images:
+            raise RuntimeError(f"处理器没有发出结果图: {bot.sent}")
+
+    original = (scoreecho_score.fetch_baseinfo, scoreecho_score.gather_or_cancel)
+    scoreecho_score.fetch_baseinfo = slow_baseinfo
+    try:
+        concurrent = await _abench(run, repeat)
+        scoreecho_score.gather_or_cancel = _sequential
+        sequential = await _abench(run, repeat)
+    finally:
+        scoreecho_score.fetch_baseinfo, scoreecho_score.gather_or_cancel = original
+        files.shutdown()
+        stub.shutdown()
+    extra = {"baseinfo_latency_ms": BASEINFO_LATENCY * 1000}
+    return {
+        "overlap_score_sequential": {**sequential, **extra},
+        "overlap_score_concurrent": {**concurrent, **extra},
+    }
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_suites(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="scoreecho-bench-") as tmp:
+        workdir = Path(tmp)
+        alias_path = args.alias or workdir / "char_alias.json"
+        if args.alias is None:
+            fakes.write_alias_table(alias_path)
+        for suite in args.suite or SUITES:
+            start = time.perf_counter()
+            if suite == "encode":
+                results.update(await bench_encode(workdir, args.images, args.repeat))
+            elif suite == "alias":
+                results.update(bench_alias(alias_path, args.repeat))
+            elif suite == "charlist":
+                results.update(bench_charlist(args.repeat))
+            elif suite == "persist":
+                results.update(bench_persist(workdir, args.repeat))
+            elif suite == "e2e":
+                results.update(await bench_e2e(workdir, alias_path, args.images, args.repeat))
+            elif suite == "overlap":
+                results.update(await bench_overlap(workdir, alias_path, args.images, args.repeat))
+            elif suite == "import":
+                results.update(bench_import(args.repeat))
+            print(f"{suite}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """按 median 对比两份结果，返回可读的对比行。"""
+    lines = []
+    for name, result in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if "median_ms" not in result or not old or "median_ms" not in old:
+            continue
+        change = (result["median_ms"] - old["median_ms"]) / old["median_ms"] if old["median_ms"] else 0.0
+        flag = "  <- 回归" if change > REGRESSION_THRESHOLD else ""
+        lines.append(f"{name:24} {old['median_ms']:>10.2f} -> {result['median_ms']:>10.2f} ms ({change:+.1%}){flag}")
+    return lines
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", action="append", choices=SUITES, help="只跑指定项，可重复；默认全部")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--images", type=Path, help="截图目录，默认生成合成截图")
+    parser.add_argument("--alias", type=Path, help="别名表 char_alias.json，默认生成同规模的合成表")
+    parser.add_argument("--out", type=Path, help="结果 JSON 输出路径，默认打印到标准输出")
+    parser.add_argument("--compare", type=Path, help="与之前的结果 JSON 对比")
+    args = parser.parse_args(argv)
+
+    report = {
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": args.repeat,
+        "results": asyncio.run(run_suites(args)),
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"对比 {baseline.get('git_rev')} -> {report['git_rev']}（median）:", file=sys.stderr)
+        for line in compare(report, baseline):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""本地评分 API 桩服务，供基准测试使用。
+
+接受与线上相同的 ``POST /score`` 请求（JSON + ``images_base64`` 或 multipart），
+返回固定大小的随机结果图（base64）与伪造的 ``score_results``。
+支持 gzip / zstd（需安装 zstandard）压缩的请求体，``--encodings`` 之外的编码返回 415。
+
+同时实现两阶段哈希上传：请求带 ``image_digests`` 时，缺图则返回 ``missing_digests``，
+补传的 ``images_by_digest`` 会校验 sha256 后存入内存（LRU）；``--no-hash`` 模拟不支持
+该协议的旧服务端（返回 422）。
+
+评分响应前按 ``--latency`` 指定的分布等待，并按 ``--error-rate`` 随机返回错误码，
+用于压测超时、对冲、熔断与排队：
+
+- ``fixed:800``：固定 800ms；
+- ``uniform:300-1500``：300~1500ms 均匀分布；
+- ``lognormal:800,0.6``：中位数 800ms、sigma 0.6 的对数正态分布（长尾）。
+
+用法::
+
+    python -m benchmarks.stub_server --port 18765 --result-size 600000
+    python -m benchmarks.stub_server --latency lognormal:800,0.6 --error-rate 0.05 --error-status 500,503
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+IMAGE_STORE_SIZE = 4096
+
+LatencyFn = Callable[[random.Random], float]
+
+
+def parse_latency(spec: str) -> LatencyFn:
+    """把 ``fixed:MS`` / ``uniform:LO-HI`` / ``lognormal:MEDIAN,SIGMA`` 解析为采样函数（返回秒）。"""
+    kind, _, args = spec.partition(":")
+    try:
+        if kind == "fixed":
+            value = float(args or 0) / 1000
+            return lambda rng: value
+        if kind == "uniform":
+            low, high = (float(x) / 1000 for x in args.split("-", 1))
+            return lambda rng: rng.uniform(low, high)
+        if kind == "lognormal":
+            median, sigma = (float(x) for x in args.split(",", 1))
+            mu = math.log(median / 1000)
+            return lambda rng: rng.lognormvariate(mu, sigma)
+    except ValueError:
+        pass
+    raise ValueError(f"无法解析延迟分布: {spec!r}（可用 fixed:MS / uniform:LO-HI / lognormal:MEDIAN,SIGMA）")
+
+
+def _parse_request(content_type: str, body: bytes) -> Tuple[dict, List[bytes], Dict[str, bytes]]:
+    """返回 ``(payload, 按顺序上传的图片, 按摘要补传的图片)``。"""
+    if content_type.startswith("multipart/form-data"):
+        boundary = content_type.split("boundary=", 1)[1].strip('"').encode()
+        payload: dict = {}
+        images: List[bytes] = []
+        by_digest: Dict[str, bytes] = {}
+        for part in body.split(b"--" + boundary):
+            if b"\r\n\r\n" not in part:
+                continue
+            head, content = part.split(b"\r\n\r\n", 1)
+            content = content[:-2] if content.endswith(b"\r\n") else content
+            if b'name="payload"' in head:
+                payload = json.loads(content)
+            elif b'name="images"' in head:
+                images.append(content)
+            elif b'name="images_by_digest"' in head:
+                filename = head.split(b'filename="', 1)[1].split(b'"', 1)[0].decode()
+                by_digest[filename.rsplit(".", 1)[0]] = content
+        return payload, images, by_digest
+    payload = json.loads(body or b"{}")
+    images = [base64.b64decode(image) for image in payload.pop("images_base64", None) or []]
+    by_digest = {
+        digest: base64.b64decode(image)
+        for digest, image in (payload.pop("images_by_digest", None) or {}).items()
+    }
+    return payload, images, by_digest
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    result_image_b64 = ""
+    accepted_encodings: FrozenSet[str] = frozenset({"gzip", "zstd"})
+    hash_upload = True
+    image_store: "OrderedDict[str, int]" = OrderedDict()
+    store_lock = threading.Lock()
+    latency: LatencyFn = staticmethod(parse_latency("fixed:0"))
+    error_rate = 0.0
+    error_statuses: Tuple[int, ...] = (500,)
+    rng = random.Random()
+
+    def log_message(self, format, *args) -> None:  # noqa: A002
+        pass
+
+    def _send_json(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _store(self, by_digest: Dict[str, bytes]) -> Optional[str]:
+        """保存补传的图片，返回第一个摘要不符的 key。"""
+        with self.store_lock:
+            for digest, image in by_digest.items():
+                if hashlib.sha256(image).hexdigest() != digest:
+                    return digest
+                self.image_store[digest] = len(image)
+                self.image_store.move_to_end(digest)
+            while len(self.image_store) > IMAGE_STORE_SIZE:
+                self.image_store.popitem(last=False)
+        return None
+
+    def _missing(self, digests: List[str]) -> List[str]:
+        with self.store_lock:
+            return [digest for digest in digests if digest not in self.image_store]
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path.rstrip("/") != "/score":
+            self._send_json(404, {"message": "not found"})
+            return
+        encoding = self.headers.get("Content-Encoding", "").strip().lower()
+        if encoding:
+            if encoding not in self.accepted_encodings or (encoding == "zstd" and zstandard is None):
+                self._send_json(415, {"detail": f"unsupported content-encoding: {encoding}"})
+                return
+            if encoding == "gzip":
+                body = gzip.decompress(body)
+            else:
+                body = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+
+        payload, images, by_digest = _parse_request(self.headers.get("Content-Type", ""), body)
+        digests = payload.get("image_digests")
+        if digests is not None:
+            if not self.hash_upload:
+                self._send_json(422, {"detail": "images_base64 is required"})
+                return
+            bad = self._store(by_digest)
+            if bad:
+                self._send_json(400, {"detail": f"digest mismatch: {bad}"})
+                return
+            missing = self._missing(digests)
+            if missing:
+                self._send_json(200, {"missing_digests": missing})
+                return
+            image_count = len(digests)
+        else:
+            image_count = len(images)
+
+        time.sleep(self.latency(self.rng))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            status = self.rng.choice(self.error_statuses)
+            self._send_json(status, {"detail": f"stub: injected error {status}"})
+            return
+
+        command = payload.get("command_str", "")
+        role = command.split()[0] if command else "长离"
+        self._send_json(
+            200,
+            {
+                "message": f"stub: {image_count} images",
+                "result_image_base64": self.result_image_b64,
+                "score_results": [round(self.rng.uniform(20, 50), 2) for _ in range(5)],
+                "matched_character": role,
+            },
+        )
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # 标准库默认 listen 队列只有 5，几十个并发连接时会被直接重置
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    result_size: int = 600_000,
+    encodings: Tuple[str, ...] = ("gzip", "zstd"),
+    hash_upload: bool = True,
+    latency: str = "fixed:0",
+    error_rate: float = 0.0,
+    error_statuses: Tuple[int, ...] = (500,),
+    seed: Optional[int] = None,
+) -> ThreadingHTTPServer:
+    handler = type("Handler", (StubHandler,), {})
+    handler.accepted_encodings = frozenset(encodings)
+    handler.hash_upload = hash_upload
+    handler.image_store = OrderedDict()
+    handler.store_lock = threading.Lock()
+    handler.result_image_b64 = base64.b64encode(os.urandom(result_size)).decode("ascii")
+    handler.latency = staticmethod(parse_latency(latency))
+    handler.error_rate = error_rate
+    handler.error_statuses = tuple(error_statuses) or (500,)
+    handler.rng = random.Random(seed)
+    return _StubHTTPServer((host, port), handler)
+
+
+def start_in_thread(**kwargs) -> Tuple[ThreadingHTTPServer, str]:
+    """后台线程启动，返回 ``(server, endpoint)``；参数同 ``make_server``。"""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/score"
+
+
+def spawn(args: List[str]) -> Tuple[subprocess.Popen, str]:
+    """在子进程中启动（不占被测进程的 GIL 与内存），返回 ``(进程, endpoint)``；``args`` 为命令行参数。"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_server", "--port", "0", *args],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    endpoint = process.stdout.readline().strip()  # type: ignore[union-attr]
+    if not endpoint:
+        process.wait()
+        raise RuntimeError(f"桩服务启动失败，退出码 {process.returncode}")
+    return process, endpoint
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18765)
+    parser.add_argument("--result-size", type=int, default=600_000, help="结果图字节数")
+    parser.add_argument("--encodings", default="gzip,zstd", help="接受的请求体编码，逗号分隔，留空为全部拒绝")
+    parser.add_argument("--no-hash", action="store_true", help="不支持两阶段哈希上传")
+    parser.add_argument("--latency", default="fixed:0", help="评分延迟分布：fixed:MS / uniform:LO-HI / lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回错误的比例（0~1）")
+    parser.add_argument("--error-status", default="500", help="注入的错误码，逗号分隔，随机选取")
+    parser.add_argument("--seed", type=int, help="随机种子，便于复现")
+    args = parser.parse_args(argv)
+    encodings = tuple(e.strip() for e in args.encodings.split(",") if e.strip())
+    try:
+        parse_latency(args.latency)
+    except ValueError as e:
+        parser.error(str(e))
+    server = make_server(
+        args.host,
+        args.port,
+        args.result_size,
+        encodings,
+        not args.no_hash,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(s) for s in args.error_status.split(",") if s.strip()),
+        seed=args.seed,
+    )
+    print(f"http://{args.host}:{server.server_address[1]}/score", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""单元测试公共夹具。
+
+插件模块依赖 gsuid_core，各测试文件用 ``pytest.importorskip("gsuid_core")`` 在未安装时跳过。
+"""
+from typing import Any, Dict
+
+import pytest
+
+
+@pytest.fixture
+def config():
+    """在内存里临时修改插件配置，测试结束后恢复。用法：``config(maxinflight=1)``。"""
+    from ScoreEcho.scoreecho_config.config import seconfig
+
+    saved: Dict[str, Any] = {}
+
+    def override(**values: Any) -> None:
+        for key, value in values.items():
+            item = seconfig.get_config(key)
+            saved.setdefault(key, item.data)
+            item.data = value
+
+    yield override
+    for key, value in saved.items():
+        seconfig.get_config(key).data = value
@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip("gsuid_core")
+
+from ScoreEcho.utils import dedupe  # noqa: E402
+from ScoreEcho.utils.dedupe import (  # noqa: E402
+    DEDUPE_DONE,
+    DEDUPE_NEW,
+    DEDUPE_RUNNING,
+    check_job,
+    finish_job,
+    make_job_key,
+    normalize_command,
+    start_job,
+)
+
+
+@pytest.fixture(autouse=True)
+def _clean():
+    dedupe._running.clear()
+    dedupe._completed.clear()
+    yield
+    dedupe._running.clear()
+    dedupe._completed.clear()
+
+
+def test_normalize_command():
+    assert normalize_command("  ww评分  Carlotta\n") == "ww评分 carlotta"
+
+
+def test_job_key_ignores_whitespace_and_case():
+    assert make_job_key("1", "score", "ww评分 今汐", ["u"]) == make_job_key("1", "score", " WW评分   今汐 ", ["u"])
+
+
+def test_job_key_distinguishes_user_kind_and_images():
+    key = make_job_key("1", "score", "ww评分", ["http://a"])
+    assert key != make_job_key("2", "score", "ww评分", ["http://a"])
+    assert key != make_job_key("1", "analysis", "ww评分", ["http://a"])
+    assert key != make_job_key("1", "score", "ww评分", ["http://b"])
+    assert make_job_key("1", "score", "ww评分", [b"img"]) == make_job_key("1", "score", "ww评分", [b"img"])
+    assert make_job_key("1", "score", "ww评分", [b"img"]) != make_job_key("1", "score", "ww评分", [b"other"])
+
+
+def test_running_then_done(config):
+    config(dedupewindow=60)
+    key = make_job_key("1", "score", "ww评分", [b"img"])
+    assert check_job(key) == (DEDUPE_NEW, None)
+    start_job(key)
+    assert check_job(key) == (DEDUPE_RUNNING, None)
+    finish_job(key, b"result")
+    assert check_job(key) == (DEDUPE_DONE, b"result")
+
+
+def test_failed_job_is_not_reused(config):
+    config(dedupewindow=60)
+    key = make_job_key("1", "score", "ww评分", [b"img"])
+    start_job(key)
+    finish_job(key, None)
+    assert check_job(key) == (DEDUPE_NEW, None)
+
+
+def test_zero_window_disables_dedupe(config):
+    config(dedupewindow=0)
+    key = make_job_key("1", "score", "ww评分", [b"img"])
+    start_job(key)
+    finish_job(key, b"result")
+    assert check_job(key) == (DEDUPE_NEW, None)
+    assert key not in dedupe._running
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("gsuid_core")
+
+from ScoreEcho.utils.job_queue import JOB_ANALYSIS, JOB_SCORE, QueueFullError, ScoreScheduler  # noqa: E402
+
+
+@pytest.fixture
+def scheduler(config):
+    config(maxinflight=1, queuelimit=50)
+    return ScoreScheduler()
+
+
+def _grant_order(scheduler: ScoreScheduler, tickets) -> list:
+    """依次释放已放行的任务，返回放行顺序。"""
+    order = []
+    pending = list(tickets)
+    while pending:
+        granted = [t for t in pending if t.granted]
+        assert len(granted) == 1
+        ticket = granted[0]
+        order.append(ticket)
+        pending.remove(ticket)
+        scheduler._release(ticket)
+    return order
+
+
+def test_position_counts_running_and_waiting_jobs(scheduler):
+    tickets = [scheduler.enqueue(str(i), "g", JOB_SCORE) for i in range(3)]
+    assert [t.granted for t in tickets] == [True, False, False]
+    assert [t.position for t in tickets] == [0, 1, 2]
+    assert scheduler.inflight == 1
+    assert scheduler.queue_depth == 2
+
+
+def test_busy_group_does_not_starve_other_groups(scheduler):
+    first = scheduler.enqueue("a1", "busy", JOB_SCORE)
+    flood = [scheduler.enqueue("a1", "busy", JOB_SCORE) for _ in range(4)]
+    other = scheduler.enqueue("b1", "quiet", JOB_SCORE)
+    order = _grant_order(scheduler, [first, *flood, other])
+    # 刷屏群已经用掉一份额，新来的群下一个就被放行
+    assert order[1] is other
+
+
+def test_users_in_a_group_take_turns(scheduler):
+    first = scheduler.enqueue("a", "g", JOB_SCORE)
+    a_jobs = [scheduler.enqueue("a", "g", JOB_SCORE) for _ in range(2)]
+    b_jobs = [scheduler.enqueue("b", "g", JOB_SCORE) for _ in range(2)]
+    order = _grant_order(scheduler, [first, *a_jobs, *b_jobs])
+    assert [t.user for t in order] == ["a", "b", "a", "b", "a"]
+
+
+def test_analysis_costs_more_than_score(scheduler):
+    first = scheduler.enqueue("x", "g0", JOB_SCORE)
+    analysis = scheduler.enqueue("a", "g1", JOB_ANALYSIS)
+    scores = [scheduler.enqueue("b", "g2", JOB_SCORE) for _ in range(2)]
+    order = _grant_order(scheduler, [first, analysis, *scores])
+    # 分析按 2 份计：放行一次分析后，评分群可以连续放行两次
+    assert order[1:] == [analysis, *scores]
+
+
+def test_own_scores_run_before_own_analysis(scheduler):
+    first = scheduler.enqueue("x", "g0", JOB_SCORE)
+    analysis = scheduler.enqueue("a", "g", JOB_ANALYSIS)
+    score = scheduler.enqueue("a", "g", JOB_SCORE)
+    order = _grant_order(scheduler, [first, analysis, score])
+    assert order[1:] == [score, analysis]
+
+
+def test_queue_limit_rejects_new_jobs(config):
+    config(maxinflight=1, queuelimit=1)
+    scheduler = ScoreScheduler()
+    scheduler.enqueue("a", "g", JOB_SCORE)
+    scheduler.enqueue("b", "g", JOB_SCORE)
+    with pytest.raises(QueueFullError):
+        scheduler.enqueue("c", "g", JOB_SCORE)
+
+
+def test_cancelled_waiter_leaves_the_queue(scheduler):
+    async def run():
+        running = scheduler.enqueue("a", "g", JOB_SCORE)
+        waiting = scheduler.enqueue("b", "g", JOB_SCORE)
+        task = asyncio.ensure_future(waiting.__aenter__())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert scheduler.queue_depth == 0
+        await running.__aexit__(None, None, None)
+        assert scheduler.inflight == 0
+
+    asyncio.run(run())
@@ -0,0 +1,70 @@
+import re
+
+import pytest
+
+pytest.importorskip("gsuid_core")
+
+from ScoreEcho.utils.ops_stats import render_prometheus  # noqa: E402
+
+
+def _ops():
+    return {
+        "throughput": {"score": 1.5},
+        "queue": {"depth": 3, "inflight": 2},
+        "histograms": {
+            "score.total": {"p50": 0.5, "p95": 1.0, "p99": 2.0, "sum": 10.0, "count": 20},
+            "score.api": {"p50": 0.4, "p95": 0.9, "p99": 1.5, "sum": 8.0, "count": 20},
+        },
+        "counters": {"cache.bind.hit": 7, "breaker.opened": 1},
+        "endpoints": [
+            {"endpoint": "http://a", "state": "open", "failures": 5},
+            {"endpoint": 'http://b/"x"', "state": "closed", "failures": 0},
+        ],
+        "disk": {"bytes": 1024, "files": 4},
+    }
+
+
+def _families(text: str):
+    """按出现顺序返回每一行所属的指标族。"""
+    families = []
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            families.append(line.split()[2])
+            continue
+        name = re.match(r"[a-zA-Z_:][a-zA-Z0-9_:]*", line).group(0)
+        for suffix in ("_sum", "_count"):
+            if name.endswith(suffix) and name[: -len(suffix)] in families:
+                name = name[: -len(suffix)]
+        families.append(name)
+    return families
+
+
+def test_each_family_is_contiguous_and_typed_once():
+    text = render_prometheus(_ops())
+    assert text.endswith("\n")
+    families = _families(text)
+    seen = []
+    for family in families:
+        if not seen or seen[-1] != family:
+            assert family not in seen, f"{family} 的样本不连续"
+            seen.append(family)
+    types = [line.split()[2] for line in text.splitlines() if line.startswith("# TYPE ")]
+    assert len(types) == len(set(types))
+
+
+def test_samples():
+    text = render_prometheus(_ops())
+    lines = set(text.splitlines())
+    assert 'scoreecho_stage_seconds{pipeline="score",stage="total",quantile="0.99"} 2.000000' in lines
+    assert 'scoreecho_stage_seconds_count{pipeline="score",stage="api"} 20' in lines
+    assert "scoreecho_cache_bind_hit_total 7" in lines
+    assert 'scoreecho_requests_per_minute{pipeline="score"} 1.500' in lines
+    assert "scoreecho_queue_depth 3" in lines
+    assert 'scoreecho_endpoint_open{endpoint="http://a"} 1' in lines
+    assert 'scoreecho_endpoint_failures{endpoint="http://a"} 5' in lines
+    assert "scoreecho_user_disk_files 4" in lines
+
+
+def test_label_values_are_escaped():
+    text = render_prometheus(_ops())
+    assert 'scoreecho_endpoint_open{endpoint="http://b/\\"x\\""} 0' in text.splitlines()
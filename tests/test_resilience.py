@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("gsuid_core")
+
+from ScoreEcho.utils import resilience  # noqa: E402
+from ScoreEcho.utils.resilience import EndpointHealth, ServiceDegradedError, call_with_resilience  # noqa: E402
+
+
+def _open(health: EndpointHealth) -> None:
+    for _ in range(resilience._FAILURE_THRESHOLD):
+        health.record_failure()
+
+
+def _probe_due(health: EndpointHealth) -> None:
+    """把熔断时间往前拨，使其进入半开。"""
+    health.opened_at = time.monotonic() - resilience._PROBE_INTERVAL
+
+
+def test_opens_after_consecutive_failures():
+    health = EndpointHealth("test://threshold")
+    for _ in range(resilience._FAILURE_THRESHOLD - 1):
+        health.record_failure()
+    assert health.state == "closed"
+    assert health.acquire() is False
+    health.record_failure()
+    assert health.state == "open"
+    assert health.acquire() is None
+    assert health.retry_after() >= 1.0
+
+
+def test_half_open_lets_a_single_trial_through():
+    health = EndpointHealth("test://half-open")
+    _open(health)
+    _probe_due(health)
+    assert health.state == "half-open"
+    assert health.acquire() is True
+    # 试探进行中，其他请求仍被拒绝，提示至少等 1 秒
+    assert health.acquire() is None
+    assert health.retry_after() == 1.0
+
+
+def test_failed_trial_reopens():
+    health = EndpointHealth("test://trial-failed")
+    _open(health)
+    _probe_due(health)
+    assert health.acquire() is True
+    health.record_failure()
+    health.release_trial()
+    assert health.state == "open"
+    assert health.acquire() is None
+
+
+def test_successful_trial_closes():
+    health = EndpointHealth("test://trial-ok")
+    _open(health)
+    _probe_due(health)
+    assert health.acquire() is True
+    health.record_success(0.1)
+    health.release_trial()
+    assert health.state == "closed"
+    assert health.failures == 0
+    assert health.acquire() is False
+
+
+def test_open_breaker_rejects_without_calling(config):
+    config(hedge=False)
+    endpoint = "test://rejects"
+    _open(resilience.get_health(endpoint))
+    called = []
+
+    async def call(url: str) -> str:
+        called.append(url)
+        return "ok"
+
+    with pytest.raises(ServiceDegradedError) as info:
+        asyncio.run(call_with_resilience(endpoint, call))
+    assert called == []
+    assert info.value.retry_after >= 1.0
+
+
+def test_trial_call_closes_breaker(config):
+    config(hedge=False)
+    endpoint = "test://trial-call"
+    health = resilience.get_health(endpoint)
+    _open(health)
+    _probe_due(health)
+
+    async def call(url: str) -> str:
+        return url
+
+    assert asyncio.run(call_with_resilience(endpoint, call)) == endpoint
+    assert health.state == "closed"
+    assert not health.trial_inflight